@@ -0,0 +1,149 @@
+"""
+Benchmark: event classification throughput.
+
+Classifies synthetic events against the built-in rules plus a few
+hundred generated rules, with and without the per-event cache, and
+compares against the old substring if-chain.
+
+Run with:
+    python3 benchmarks/bench_classifier.py
+    python3 benchmarks/bench_classifier.py --events 200000 --rules 500
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from src.event_router import DEFAULT_RULES, EventClassifier, Rule  # noqa: E402
+
+
+def legacy_identify_event_type(event: Dict[str, Any]) -> str:
+    """The substring if-chain the router used before the rule table."""
+    alarm_name = str(event.get("detail", {}).get("alarmName", "")).lower()
+    if "cpu" in alarm_name:
+        return "EC2_HIGH_CPU"
+    if "status" in alarm_name:
+        return "EC2_STATUS_CHECK_FAILED"
+    if "stop" in alarm_name:
+        return "EC2_UNEXPECTED_STOP"
+    return "UNKNOWN"
+
+
+def synthetic_rules(count: int) -> List[Rule]:
+    rules = []
+    for n in range(count):
+        if n % 3 == 0:
+            rules.append(Rule(f"CUSTOM_{n}", namespace="Custom/App", metric_name=f"Metric{n:04d}"))
+        elif n % 3 == 1:
+            rules.append(Rule(f"CUSTOM_{n}", alarm_name=f"svc{n:04d}-latency"))
+        else:
+            rules.append(Rule(f"CUSTOM_{n}", source=f"acme.svc{n:04d}"))
+    return rules
+
+
+def synthetic_event(n: int, rule_count: int) -> Dict[str, Any]:
+    kind = n % 6
+    target = n % max(1, rule_count)
+    if kind == 0:
+        return {"source": "aws.cloudwatch", "detail": {"alarmName": f"HighCPU-{n}"}}
+    if kind == 1:
+        return {
+            "source": "aws.cloudwatch",
+            "detail": {
+                "alarmName": f"web-{n}",
+                "configuration": {
+                    "metrics": [
+                        {"metricStat": {"metric": {"namespace": "AWS/EC2", "metricName": "StatusCheckFailed"}}}
+                    ]
+                },
+            },
+        }
+    if kind == 2:
+        return {"source": "aws.cloudwatch", "detail": {"alarmName": f"svc{target:04d}-latency-{n}"}}
+    if kind == 3:
+        return {
+            "source": "aws.cloudwatch",
+            "detail": {
+                "alarmName": f"app-{n}",
+                "configuration": {
+                    "metrics": [
+                        {"metricStat": {"metric": {"namespace": "Custom/App", "metricName": f"Metric{target:04d}"}}}
+                    ]
+                },
+            },
+        }
+    if kind == 4:
+        return {"source": f"acme.svc{target:04d}", "detail": {}}
+    return {"source": "aws.cloudwatch", "detail": {"alarmName": f"unmatched-{n}"}}
+
+
+def _throughput(fn, events: List[Dict[str, Any]]) -> Dict[str, float]:
+    started = time.perf_counter()
+    for event in events:
+        fn(event)
+    elapsed = time.perf_counter() - started
+    return {
+        "events": len(events),
+        "seconds": round(elapsed, 4),
+        "events_per_second": round(len(events) / elapsed),
+        "us_per_event": round(elapsed / len(events) * 1e6, 3),
+    }
+
+
+def run(event_count: int, rule_count: int, cardinality: int, seed: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    distinct = [synthetic_event(n, rule_count) for n in range(cardinality)]
+    events = [distinct[rng.randrange(cardinality)] for _ in range(event_count)]
+    rules = DEFAULT_RULES[:3] + synthetic_rules(rule_count) + DEFAULT_RULES[3:]
+
+    cached = EventClassifier(rules, cache_size=max(4096, cardinality))
+    uncached = EventClassifier(rules, cache_size=0)
+    cached.classify(events[0])
+    uncached.classify(events[0])
+
+    results = {
+        "rules": len(rules),
+        "distinct_events": cardinality,
+        "legacy_if_chain": _throughput(legacy_identify_event_type, events),
+        "compiled_cached": _throughput(cached.classify, events),
+        "compiled_uncached": _throughput(uncached.classify, events),
+    }
+
+    for name in ("legacy_if_chain", "compiled_cached", "compiled_uncached"):
+        r = results[name]
+        print(
+            f"{name:<18} {r['events']:>8} events | {r['seconds']:>8.3f}s | "
+            f"{r['events_per_second']:>9} ev/s | {r['us_per_event']:>7.3f} us/event"
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--events", type=int, default=1000000)
+    parser.add_argument("--rules", type=int, default=300)
+    parser.add_argument(
+        "--cardinality",
+        type=int,
+        default=10000,
+        help="Number of distinct alarm events the stream is drawn from.",
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write results as JSON to this path.")
+    args = parser.parse_args()
+
+    results = run(args.events, args.rules, args.cardinality, args.seed)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Microbenchmark: AWS client acquisition, cold vs warm.
+
+Compares building a fresh client per call (the old behaviour) with the
+memoized pool in src.utils.aws_clients. No AWS calls are made; only
+client construction is timed, so it runs offline.
+
+Run with:
+    python3 benchmarks/bench_client_pool.py
+    python3 benchmarks/bench_client_pool.py --iterations 200 --service dynamodb
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+os.environ.setdefault("AWS_REGION", "ap-southeast-2")
+
+import boto3  # noqa: E402
+from boto3.session import Session  # noqa: E402
+
+from src.utils import aws_clients  # noqa: E402
+
+
+def _time_calls(fn: Callable[[], Any], iterations: int) -> Dict[str, float]:
+    samples: List[float] = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return {
+        "iterations": iterations,
+        "mean_us": round(statistics.mean(samples), 2),
+        "p50_us": round(samples[len(samples) // 2], 2),
+        "p99_us": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 2),
+    }
+
+
+def run(service: str, iterations: int) -> Dict[str, Dict[str, float]]:
+    region = aws_clients.AWS_REGION
+
+    def fresh_session_client() -> Any:
+        return Session(region_name=region).client(service)
+
+    def default_session_client() -> Any:
+        return boto3.client(service, region_name=region)
+
+    def pooled_cold() -> Any:
+        aws_clients.reset_pools()
+        return aws_clients.get_client(service)
+
+    def pooled_warm() -> Any:
+        return aws_clients.get_client(service)
+
+    results = {
+        "fresh_session_client": _time_calls(fresh_session_client, max(1, iterations // 10)),
+        "boto3_client_per_call": _time_calls(default_session_client, iterations),
+        "pooled_cold": _time_calls(pooled_cold, max(1, iterations // 10)),
+    }
+    aws_clients.get_client(service)
+    results["pooled_warm"] = _time_calls(pooled_warm, iterations * 100)
+
+    for name, stats in results.items():
+        print(
+            f"{name:<24} mean {stats['mean_us']:>12.2f} us | "
+            f"p50 {stats['p50_us']:>12.2f} us | p99 {stats['p99_us']:>12.2f} us"
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--service", default="ses")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--output", help="Write results as JSON to this path.")
+    args = parser.parse_args()
+
+    results = run(args.service, args.iterations)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark: daily report read path, full-table Scan vs per-partition Query.
+
+Seeds an in-memory FakeTable with incidents spread over several days and
+compares read units, request count and wall time of both strategies.
+
+Run with:
+    python3 benchmarks/bench_daily_query.py
+    python3 benchmarks/bench_daily_query.py --sizes 10000,100000 --latency-ms 2
+"""
+
+import argparse
+import datetime
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from benchmarks.fakes import FakeTable  # noqa: E402
+from src.reporting.daily_report import (  # noqa: E402
+    get_incidents_for_date,
+    scan_incidents_for_date,
+)
+from src.utils.config import INCIDENT_EVENT_TYPES  # noqa: E402
+
+START_DATE = datetime.datetime(2025, 11, 1)
+
+SAMPLE_RAW_EVENT = {
+    "detail-type": "CloudWatch Alarm State Change",
+    "source": "aws.cloudwatch",
+    "alarmName": "StatusCheckFailedAlarm",
+    "state": {"value": "ALARM", "reason": "StatusCheckFailed > 0 for 1 datapoints"},
+    "metric": {
+        "namespace": "AWS/EC2",
+        "metricName": "StatusCheckFailed",
+        "period": 60,
+        "stat": "Minimum",
+        "dimensions": [{"name": "InstanceId", "value": "i-1234567890abcdef0"}],
+    },
+}
+
+
+def synthetic_incidents(count: int, days: int) -> Iterator[Dict[str, Any]]:
+    """Yield `count` incidents spread evenly over `days` days."""
+    span = days * 86400
+    event_types = INCIDENT_EVENT_TYPES
+    for n in range(count):
+        created = START_DATE + datetime.timedelta(seconds=n * span / count)
+        created_at = created.isoformat() + "Z"
+        event_type = event_types[n % len(event_types)]
+        yield {
+            "pk": "INCIDENT#" + event_type,
+            "sk": f"{created_at}#{n:032x}",
+            "event_type": event_type,
+            "instance_id": f"i-{n % 5000:017x}",
+            "remediation_type": event_type,
+            "action": "WOULD_REBOOT",
+            "message": "DryRun succeeded; real reboot skipped because DRY_RUN_ONLY=true",
+            "created_at": created_at,
+            "raw_event": SAMPLE_RAW_EVENT,
+        }
+
+
+def _measure(table: FakeTable, fn) -> Dict[str, Any]:
+    table.reset_metrics()
+    started = time.perf_counter()
+    items = fn()
+    elapsed = time.perf_counter() - started
+    return {
+        "items": len(items),
+        "requests": sum(table.requests.values()),
+        "read_units": table.read_units,
+        "seconds": round(elapsed, 4),
+        "_keys": {(i["pk"], i["sk"]) for i in items},
+    }
+
+
+def run(sizes: List[int], days: int, latency: float) -> List[Dict[str, Any]]:
+    report_date = (START_DATE + datetime.timedelta(days=days // 2)).strftime("%Y-%m-%d")
+    results = []
+
+    for size in sizes:
+        table = FakeTable(request_latency=latency)
+        table.load(synthetic_incidents(size, days))
+
+        scan = _measure(table, lambda: scan_incidents_for_date(table, report_date))
+        query = _measure(
+            table, lambda: get_incidents_for_date(table, report_date, scan_unknown=False)
+        )
+
+        if scan.pop("_keys") != query.pop("_keys"):
+            raise AssertionError(f"Scan and Query disagree at {size} incidents")
+
+        results.append(
+            {"stored_incidents": size, "date": report_date, "scan": scan, "query": query}
+        )
+        print(
+            f"{size:>9} stored | {query['items']:>7} that day | "
+            f"scan: {scan['read_units']:>10.1f} RU {scan['requests']:>5} req "
+            f"{scan['seconds']:>8.3f}s | "
+            f"query: {query['read_units']:>8.1f} RU {query['requests']:>4} req "
+            f"{query['seconds']:>7.3f}s"
+        )
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=5.0,
+        help="Injected round-trip latency per DynamoDB request.",
+    )
+    parser.add_argument("--output", help="Write results as JSON to this path.")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    results = run(sizes, args.days, args.latency_ms / 1000.0)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Benchmark: remediation Lambda throughput and latency, offline.
+
+Drives `lambda_handler` end to end against the in-memory AWS fakes
+(benchmarks/fakes.py `installed()`: DynamoDB table, EC2, SES, S3) with
+injected per-service latency, in two modes:
+
+  - single: one alarm event per invocation (EventBridge / direct invoke)
+  - batch:  SQS batches of --batch-size records (handle_batch worker pool,
+            coalesced EC2 calls, BatchWriteItem)
+
+Events mix StatusCheckFailed, HighCPU and unexpected-stop alarms over
+--instances instances; each has its own id, so none is a duplicate.
+Reported per mode: events/s, p50 / p99 / max invocation latency, failed
+events and AWS requests per event.
+
+Run with:
+    python3 benchmarks/bench_handler.py
+    python3 benchmarks/bench_handler.py --events 2000 --latency dynamodb=5,ec2=20
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+# Per-event info logs would dominate the timings (and the terminal).
+os.environ.setdefault("LOG_LEVEL", "warning")
+
+from benchmarks.fakes import installed  # noqa: E402
+from src.lambda_handler import lambda_handler  # noqa: E402
+from src.utils import metrics  # noqa: E402
+
+MODES = ("single", "batch")
+
+# (alarm name suffix, namespace, metric) per event type in the mix.
+ALARM_KINDS = [
+    ("StatusCheckFailed", "AWS/EC2", "StatusCheckFailed"),
+    ("HighCPU", "AWS/EC2", "CPUUtilization"),
+    ("InstanceStopped", "Custom/EC2", "InstanceRunning"),
+]
+
+
+def parse_latency(spec: str) -> Dict[str, float]:
+    """"dynamodb=5,ec2=20" (milliseconds) -> {"dynamodb": 0.005, "ec2": 0.02}."""
+    latency: Dict[str, float] = {}
+    for pair in filter(None, (p.strip() for p in spec.split(","))):
+        service, _, ms = pair.partition("=")
+        latency[service.strip()] = float(ms) / 1000.0
+    return latency
+
+
+def alarm_event(n: int, instances: int) -> Dict[str, Any]:
+    """The n-th CloudWatch alarm state-change event of the mix."""
+    suffix, namespace, metric = ALARM_KINDS[n % len(ALARM_KINDS)]
+    instance_id = f"i-{n % instances:017x}"
+    now = datetime.datetime.utcnow().isoformat() + "Z"
+    return {
+        "version": "0",
+        "id": str(uuid.uuid4()),
+        "detail-type": "CloudWatch Alarm State Change",
+        "source": "aws.cloudwatch",
+        "account": "123456789012",
+        "time": now,
+        "region": "ap-southeast-2",
+        "resources": [f"arn:aws:cloudwatch:ap-southeast-2:123456789012:alarm:{instance_id}-{suffix}"],
+        "detail": {
+            "alarmName": f"{instance_id}-{suffix}",
+            "state": {"value": "ALARM", "reason": "Threshold Crossed", "timestamp": now},
+            "configuration": {
+                "metrics": [
+                    {
+                        "metricStat": {
+                            "metric": {
+                                "namespace": namespace,
+                                "metricName": metric,
+                                "dimensions": [{"name": "InstanceId", "value": instance_id}],
+                            },
+                            "period": 60,
+                            "stat": "Maximum",
+                        }
+                    }
+                ]
+            },
+        },
+    }
+
+
+def sqs_batch(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "Records": [
+            {"messageId": str(uuid.uuid4()), "eventSource": "aws:sqs", "body": json.dumps(e)}
+            for e in events
+        ]
+    }
+
+
+def _invocations(mode: str, count: int, instances: int, batch_size: int) -> Iterator[Dict[str, Any]]:
+    events = [alarm_event(n, instances) for n in range(count)]
+    if mode == "single":
+        yield from events
+    else:
+        for start in range(0, count, batch_size):
+            yield sqs_batch(events[start : start + batch_size])
+
+
+def _failed_events(mode: str, response: Dict[str, Any]) -> int:
+    if mode == "single":
+        return 0 if response.get("statusCode") == 200 else 1
+    return len(response.get("batchItemFailures", []))
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """`q` quantile of sorted `samples` (nearest rank)."""
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def _measure(
+    mode: str, count: int, instances: int, batch_size: int, latency: Dict[str, float]
+) -> Dict[str, Any]:
+    emf_bytes = [0]
+    metrics.set_emitter(lambda line: emf_bytes.__setitem__(0, emf_bytes[0] + len(line)))
+    try:
+        with installed(latency=latency) as aws:
+            # Warm up: remediation module imports, DryRun permission probes.
+            for invocation in _invocations(mode, len(ALARM_KINDS), instances, batch_size):
+                lambda_handler(invocation, None)
+            aws.reset_metrics()
+            emf_bytes[0] = 0
+
+            invocations = list(_invocations(mode, count, instances, batch_size))
+            samples: List[float] = []
+            failed = 0
+            started = time.perf_counter()
+            for invocation in invocations:
+                t0 = time.perf_counter()
+                try:
+                    failed += _failed_events(mode, lambda_handler(invocation, None))
+                except Exception:
+                    failed += len(invocation.get("Records", [invocation]))
+                samples.append((time.perf_counter() - t0) * 1000)
+            elapsed = time.perf_counter() - started
+            requests = aws.requests()
+    finally:
+        metrics.set_emitter(None)
+
+    samples.sort()
+    return {
+        "mode": mode,
+        "events": count,
+        "batch_size": batch_size if mode == "batch" else 1,
+        "invocations": len(samples),
+        "seconds": round(elapsed, 3),
+        "events_per_second": round(count / elapsed, 1),
+        "p50_ms": round(percentile(samples, 0.50), 3),
+        "p99_ms": round(percentile(samples, 0.99), 3),
+        "max_ms": round(samples[-1], 3),
+        "failed_events": failed,
+        "aws_requests_per_event": {
+            service: round(sum(ops.values()) / count, 2) for service, ops in requests.items()
+        },
+        "emf_bytes_per_event": round(emf_bytes[0] / count),
+    }
+
+
+def run(
+    events: int,
+    batch_size: int = 10,
+    instances: int = 500,
+    latency: Dict[str, float] = None,
+    modes: List[str] = MODES,
+) -> List[Dict[str, Any]]:
+    results = []
+    for mode in modes:
+        row = _measure(mode, events, instances, batch_size, latency or {})
+        row["latency_ms"] = {k: v * 1000 for k, v in (latency or {}).items()}
+        results.append(row)
+        print(
+            f"{mode:<7} {row['events_per_second']:>9.1f} events/s | "
+            f"p50 {row['p50_ms']:>8.2f} ms | p99 {row['p99_ms']:>8.2f} ms | "
+            f"max {row['max_ms']:>8.2f} ms | {row['failed_events']} failed | "
+            f"requests/event {row['aws_requests_per_event']}"
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--instances", type=int, default=500)
+    parser.add_argument(
+        "--latency",
+        default="dynamodb=2,ec2=10,ses=20,s3=5",
+        help="Injected latency per service in ms, e.g. dynamodb=5,ec2=20.",
+    )
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--output", help="Write results as JSON to this path.")
+    args = parser.parse_args()
+
+    results = run(
+        args.events,
+        args.batch_size,
+        args.instances,
+        parse_latency(args.latency),
+        [m for m in args.modes.split(",") if m],
+    )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark: the SQLite incident store at report scale.
+
+Loads one day of synthetic incidents into a fresh SQLite database (WAL,
+indexed) with `put_batch`, then times what the daily report does with it:
+
+  - summary:     `daily_summary` (aggregate queries, no rows read)
+  - fingerprint: `fingerprint` with that summary
+  - report:      `iter_report_chunks`, the streamed Markdown report
+
+Items carry the compressed raw event blob new incidents are written with.
+
+Run with:
+    python3 benchmarks/bench_incident_store.py
+    python3 benchmarks/bench_incident_store.py --sizes 100000 1000000
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from benchmarks.bench_daily_query import (  # noqa: E402
+    SAMPLE_RAW_EVENT,
+    START_DATE,
+    synthetic_incidents,
+)
+from src.reporting.daily_report import iter_report_chunks  # noqa: E402
+from src.storage.payload_codec import RAW_EVENT_ATTR, encode_raw_event  # noqa: E402
+from src.storage.sqlite_store import SQLiteIncidentStore  # noqa: E402
+
+REPORT_DATE = START_DATE.strftime("%Y-%m-%d")
+LOAD_BATCH = 10000
+
+
+def _items(count: int) -> Iterator[Dict[str, Any]]:
+    payload = encode_raw_event(SAMPLE_RAW_EVENT, "", "")
+    for item in synthetic_incidents(count, 1):
+        del item[RAW_EVENT_ATTR]
+        item.update(payload)
+        yield item
+
+
+def _timed(fn) -> Any:
+    started = time.perf_counter()
+    value = fn()
+    return value, round(time.perf_counter() - started, 3)
+
+
+def _load(store: SQLiteIncidentStore, count: int) -> None:
+    batch: List[Dict[str, Any]] = []
+    for item in _items(count):
+        batch.append(item)
+        if len(batch) >= LOAD_BATCH:
+            store.put_batch(batch)
+            batch = []
+    if batch:
+        store.put_batch(batch)
+
+
+def _render(store: SQLiteIncidentStore, summary: Dict[str, Any]) -> int:
+    return sum(len(chunk) for chunk in iter_report_chunks(store, REPORT_DATE, summary))
+
+
+def run(sizes: List[int]) -> List[Dict[str, Any]]:
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SQLiteIncidentStore(str(Path(tmp) / "incidents.db"))
+            try:
+                _, load_seconds = _timed(lambda: _load(store, size))
+                summary, summary_seconds = _timed(lambda: store.daily_summary(REPORT_DATE))
+                _, fingerprint_seconds = _timed(lambda: store.fingerprint(REPORT_DATE, summary))
+                report_chars, seconds = _timed(lambda: _render(store, summary))
+                db_mib = sum(f.stat().st_size for f in Path(tmp).iterdir()) / 2**20
+            finally:
+                store.close()
+
+        assert summary["total"] == size, summary
+        row = {
+            "incidents": size,
+            "backend": "sqlite",
+            "load_rows_per_second": round(size / load_seconds),
+            "summary_seconds": summary_seconds,
+            "fingerprint_seconds": fingerprint_seconds,
+            "seconds": seconds,
+            "report_mib": round(report_chars / 2**20, 2),
+            "database_mib": round(db_mib, 1),
+        }
+        results.append(row)
+        print(
+            f"{size:>8} sqlite  load {row['load_rows_per_second']:>8} rows/s | "
+            f"summary {summary_seconds:>6.3f}s | fingerprint {fingerprint_seconds:>6.3f}s | "
+            f"report {seconds:>7.3f}s ({row['report_mib']} MiB) | db {row['database_mib']} MiB"
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--output", help="Write results as JSON to this path.")
+    args = parser.parse_args()
+
+    results = run(args.sizes)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Benchmark: logging overhead per remediation invocation.
+
+Replays the log calls one `process_event` makes (raw event at step 1,
+instance, event type, remediation result, stored item, response) for a
+small and an oversized alarm event, and compares:
+
+  - eager:            the previous log_json (json.dumps of every payload,
+                      whether or not the record is emitted)
+  - lazy_json:        current log_json, stdlib encoder
+  - lazy_orjson:      current log_json, orjson encoder (when installed)
+  - eager_disabled /  the same with the logger at WARNING, so no info
+    lazy_disabled:    record is emitted
+  - lazy_sampled:     current log_json with a 10% sample rate
+
+Records are written to /dev/null through the usual formatter. Reported:
+microseconds per invocation (best of several rounds) and bytes of log
+output per invocation.
+
+Run with:
+    python3 benchmarks/bench_logging.py
+    python3 benchmarks/bench_logging.py --repeat 2000 --output logging.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from benchmarks.bench_payload_codec import _sample_events  # noqa: E402
+from src.utils import logging_utils  # noqa: E402
+
+# Timings are the best of this many rounds, to damp scheduler noise.
+ROUNDS = 5
+
+
+class _CountingDevNull:
+    """Write target that only counts characters."""
+
+    def __init__(self) -> None:
+        self.chars = 0
+        self._null = open(os.devnull, "w")
+
+    def write(self, text: str) -> int:
+        self.chars += len(text)
+        return self._null.write(text)
+
+    def flush(self) -> None:
+        pass
+
+
+def _eager_log_json(
+    logger: logging.Logger, level: str, message: str, extra: Optional[Dict[str, Any]] = None
+) -> None:
+    # log_json before lazy serialization, kept here for comparison.
+    payload: Dict[str, Any] = {"message": message}
+    if extra:
+        payload["extra"] = extra
+    text = json.dumps(payload, ensure_ascii=False, default=str)
+    getattr(logger, level)(text)
+
+
+def _invocation(log: Callable[..., None], logger: logging.Logger, event: Dict[str, Any]) -> None:
+    remediation = {
+        "remediation_type": "EC2_STATUS_CHECK_FAILED",
+        "instance_id": "i-0abc1234def567890",
+        "action": "WOULD_REBOOT",
+        "message": "DryRun succeeded; real reboot skipped because DRY_RUN_ONLY=true",
+    }
+    saved_item = {
+        "pk": "INCIDENT#EC2_STATUS_CHECK_FAILED",
+        "sk": "2025-11-27T08:15:12.257Z#5b1e0c0d-7e11-4d2c-9c2a-b8e0b5e17b1d",
+        "event_type": "EC2_STATUS_CHECK_FAILED",
+        "instance_id": "i-0abc1234def567890",
+        "created_at": "2025-11-27T08:15:12.257Z",
+        "raw_event_encoding": "zlib-d1",
+        **remediation,
+    }
+    log(logger, "info", "Incoming CloudWatch/SNS event (deployed-v2)", {"step": 1, "event": event})
+    log(logger, "info", "Extracted instance ID", {"step": 2, "instance_id": "i-0abc1234def567890"})
+    log(logger, "info", "Identified event type", {"step": 3, "event_type": "EC2_STATUS_CHECK_FAILED"})
+    log(logger, "info", "StatusCheckFailed remediation started")
+    log(logger, "info", "Attempting to reboot instance", {"instance_id": "i-0abc1234def567890"})
+    log(logger, "info", "Remediation executed", {"step": 4, "remediation_result": remediation})
+    log(logger, "info", "Incident stored in DynamoDB", {"step": 5, "saved_item": saved_item})
+    log(logger, "info", "Lambda execution completed successfully", {"step": 6, "response_body": remediation})
+
+
+def _measure(
+    variant: str, event: Dict[str, Any], repeat: int, stream: _CountingDevNull
+) -> Dict[str, float]:
+    logger = logging.getLogger(f"bench_logging.{variant}")
+    logger.propagate = False
+    logger.handlers = [logging.StreamHandler(stream)]
+    logger.handlers[0].setFormatter(
+        logging.Formatter("%(asctime)s [%(levelname)s] %(name)s - %(message)s")
+    )
+    logger.setLevel(logging.WARNING if variant.endswith("_disabled") else logging.INFO)
+
+    eager = variant.startswith("eager")
+    if variant == "lazy_orjson":
+        logging_utils.dumps = logging_utils._load_encoder()
+    else:
+        logging_utils.dumps = logging_utils._json_dumps
+    logging_utils.LOG_SAMPLE_RATE = 0.1 if variant == "lazy_sampled" else 1.0
+
+    def invoke() -> None:
+        if eager:
+            _invocation(_eager_log_json, logger, event)
+        else:
+            with logging_utils.log_sampling("EC2_STATUS_CHECK_FAILED"):
+                _invocation(logging_utils.log_json, logger, event)
+
+    invoke()  # warm up
+    best = float("inf")
+    stream.chars = 0
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            invoke()
+        best = min(best, time.perf_counter() - started)
+    return {
+        "us_per_invocation": round(best / repeat * 1e6, 1),
+        "log_bytes_per_invocation": round(stream.chars / (repeat * ROUNDS)),
+    }
+
+
+def run(repeat: int) -> List[Dict[str, Any]]:
+    events = _sample_events()
+    cases = {
+        "small": events["eventbridge_alarm"],
+        "oversized": events["oversized_alarm"],
+    }
+    variants = ["eager", "lazy_json", "eager_disabled", "lazy_disabled", "lazy_sampled"]
+    try:
+        import orjson  # noqa: F401
+
+        variants.insert(2, "lazy_orjson")
+    except ImportError:
+        pass
+
+    original = (logging_utils.dumps, logging_utils.LOG_SAMPLE_RATE)
+    stream = _CountingDevNull()
+    results = []
+    try:
+        for case, event in cases.items():
+            event_bytes = len(json.dumps(event))
+            n = repeat if case == "small" else max(1, repeat // 50)
+            for variant in variants:
+                row = {"event": case, "event_bytes": event_bytes, "variant": variant}
+                row.update(_measure(variant, event, n, stream))
+                results.append(row)
+                print(
+                    f"{case:<10} {variant:<15} {row['us_per_invocation']:>10.1f} us | "
+                    f"{row['log_bytes_per_invocation']:>9} log bytes"
+                )
+    finally:
+        logging_utils.dumps, logging_utils.LOG_SAMPLE_RATE = original
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--output", help="Write results as JSON to this path.")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
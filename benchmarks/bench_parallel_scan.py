@@ -0,0 +1,82 @@
+"""
+Benchmark: full-table export with a sequential vs segmented parallel scan.
+
+Streams every item of an in-memory FakeTable through `parallel_scan` for
+several segment counts and reports throughput with injected per-request
+latency.
+
+Run with:
+    python3 benchmarks/bench_parallel_scan.py
+    python3 benchmarks/bench_parallel_scan.py --size 1000000 --segments 1,8,32
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from benchmarks.bench_daily_query import synthetic_incidents  # noqa: E402
+from benchmarks.fakes import FakeTable  # noqa: E402
+from src.reporting.daily_report import parallel_scan  # noqa: E402
+
+
+def run(size: int, segment_counts: List[int], in_flight: int, latency: float) -> List[Dict[str, Any]]:
+    table = FakeTable(request_latency=latency)
+    table.load(synthetic_incidents(size, days=30))
+    results = []
+
+    for segments in segment_counts:
+        table.reset_metrics()
+        started = time.perf_counter()
+        count = sum(
+            1
+            for _ in parallel_scan(
+                table, total_segments=segments, max_in_flight_pages=in_flight
+            )
+        )
+        elapsed = time.perf_counter() - started
+
+        if count != size:
+            raise AssertionError(f"Expected {size} items, streamed {count}")
+
+        results.append(
+            {
+                "segments": segments,
+                "items": count,
+                "requests": sum(table.requests.values()),
+                "read_units": table.read_units,
+                "seconds": round(elapsed, 4),
+                "items_per_second": round(count / elapsed),
+            }
+        )
+        print(
+            f"segments={segments:>3} | {table.requests.get('Scan', 0):>5} pages | "
+            f"{elapsed:>7.3f}s | {count / elapsed:>10.0f} items/s"
+        )
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=200000)
+    parser.add_argument("--segments", default="1,4,8,16")
+    parser.add_argument("--in-flight", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--output", help="Write results as JSON to this path.")
+    args = parser.parse_args()
+
+    segment_counts = [int(s) for s in args.segments.split(",") if s]
+    results = run(args.size, segment_counts, args.in_flight, args.latency_ms / 1000.0)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
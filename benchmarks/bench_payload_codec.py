@@ -0,0 +1,192 @@
+"""
+Benchmark: stored size of incident items by raw_event encoding.
+
+Builds incident items for the sample events shipped with the repo (plus a
+full EventBridge alarm event and an oversized one) with raw_event stored
+as a nested map (the old layout) and through the payload codec, and
+reports item bytes, write capacity units per put and encode/decode cost.
+
+Run with:
+    python3 benchmarks/bench_payload_codec.py
+    python3 benchmarks/bench_payload_codec.py --output codec.json
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from benchmarks.bench_daily_query import SAMPLE_RAW_EVENT  # noqa: E402
+from benchmarks.fakes import item_size  # noqa: E402
+from src.storage import payload_codec  # noqa: E402
+
+# One write capacity unit covers 1 KB of item size.
+WRITE_UNIT_BYTES = 1024
+
+# A complete CloudWatch alarm state-change event as EventBridge delivers it.
+EVENTBRIDGE_ALARM_EVENT = {
+    "version": "0",
+    "id": "c4c1c1c9-6542-e61b-6ef0-8c4d36933a92",
+    "detail-type": "CloudWatch Alarm State Change",
+    "source": "aws.cloudwatch",
+    "account": "123456789012",
+    "time": "2025-11-27T08:15:12Z",
+    "region": "ap-southeast-2",
+    "resources": ["arn:aws:cloudwatch:ap-southeast-2:123456789012:alarm:web-01-StatusCheckFailed"],
+    "detail": {
+        "alarmName": "web-01-StatusCheckFailed",
+        "state": {
+            "value": "ALARM",
+            "reason": (
+                "Threshold Crossed: 1 datapoint [1.0 (27/11/25 08:14:00)] was greater than "
+                "the threshold (0.0)."
+            ),
+            "reasonData": (
+                '{"version":"1.0","queryDate":"2025-11-27T08:15:12.254+0000",'
+                '"startDate":"2025-11-27T08:14:00.000+0000","statistic":"Maximum",'
+                '"period":60,"recentDatapoints":[1.0],"threshold":0.0,"evaluatedDatapoints":'
+                '[{"timestamp":"2025-11-27T08:14:00.000+0000","sampleCount":1.0,"value":1.0}]}'
+            ),
+            "timestamp": "2025-11-27T08:15:12.257+0000",
+        },
+        "previousState": {
+            "value": "OK",
+            "reason": (
+                "Threshold Crossed: 1 datapoint [0.0 (27/11/25 08:09:00)] was not greater than "
+                "the threshold (0.0)."
+            ),
+            "timestamp": "2025-11-27T08:10:12.241+0000",
+        },
+        "configuration": {
+            "description": "Reboot web-01 when the instance status check fails",
+            "metrics": [
+                {
+                    "id": "b8e0b5e1-7b1d-4d2c-9c2a-5b1e0c0d7e11",
+                    "metricStat": {
+                        "metric": {
+                            "namespace": "AWS/EC2",
+                            "name": "StatusCheckFailed",
+                            "dimensions": {"InstanceId": "i-0abc1234def567890"},
+                        },
+                        "period": 60,
+                        "stat": "Maximum",
+                    },
+                    "returnData": True,
+                }
+            ],
+        },
+    },
+}
+
+
+def _sample_events() -> Dict[str, Any]:
+    from scripts.simulate_event import load_sample_event
+
+    sample_log = json.loads((ROOT_DIR / "reports" / "sample-event-log.json").read_text())
+    oversized = json.loads(json.dumps(EVENTBRIDGE_ALARM_EVENT))
+    # Alarms on metric math with many inputs: distinct ids defeat compression.
+    oversized["detail"]["configuration"]["metrics"] = [
+        dict(metric, id=f"m{n:05d}-{n * 7919:08x}")
+        for n, metric in enumerate(
+            oversized["detail"]["configuration"]["metrics"] * 3000
+        )
+    ]
+    return {
+        "simulate_event": load_sample_event(),
+        "sample_event_log": sample_log["raw_event"],
+        "bench_raw_event": SAMPLE_RAW_EVENT,
+        "eventbridge_alarm": EVENTBRIDGE_ALARM_EVENT,
+        "oversized_alarm": oversized,
+    }
+
+
+def _base_item() -> Dict[str, Any]:
+    return {
+        "pk": "INCIDENT#EC2_STATUS_CHECK_FAILED",
+        "sk": "2025-11-27T08:15:12.412345Z#5f0e2f0c-3c4e-4c5e-9f0d-7a1b2c3d4e5f",
+        "event_type": "EC2_STATUS_CHECK_FAILED",
+        "instance_id": "i-0abc1234def567890",
+        "remediation_type": "EC2_STATUS_CHECK_FAILED",
+        "action": "WOULD_REBOOT",
+        "message": "DryRun succeeded; real reboot skipped because DRY_RUN_ONLY=true",
+        "created_at": "2025-11-27T08:15:12.412345Z",
+    }
+
+
+def _per_call_us(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return round((time.perf_counter() - started) / repeat * 1e6, 2)
+
+
+def run(repeat: int) -> List[Dict[str, Any]]:
+    # Keep the oversized payload inline-or-pointer without touching S3.
+    payload_codec._offload = lambda data, pk, sk: f"s3://bucket/raw-events/{pk}/{sk}.json.gz"
+
+    results = []
+    for name, event in _sample_events().items():
+        base = _base_item()
+        legacy = dict(base, raw_event=event)
+        encoded = dict(base, **payload_codec.encode_raw_event(event, base["pk"], base["sk"]))
+
+        legacy_bytes = item_size(legacy)
+        encoded_bytes = item_size(encoded)
+        encoding = encoded[payload_codec.ENCODING_ATTR]
+        decode_us = None
+        if encoding != payload_codec.ENCODING_S3:
+            assert payload_codec.decode_raw_event(encoded) == json.loads(json.dumps(event))
+            decode_us = _per_call_us(lambda: payload_codec.decode_raw_event(encoded), repeat)
+
+        results.append(
+            {
+                "event": name,
+                "encoding": encoding,
+                "map_item_bytes": legacy_bytes,
+                "encoded_item_bytes": encoded_bytes,
+                "bytes_saved_pct": round(100 * (1 - encoded_bytes / legacy_bytes), 1),
+                "map_wcu": math.ceil(legacy_bytes / WRITE_UNIT_BYTES),
+                "encoded_wcu": math.ceil(encoded_bytes / WRITE_UNIT_BYTES),
+                "fits_400kb": legacy_bytes <= 400 * 1024,
+                "encode_us": _per_call_us(
+                    lambda: payload_codec.encode_raw_event(event, base["pk"], base["sk"]),
+                    repeat if name != "oversized_alarm" else max(1, repeat // 100),
+                ),
+                "decode_us": decode_us,
+            }
+        )
+
+    print(
+        f"{'event':<18} {'encoding':<8} {'map B':>8} {'enc B':>7} {'saved':>6} "
+        f"{'WCU':>9} {'enc us':>8} {'dec us':>8}"
+    )
+    for r in results:
+        print(
+            f"{r['event']:<18} {r['encoding']:<8} {r['map_item_bytes']:>8} "
+            f"{r['encoded_item_bytes']:>7} {r['bytes_saved_pct']:>5}% "
+            f"{r['map_wcu']:>4}->{r['encoded_wcu']:<4} {r['encode_us']:>8} "
+            f"{r['decode_us'] if r['decode_us'] is not None else '-':>8}"
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--output", help="Write results as JSON to this path.")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark: peak memory of daily report generation and upload.
+
+Loads one day of synthetic incidents into an in-memory table (reads
+return fresh copies, like deserialized DynamoDB responses) and compares:
+
+  - list:               query everything, render one string, put_object
+  - stream:             k-way merged query stream rendered row by row into
+                        a multipart upload, summary from the daily aggregate
+  - stream_two_pass:    the same without an aggregate (summary pass first)
+
+Peak memory is measured with tracemalloc (Python allocations only).
+
+Run with:
+    python3 benchmarks/bench_report_memory.py
+    python3 benchmarks/bench_report_memory.py --sizes 10000 100000 300000
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from benchmarks.bench_daily_query import START_DATE, synthetic_incidents  # noqa: E402
+from benchmarks.fakes import FakeS3Client, FakeTable  # noqa: E402
+from src.storage.dynamodb_client import DynamoDBIncidentStore  # noqa: E402
+from src.reporting.daily_report import (  # noqa: E402
+    generate_markdown,
+    get_incidents_for_date,
+    iter_report_chunks,
+)
+from src.reporting.s3_multipart import S3MultipartWriter  # noqa: E402
+from src.storage.daily_aggregates import summarize_incidents  # noqa: E402
+
+BUCKET = "reports"
+REPORT_DATE = START_DATE.strftime("%Y-%m-%d")
+
+
+def _list_path(table: FakeTable, s3: FakeS3Client, summary: Dict[str, Any]) -> None:
+    incidents = get_incidents_for_date(table, REPORT_DATE)
+    markdown = generate_markdown(REPORT_DATE, incidents)
+    s3.put_object(Bucket=BUCKET, Key="list.md", Body=markdown.encode("utf-8"))
+
+
+def _stream_path(table: FakeTable, s3: FakeS3Client, summary: Dict[str, Any]) -> None:
+    with S3MultipartWriter(BUCKET, "stream.md", client=s3) as writer:
+        for chunk in iter_report_chunks(DynamoDBIncidentStore(table), REPORT_DATE, summary):
+            writer.write(chunk)
+
+
+def _two_pass_path(table: FakeTable, s3: FakeS3Client, summary: Dict[str, Any]) -> None:
+    with S3MultipartWriter(BUCKET, "two-pass.md", client=s3) as writer:
+        for chunk in iter_report_chunks(DynamoDBIncidentStore(table), REPORT_DATE):
+            writer.write(chunk)
+
+
+PATHS: Dict[str, Callable[[FakeTable, FakeS3Client, Dict[str, Any]], None]] = {
+    "list": _list_path,
+    "stream": _stream_path,
+    "stream_two_pass": _two_pass_path,
+}
+
+
+def _check_outputs_match(count: int) -> None:
+    table = FakeTable()
+    table.load(synthetic_incidents(count, 1))
+    s3 = FakeS3Client()
+    summary = summarize_incidents(get_incidents_for_date(table, REPORT_DATE))
+    for fn in PATHS.values():
+        fn(table, s3, summary)
+    bodies = {key: obj["Body"] for (_, key), obj in s3.objects.items()}
+    assert len(set(bodies.values())) == 1, "streamed report differs from list report"
+
+
+def _measure(fn, table: FakeTable, s3: FakeS3Client, summary: Dict[str, Any]) -> Dict[str, Any]:
+    table.reset_metrics()
+    s3.reset_metrics()
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    fn(table, s3, summary)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "peak_mib": round(peak / 2**20, 2),
+        "seconds": round(elapsed, 3),
+        "report_mib": round(s3.bytes_received / 2**20, 2),
+        "s3_requests": sum(s3.requests.values()),
+        "dynamodb_requests": sum(table.requests.values()),
+    }
+
+
+def run(sizes: List[int], paths: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    paths = list(PATHS) if paths is None else paths
+    _check_outputs_match(min(sizes + [2000]))
+
+    results = []
+    for size in sizes:
+        table = FakeTable(detach_reads=True)
+        table.load(synthetic_incidents(size, 1))
+        s3 = FakeS3Client(keep_bodies=False)
+        table.detach_reads = False
+        summary = summarize_incidents(get_incidents_for_date(table, REPORT_DATE))
+        table.detach_reads = True
+
+        for name in paths:
+            row = {"incidents": size, "path": name, **_measure(PATHS[name], table, s3, summary)}
+            results.append(row)
+            print(
+                f"{size:>8} {name:<16} peak {row['peak_mib']:>8.2f} MiB | "
+                f"{row['seconds']:>7.3f}s | report {row['report_mib']:>7.2f} MiB | "
+                f"{row['s3_requests']:>3} S3 / {row['dynamodb_requests']:>4} DynamoDB requests"
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--paths", nargs="+", choices=list(PATHS), default=list(PATHS))
+    parser.add_argument("--output", help="Write results as JSON to this path.")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.paths)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Benchmark: cold-start cost of both Lambda entry points.
+
+For each entry point a fresh interpreter is started several times and
+records:
+- `python -X importtime` totals and the heaviest modules,
+- import time of the handler module,
+- time-to-first-response: import + first invocation, including boto3
+  session/client construction. AWS calls are answered by canned HTTP
+  responses injected through a botocore `before-send` hook, so no
+  network or credentials are needed.
+
+Run with:
+    python3 benchmarks/bench_startup.py
+    python3 benchmarks/bench_startup.py --runs 10 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+ENTRY_POINTS = {
+    "auto_remediation": {
+        "module": "src.lambda_handler",
+        "event": {
+            "id": "bench-startup",
+            "detail-type": "CloudWatch Alarm State Change",
+            "source": "aws.cloudwatch",
+            "detail": {
+                "alarmName": "HighCPUAlarm",
+                "configuration": {
+                    "metrics": [
+                        {
+                            "metricStat": {
+                                "metric": {
+                                    "namespace": "AWS/EC2",
+                                    "metricName": "CPUUtilization",
+                                    "dimensions": [
+                                        {"name": "InstanceId", "value": "i-0bench"}
+                                    ],
+                                }
+                            }
+                        }
+                    ]
+                },
+            },
+        },
+    },
+    "daily_report": {
+        "module": "src.daily_report_lambda",
+        "event": {"date": "2025-11-24"},
+    },
+}
+
+CHILD_ENV = {
+    "AWS_REGION": "ap-southeast-2",
+    "AWS_ACCESS_KEY_ID": "bench",
+    "AWS_SECRET_ACCESS_KEY": "bench",
+    "AWS_EC2_METADATA_DISABLED": "true",
+    "REPORT_BUCKET_NAME": "bench-bucket",
+    "SES_SENDER": "bench@example.com",
+    "SES_RECIPIENT": "bench@example.com",
+}
+
+SES_SEND_EMAIL_XML = (
+    b'<SendEmailResponse xmlns="http://ses.amazonaws.com/doc/2010-12-01/">'
+    b"<SendEmailResult><MessageId>bench</MessageId></SendEmailResult>"
+    b"<ResponseMetadata><RequestId>bench</RequestId></ResponseMetadata>"
+    b"</SendEmailResponse>"
+)
+
+CANNED_RESPONSES = {
+    "dynamodb.PutItem": (200, {}, b"{}"),
+    "dynamodb.Query": (200, {}, b'{"Items": [], "Count": 0, "ScannedCount": 0}'),
+    "dynamodb.BatchWriteItem": (200, {}, b'{"UnprocessedItems": {}}'),
+    "ses.SendEmail": (200, {}, SES_SEND_EMAIL_XML),
+    "s3.PutObject": (200, {"ETag": '"bench"'}, b""),
+}
+
+
+class _RawBody:
+    def __init__(self, body: bytes):
+        self._body = body
+
+    def stream(self, **_: Any):
+        yield self._body
+
+
+def _canned_response(request: Any, event_name: str, **_: Any) -> Any:
+    from botocore.awsrequest import AWSResponse
+
+    operation = event_name.split(".", 1)[1]
+    status, headers, body = CANNED_RESPONSES.get(operation, (200, {}, b"{}"))
+    return AWSResponse(request.url, status, headers, _RawBody(body))
+
+
+def child_main(name: str) -> None:
+    """Runs inside the fresh interpreter; prints one JSON line."""
+    import importlib
+
+    spec = ENTRY_POINTS[name]
+    started = time.perf_counter()
+    module = importlib.import_module(spec["module"])
+    imported = time.perf_counter()
+    boto3_at_import = "boto3" in sys.modules
+
+    from src.utils.aws_clients import get_session
+
+    get_session().events.register("before-send", _canned_response)
+    module.lambda_handler(json.loads(json.dumps(spec["event"])), None)
+    responded = time.perf_counter()
+
+    print(
+        json.dumps(
+            {
+                "import_ms": (imported - started) * 1000,
+                "first_response_ms": (responded - started) * 1000,
+                "boto3_loaded_at_import": boto3_at_import,
+            }
+        )
+    )
+
+
+def _child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update(CHILD_ENV)
+    env["PYTHONPATH"] = str(ROOT_DIR)
+    return env
+
+
+def _importtime(module: str) -> Dict[str, Any]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR,
+        env=_child_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue  # header row
+        rows.append((parts[2].strip(), self_us, cumulative_us))
+
+    total_us = next((c for m, _, c in rows if m == module), 0)
+    heaviest = sorted(rows, key=lambda r: r[1], reverse=True)[:10]
+    return {
+        "total_ms": total_us / 1000,
+        "modules": len(rows),
+        "heaviest_self_ms": {m: s / 1000 for m, s, _ in heaviest},
+    }
+
+
+def _first_response(name: str, runs: int) -> Dict[str, Any]:
+    samples: List[Dict[str, Any]] = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        proc = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                f"from benchmarks.bench_startup import child_main; child_main({name!r})",
+            ],
+            cwd=ROOT_DIR,
+            env=_child_env(),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        sample = json.loads(proc.stdout.strip().splitlines()[-1])
+        sample["process_ms"] = (time.perf_counter() - started) * 1000
+        samples.append(sample)
+
+    return {
+        "runs": runs,
+        "import_ms_p50": statistics.median(s["import_ms"] for s in samples),
+        "first_response_ms_p50": statistics.median(s["first_response_ms"] for s in samples),
+        "process_ms_p50": statistics.median(s["process_ms"] for s in samples),
+        "boto3_loaded_at_import": samples[0]["boto3_loaded_at_import"],
+    }
+
+
+def run(runs: int) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for name, spec in ENTRY_POINTS.items():
+        results[name] = {
+            "importtime": _importtime(spec["module"]),
+            "startup": _first_response(name, runs),
+        }
+        startup = results[name]["startup"]
+        print(
+            f"{name:<17} importtime {results[name]['importtime']['total_ms']:>8.1f} ms | "
+            f"import {startup['import_ms_p50']:>8.1f} ms | "
+            f"first response {startup['first_response_ms_p50']:>8.1f} ms | "
+            f"process {startup['process_ms_p50']:>8.1f} ms | "
+            f"boto3 at import: {startup['boto3_loaded_at_import']}"
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Write results as JSON to this path.")
+    args = parser.parse_args()
+
+    results = run(args.runs)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,785 @@
+"""
+In-memory stand-ins for the AWS resources used by the pipeline.
+
+These fakes implement just enough of the boto3 surface for offline
+benchmarks: request counts, consumed capacity and injected latency are
+recorded so that access patterns can be compared without touching AWS.
+"""
+
+import bisect
+import contextlib
+import hashlib
+import io
+import math
+import pickle
+import re
+import threading
+import uuid
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from boto3.dynamodb.conditions import AttributeBase, ConditionBase
+
+# DynamoDB returns at most 1 MB of examined data per Query/Scan page.
+PAGE_LIMIT_BYTES = 1024 * 1024
+# One read capacity unit covers 4 KB (eventually consistent reads cost half).
+READ_UNIT_BYTES = 4096
+
+_UPDATE_CLAUSE_RE = re.compile(r"\b(SET|ADD|REMOVE)\b", re.IGNORECASE)
+# Commas between actions, not inside if_not_exists(...).
+_UPDATE_ACTION_SPLIT_RE = re.compile(r",(?![^(]*\))")
+_IF_NOT_EXISTS_RE = re.compile(r"^if_not_exists\(\s*([^,\s]+)\s*,\s*(:\w+)\s*\)$")
+
+
+def item_size(value: Any) -> int:
+    """Approximate DynamoDB item/attribute size in bytes."""
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, (int, float, Decimal)):
+        return len(str(value)) // 2 + 1
+    if isinstance(value, dict):
+        return 3 + sum(
+            len(str(k).encode("utf-8")) + item_size(v) + 1 for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return 3 + sum(item_size(v) + 1 for v in value)
+    return len(str(value))
+
+
+def _resolve(operand: Any, item: Dict[str, Any]) -> Any:
+    if isinstance(operand, AttributeBase):
+        value: Any = item
+        for part in operand.name.split("."):
+            if not isinstance(value, dict) or part not in value:
+                return _MISSING
+            value = value[part]
+        return value
+    return operand
+
+
+class _Missing:
+    pass
+
+
+_MISSING = _Missing()
+
+
+def evaluate(condition: ConditionBase, item: Dict[str, Any]) -> bool:
+    """Evaluate a boto3 condition object against a plain item dict."""
+    expression = condition.get_expression()
+    op = expression["operator"]
+    values = expression["values"]
+
+    if op == "AND":
+        return evaluate(values[0], item) and evaluate(values[1], item)
+    if op == "OR":
+        return evaluate(values[0], item) or evaluate(values[1], item)
+    if op == "NOT":
+        return not evaluate(values[0], item)
+
+    left = _resolve(values[0], item)
+    if op == "attribute_exists":
+        return left is not _MISSING
+    if op == "attribute_not_exists":
+        return left is _MISSING
+    if left is _MISSING:
+        return False
+
+    if op == "IN":
+        return left in values[1]
+    if op == "BETWEEN":
+        return values[1] <= left <= values[2]
+    if op == "begins_with":
+        return isinstance(left, str) and left.startswith(values[1])
+    if op == "contains":
+        return values[1] in left
+
+    right = _resolve(values[1], item)
+    if right is _MISSING:
+        return False
+    if op == "=":
+        return left == right
+    if op == "<>":
+        return left != right
+    if op == "<":
+        return left < right
+    if op == "<=":
+        return left <= right
+    if op == ">":
+        return left > right
+    if op == ">=":
+        return left >= right
+
+    raise NotImplementedError(f"Unsupported condition operator: {op}")
+
+
+def _flatten_and(condition: ConditionBase) -> List[ConditionBase]:
+    expression = condition.get_expression()
+    if expression["operator"] == "AND":
+        return _flatten_and(expression["values"][0]) + _flatten_and(
+            expression["values"][1]
+        )
+    return [condition]
+
+
+class FakeTable:
+    """
+    Sorted in-memory table keyed on (pk, sk).
+
+    Mirrors the paging and capacity rules of Query/Scan: each request
+    examines at most 1 MB, consumes read units for everything it
+    examines (not only what the filter keeps) and sleeps for
+    `request_latency` seconds to stand in for the network round-trip.
+    Returned items are the stored dicts; callers must not mutate them.
+    With `detach_reads` they are fresh copies instead, allocated per
+    request like boto3's deserialized responses (for memory benchmarks).
+
+    Set `unprocessed` to a predicate on items to have BatchWriteItem hand
+    the put requests of matching items back as UnprocessedItems.
+    """
+
+    def __init__(
+        self,
+        name: str = "incident_events",
+        request_latency: float = 0.0,
+        detach_reads: bool = False,
+    ):
+        self.name = name
+        self.request_latency = request_latency
+        self.detach_reads = detach_reads
+        self._keys: List[Tuple[str, str]] = []
+        self._items: List[Dict[str, Any]] = []
+        self._sizes: List[int] = []
+        self._lock = threading.Lock()
+        # boto3 Table resources expose their low-level client here; the
+        # incident batch writer calls batch_write_item on it.
+        self.meta = SimpleNamespace(client=self)
+        self.unprocessed: Optional[Callable[[Dict[str, Any]], bool]] = None
+        self.reset_metrics()
+
+    # ---- metrics ----------------------------------------------------------
+
+    def reset_metrics(self) -> None:
+        self.read_units = 0.0
+        self.write_units = 0.0
+        self.requests: Dict[str, int] = {}
+
+    def _record(self, operation: str, read_units: float = 0.0, write_units: float = 0.0):
+        with self._lock:
+            self.requests[operation] = self.requests.get(operation, 0) + 1
+            self.read_units += read_units
+            self.write_units += write_units
+        if self.request_latency:
+            time.sleep(self.request_latency)
+
+    # ---- writes -----------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def load(self, items: Iterable[Dict[str, Any]]) -> None:
+        """Bulk-load items without recording capacity (test fixture setup)."""
+        rows = [((i["pk"], i["sk"]), i) for i in items]
+        rows.extend(zip(self._keys, self._items))
+        rows.sort(key=lambda r: r[0])
+        self._keys = [r[0] for r in rows]
+        self._items = [r[1] for r in rows]
+        self._sizes = [item_size(i) for i in self._items]
+
+    def _find(self, key: Tuple[str, str]) -> Tuple[int, bool]:
+        pos = bisect.bisect_left(self._keys, key)
+        return pos, pos < len(self._keys) and self._keys[pos] == key
+
+    def _store_locked(self, key: Tuple[str, str], item: Dict[str, Any], size: int) -> None:
+        pos, found = self._find(key)
+        if found:
+            self._items[pos] = item
+            self._sizes[pos] = size
+        else:
+            self._keys.insert(pos, key)
+            self._items.insert(pos, item)
+            self._sizes.insert(pos, size)
+
+    @staticmethod
+    def _condition_failed(operation: str) -> Exception:
+        from botocore.exceptions import ClientError
+
+        return ClientError(
+            {"Error": {"Code": "ConditionalCheckFailedException", "Message": "The conditional request failed"}},
+            operation,
+        )
+
+    def put_item(
+        self,
+        Item: Dict[str, Any],
+        ConditionExpression: Optional[ConditionBase] = None,
+        ReturnValues: str = "NONE",
+        **_: Any,
+    ) -> Dict[str, Any]:
+        size = item_size(Item)
+        key = (Item["pk"], Item["sk"])
+        with self._lock:
+            pos, found = self._find(key)
+            current = self._items[pos] if found else {}
+            failed = ConditionExpression is not None and not evaluate(ConditionExpression, current)
+            if not failed:
+                self._store_locked(key, Item, size)
+        # Failed conditional writes still consume write capacity.
+        self._record("PutItem", write_units=math.ceil(size / 1024))
+        if failed:
+            raise self._condition_failed("PutItem")
+        if ReturnValues == "ALL_OLD" and current:
+            return {"Attributes": dict(current)}
+        return {}
+
+    def update_item(
+        self,
+        Key: Dict[str, Any],
+        UpdateExpression: str,
+        ExpressionAttributeNames: Optional[Dict[str, str]] = None,
+        ExpressionAttributeValues: Optional[Dict[str, Any]] = None,
+        ConditionExpression: Optional[ConditionBase] = None,
+        ReturnValues: str = "NONE",
+        **_: Any,
+    ) -> Dict[str, Any]:
+        """
+        Supports `SET a = :v`, `SET a = if_not_exists(a, :v)`, `ADD a :n`
+        (numbers and sets) and `REMOVE a` clauses, comma-separated, with
+        #name placeholders; no other functions.
+        """
+        names = ExpressionAttributeNames or {}
+        values = ExpressionAttributeValues or {}
+
+        def attr(token: str) -> str:
+            token = token.strip()
+            return names.get(token, token)
+
+        key = (Key["pk"], Key["sk"])
+        clauses = _UPDATE_CLAUSE_RE.split(UpdateExpression)[1:]
+        with self._lock:
+            pos, found = self._find(key)
+            current = self._items[pos] if found else {}
+            failed = ConditionExpression is not None and not evaluate(ConditionExpression, current)
+            item = dict(current or Key)
+            if not failed:
+                for clause, body in zip(clauses[::2], clauses[1::2]):
+                    actions = _UPDATE_ACTION_SPLIT_RE.split(body)
+                    for action in filter(None, (a.strip() for a in actions)):
+                        clause = clause.upper()
+                        if clause == "SET":
+                            target, _, value = action.partition("=")
+                            default = _IF_NOT_EXISTS_RE.match(value.strip())
+                            if default is None:
+                                item[attr(target)] = values[value.strip()]
+                            elif attr(default.group(1)) not in item:
+                                item[attr(target)] = values[default.group(2)]
+                        elif clause == "ADD":
+                            target, value = action.split()
+                            name, operand = attr(target), values[value]
+                            if isinstance(operand, (set, frozenset)):
+                                item[name] = set(item.get(name, set())) | operand
+                            else:
+                                item[name] = item.get(name, 0) + operand
+                        else:
+                            item.pop(attr(action), None)
+                size = item_size(item)
+                self._store_locked(key, item, size)
+            else:
+                size = item_size(current)
+        self._record("UpdateItem", write_units=max(1, math.ceil(size / 1024)))
+        if failed:
+            raise self._condition_failed("UpdateItem")
+        return {"Attributes": dict(item)} if ReturnValues in ("ALL_NEW", "UPDATED_NEW") else {}
+
+    def delete_item(self, Key: Dict[str, Any], **_: Any) -> Dict[str, Any]:
+        key = (Key["pk"], Key["sk"])
+        with self._lock:
+            pos, found = self._find(key)
+            if found:
+                del self._keys[pos], self._items[pos], self._sizes[pos]
+        self._record("DeleteItem", write_units=1)
+        return {}
+
+    def batch_write_item(self, RequestItems: Dict[str, List[Dict[str, Any]]], **_: Any) -> Dict[str, Any]:
+        """BatchWriteItem against this table (reached via `table.meta.client`)."""
+        requests = RequestItems.get(self.name, [])
+        if len(requests) > 25:
+            from botocore.exceptions import ClientError
+
+            raise ClientError(
+                {"Error": {"Code": "ValidationException", "Message": "Too many items requested"}},
+                "BatchWriteItem",
+            )
+        units = 0
+        unprocessed = []
+        with self._lock:
+            for request in requests:
+                if "PutRequest" in request:
+                    item = request["PutRequest"]["Item"]
+                    if self.unprocessed is not None and self.unprocessed(item):
+                        unprocessed.append(request)
+                        continue
+                    size = item_size(item)
+                    self._store_locked((item["pk"], item["sk"]), item, size)
+                    units += math.ceil(size / 1024)
+                else:
+                    k = request["DeleteRequest"]["Key"]
+                    pos, found = self._find((k["pk"], k["sk"]))
+                    if found:
+                        del self._keys[pos], self._items[pos], self._sizes[pos]
+                    units += 1
+        self._record("BatchWriteItem", write_units=units)
+        return {"UnprocessedItems": {self.name: unprocessed} if unprocessed else {}}
+
+    # ---- reads ------------------------------------------------------------
+
+    def get_item(self, Key: Dict[str, Any], ConsistentRead: bool = False, **_: Any) -> Dict[str, Any]:
+        key = (Key["pk"], Key["sk"])
+        pos = bisect.bisect_left(self._keys, key)
+        found = pos < len(self._keys) and self._keys[pos] == key
+        size = self._sizes[pos] if found else 0
+        units = max(1, math.ceil(size / READ_UNIT_BYTES)) * (1.0 if ConsistentRead else 0.5)
+        self._record("GetItem", read_units=units)
+        if not found:
+            return {}
+        item = self._items[pos]
+        return {"Item": pickle.loads(pickle.dumps(item)) if self.detach_reads else item}
+
+    def _page(
+        self,
+        operation: str,
+        start: int,
+        stop: int,
+        condition: Optional[ConditionBase],
+        limit: Optional[int],
+        consistent: bool,
+        forward: bool = True,
+        count_only: bool = False,
+    ) -> Dict[str, Any]:
+        """Read positions [start, stop), descending when not `forward`."""
+        examined_bytes = 0
+        out: List[Dict[str, Any]] = []
+        positions = range(start, stop) if forward else range(stop - 1, start - 1, -1)
+        scanned = 0
+        budget = limit if limit else stop - start
+
+        for pos in positions:
+            if budget <= 0 or examined_bytes >= PAGE_LIMIT_BYTES:
+                break
+            item = self._items[pos]
+            examined_bytes += self._sizes[pos]
+            if condition is None or evaluate(condition, item):
+                out.append(item)
+            scanned += 1
+            budget -= 1
+
+        if self.detach_reads and not count_only:
+            out = pickle.loads(pickle.dumps(out))
+        units = math.ceil(examined_bytes / READ_UNIT_BYTES) * (1.0 if consistent else 0.5)
+        self._record(operation, read_units=units)
+
+        response: Dict[str, Any] = {
+            "Count": len(out),
+            "ScannedCount": scanned,
+            "ConsumedCapacity": {"TableName": self.name, "CapacityUnits": units},
+        }
+        if not count_only:
+            response["Items"] = out
+        if scanned < stop - start:
+            last = positions[scanned - 1]
+            last_pk, last_sk = self._keys[last]
+            response["LastEvaluatedKey"] = {"pk": last_pk, "sk": last_sk}
+        return response
+
+    def _resume(self, start: int, exclusive_start_key: Optional[Dict[str, Any]]) -> int:
+        if not exclusive_start_key:
+            return start
+        key = (exclusive_start_key["pk"], exclusive_start_key["sk"])
+        return max(start, bisect.bisect_right(self._keys, key))
+
+    def _resume_reverse(self, stop: int, exclusive_start_key: Optional[Dict[str, Any]]) -> int:
+        if not exclusive_start_key:
+            return stop
+        key = (exclusive_start_key["pk"], exclusive_start_key["sk"])
+        return min(stop, bisect.bisect_left(self._keys, key))
+
+    def query(
+        self,
+        KeyConditionExpression: ConditionBase,
+        FilterExpression: Optional[ConditionBase] = None,
+        ExclusiveStartKey: Optional[Dict[str, Any]] = None,
+        Limit: Optional[int] = None,
+        ConsistentRead: bool = False,
+        ScanIndexForward: bool = True,
+        Select: Optional[str] = None,
+        **_: Any,
+    ) -> Dict[str, Any]:
+        pk: Any = None
+        sk_condition: Optional[ConditionBase] = None
+        for part in _flatten_and(KeyConditionExpression):
+            expression = part.get_expression()
+            name = expression["values"][0].name
+            if name == "pk" and expression["operator"] == "=":
+                pk = expression["values"][1]
+            elif name == "sk":
+                sk_condition = part
+        if pk is None:
+            raise ValueError("Query requires an equality condition on pk")
+
+        lo = bisect.bisect_left(self._keys, (pk, ""))
+        hi = bisect.bisect_left(self._keys, (pk, "\U0010ffff"))
+        residual = None
+
+        if sk_condition is not None:
+            expression = sk_condition.get_expression()
+            op = expression["operator"]
+            values = expression["values"]
+            if op == "BETWEEN":
+                lo = bisect.bisect_left(self._keys, (pk, values[1]), lo, hi)
+                hi = bisect.bisect_right(self._keys, (pk, values[2]), lo, hi)
+            elif op == "begins_with":
+                lo = bisect.bisect_left(self._keys, (pk, values[1]), lo, hi)
+                hi = bisect.bisect_left(
+                    self._keys, (pk, values[1] + "\U0010ffff"), lo, hi
+                )
+            else:
+                residual = sk_condition
+
+        if FilterExpression is not None:
+            residual = FilterExpression if residual is None else residual & FilterExpression
+
+        count_only = Select == "COUNT"
+        if not ScanIndexForward:
+            stop = self._resume_reverse(hi, ExclusiveStartKey)
+            return self._page(
+                "Query", lo, stop, residual, Limit, ConsistentRead, False, count_only
+            )
+        start = self._resume(lo, ExclusiveStartKey)
+        return self._page("Query", start, hi, residual, Limit, ConsistentRead, True, count_only)
+
+    def scan(
+        self,
+        FilterExpression: Optional[ConditionBase] = None,
+        ExclusiveStartKey: Optional[Dict[str, Any]] = None,
+        Segment: Optional[int] = None,
+        TotalSegments: Optional[int] = None,
+        Limit: Optional[int] = None,
+        ConsistentRead: bool = False,
+        **_: Any,
+    ) -> Dict[str, Any]:
+        lo, hi = 0, len(self._keys)
+        if TotalSegments:
+            # Contiguous key ranges stand in for DynamoDB's hash segments.
+            lo = len(self._keys) * Segment // TotalSegments
+            hi = len(self._keys) * (Segment + 1) // TotalSegments
+
+        start = self._resume(lo, ExclusiveStartKey)
+        return self._page("Scan", start, hi, FilterExpression, Limit, ConsistentRead)
+
+
+class FakeS3Client:
+    """
+    In-memory S3 client: put/get/head/copy object and multipart upload.
+    ETags are computed the way S3 does for unencrypted objects (a copy of
+    a multipart object gets the plain MD5 of its body), and put_object
+    honours IfMatch / IfNoneMatch.
+
+    Records request counts and bytes received, and sleeps for
+    `request_latency` per request. With `keep_bodies=False` object
+    contents are discarded after counting, so large uploads do not show
+    up in memory measurements of the code under test.
+    """
+
+    def __init__(self, request_latency: float = 0.0, keep_bodies: bool = True):
+        self.request_latency = request_latency
+        self.keep_bodies = keep_bodies
+        self.objects: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._uploads: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    def reset_metrics(self) -> None:
+        self.requests: Dict[str, int] = {}
+        self.bytes_received = 0
+
+    def _record(self, operation: str, size: int = 0) -> None:
+        with self._lock:
+            self.requests[operation] = self.requests.get(operation, 0) + 1
+            self.bytes_received += size
+        if self.request_latency:
+            time.sleep(self.request_latency)
+
+    @staticmethod
+    def _bytes(body: Any) -> bytes:
+        if isinstance(body, str):
+            return body.encode("utf-8")
+        if hasattr(body, "read"):
+            return body.read()
+        return bytes(body)
+
+    def _store(self, bucket: str, key: str, body: bytes, size: int, etag: str, **args: Any) -> str:
+        self.objects[(bucket, key)] = {
+            "Body": body if self.keep_bodies else b"",
+            "ContentLength": size,
+            "ETag": etag,
+            "Metadata": args.get("Metadata", {}),
+            "ContentType": args.get("ContentType"),
+            "ContentEncoding": args.get("ContentEncoding"),
+        }
+        return etag
+
+    def put_object(self, Bucket: str, Key: str, Body: Any = b"", **args: Any) -> Dict[str, Any]:
+        body = self._bytes(Body)
+        self._record("PutObject", len(body))
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        with self._lock:
+            current = self.objects.get((Bucket, Key))
+            if ("IfNoneMatch" in args and current is not None) or (
+                "IfMatch" in args and (current is None or current["ETag"] != args["IfMatch"])
+            ):
+                from botocore.exceptions import ClientError
+
+                raise ClientError({"Error": {"Code": "PreconditionFailed"}}, "PutObject")
+            return {"ETag": self._store(Bucket, Key, body, len(body), etag, **args)}
+
+    def get_object(self, Bucket: str, Key: str, **_: Any) -> Dict[str, Any]:
+        self._record("GetObject")
+        obj = self.objects.get((Bucket, Key))
+        if obj is None:
+            from botocore.exceptions import ClientError
+
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        return dict(obj, Body=io.BytesIO(obj["Body"]))
+
+    def head_object(self, Bucket: str, Key: str, **_: Any) -> Dict[str, Any]:
+        self._record("HeadObject")
+        obj = self.objects.get((Bucket, Key))
+        if obj is None:
+            from botocore.exceptions import ClientError
+
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        return {k: v for k, v in obj.items() if k != "Body"}
+
+    def copy_object(
+        self, Bucket: str, Key: str, CopySource: Dict[str, str], **args: Any
+    ) -> Dict[str, Any]:
+        self._record("CopyObject")
+        source = self.objects[(CopySource["Bucket"], CopySource["Key"])]
+        if args.get("MetadataDirective") != "REPLACE":
+            args["Metadata"] = source["Metadata"]
+        etag = source["ETag"]
+        if "-" in etag:
+            etag = '"%s"' % hashlib.md5(source["Body"]).hexdigest()
+        etag = self._store(Bucket, Key, source["Body"], source["ContentLength"], etag, **args)
+        return {"CopyObjectResult": {"ETag": etag}}
+
+    def create_multipart_upload(self, Bucket: str, Key: str, **args: Any) -> Dict[str, Any]:
+        self._record("CreateMultipartUpload")
+        upload_id = uuid.uuid4().hex
+        with self._lock:
+            self._uploads[upload_id] = {"parts": {}, "args": args}
+        return {"UploadId": upload_id}
+
+    def upload_part(
+        self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body: Any, **_: Any
+    ) -> Dict[str, Any]:
+        body = self._bytes(Body)
+        self._record("UploadPart", len(body))
+        with self._lock:
+            self._uploads[UploadId]["parts"][PartNumber] = (
+                body if self.keep_bodies else b"",
+                len(body),
+                hashlib.md5(body).digest(),
+            )
+        return {"ETag": '"%s"' % hashlib.md5(body).hexdigest()}
+
+    def complete_multipart_upload(
+        self, Bucket: str, Key: str, UploadId: str, MultipartUpload: Dict[str, Any], **_: Any
+    ) -> Dict[str, Any]:
+        self._record("CompleteMultipartUpload")
+        with self._lock:
+            upload = self._uploads.pop(UploadId)
+        parts = [upload["parts"][p["PartNumber"]] for p in MultipartUpload["Parts"]]
+        body = b"".join(p[0] for p in parts)
+        size = sum(p[1] for p in parts)
+        etag = '"%s-%d"' % (hashlib.md5(b"".join(p[2] for p in parts)).hexdigest(), len(parts))
+        return {"ETag": self._store(Bucket, Key, body, size, etag, **upload["args"])}
+
+    def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str, **_: Any) -> Dict[str, Any]:
+        self._record("AbortMultipartUpload")
+        with self._lock:
+            self._uploads.pop(UploadId, None)
+        return {}
+
+
+class FakeEC2Client:
+    """
+    EC2 client for the remediation actions (RebootInstances,
+    StartInstances). DryRun calls answer DryRunOperation like EC2 does;
+    instances in `failing_instances` fail with IncorrectInstanceState,
+    naming the instance. Records requests and instances per operation and
+    sleeps for `request_latency` per request.
+    """
+
+    def __init__(self, request_latency: float = 0.0, failing_instances: Iterable[str] = ()):
+        self.request_latency = request_latency
+        self.failing_instances = set(failing_instances)
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    def reset_metrics(self) -> None:
+        self.requests: Dict[str, int] = {}
+        self.instances: Dict[str, int] = {}
+
+    def _call(self, operation: str, InstanceIds: List[str], DryRun: bool) -> None:
+        from botocore.exceptions import ClientError
+
+        with self._lock:
+            self.requests[operation] = self.requests.get(operation, 0) + 1
+            self.instances[operation] = self.instances.get(operation, 0) + len(InstanceIds)
+        if self.request_latency:
+            time.sleep(self.request_latency)
+
+        failing = [i for i in InstanceIds if i in self.failing_instances]
+        if failing:
+            message = f"The instance '{failing[0]}' is not in a state from which it can be changed."
+            raise ClientError({"Error": {"Code": "IncorrectInstanceState", "Message": message}}, operation)
+        if DryRun:
+            message = "Request would have succeeded, but DryRun flag is set."
+            raise ClientError({"Error": {"Code": "DryRunOperation", "Message": message}}, operation)
+
+    def reboot_instances(self, InstanceIds: List[str], DryRun: bool = False, **_: Any) -> Dict[str, Any]:
+        self._call("RebootInstances", InstanceIds, DryRun)
+        return {}
+
+    def start_instances(self, InstanceIds: List[str], DryRun: bool = False, **_: Any) -> Dict[str, Any]:
+        self._call("StartInstances", InstanceIds, DryRun)
+        return {
+            "StartingInstances": [
+                {
+                    "InstanceId": i,
+                    "CurrentState": {"Code": 0, "Name": "pending"},
+                    "PreviousState": {"Code": 80, "Name": "stopped"},
+                }
+                for i in InstanceIds
+            ]
+        }
+
+
+class FakeSESClient:
+    """
+    SES client accepting send_email. Records requests and message bytes
+    and sleeps for `request_latency` per request; the last message is
+    kept in `last_message`.
+    """
+
+    def __init__(self, request_latency: float = 0.0):
+        self.request_latency = request_latency
+        self.last_message: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    def reset_metrics(self) -> None:
+        self.requests: Dict[str, int] = {}
+        self.bytes_received = 0
+
+    def send_email(self, Source: str, Destination: Dict[str, Any], Message: Dict[str, Any], **_: Any) -> Dict[str, Any]:
+        size = sum(
+            len(part.get("Data", "").encode("utf-8"))
+            for part in [Message.get("Subject", {})] + list(Message.get("Body", {}).values())
+        )
+        with self._lock:
+            self.requests["SendEmail"] = self.requests.get("SendEmail", 0) + 1
+            self.bytes_received += size
+            self.last_message = {"Source": Source, "Destination": Destination, "Message": Message}
+        if self.request_latency:
+            time.sleep(self.request_latency)
+        return {"MessageId": uuid.uuid4().hex}
+
+
+class FakeAWS(SimpleNamespace):
+    """The fakes served by `installed()`: table, s3, ec2, ses."""
+
+    def requests(self) -> Dict[str, Dict[str, int]]:
+        """Request counts per service, e.g. {"dynamodb": {"PutItem": 3}}."""
+        return {
+            "dynamodb": dict(self.table.requests),
+            "s3": dict(self.s3.requests),
+            "ec2": dict(self.ec2.requests),
+            "ses": dict(self.ses.requests),
+        }
+
+    def reset_metrics(self) -> None:
+        for fake in (self.table, self.s3, self.ec2, self.ses):
+            fake.reset_metrics()
+
+
+@contextlib.contextmanager
+def installed(
+    table: Optional[FakeTable] = None,
+    s3: Optional[FakeS3Client] = None,
+    ec2: Optional[FakeEC2Client] = None,
+    ses: Optional[FakeSESClient] = None,
+    latency: Optional[Dict[str, float]] = None,
+    store=None,
+) -> Iterator[FakeAWS]:
+    """
+    Serve fakes from the src.utils.aws_clients pools inside the block, so
+    the Lambdas run end to end offline: every get_*_client() and
+    get_dynamodb_table() call gets a fake (one table for incidents,
+    aggregates, idempotency records and rate limits). Fakes not given are
+    created with `latency[service]` seconds of injected latency
+    ("dynamodb", "s3", "ec2", "ses"). Incidents go to `store` when given (e.g. a
+    SQLiteIncidentStore), otherwise to the fake table. The previous pools
+    and incident store are restored on exit.
+    """
+    from src.storage import incident_store
+    from src.storage.dynamodb_client import DynamoDBIncidentStore
+    from src.remediation.permission_cache import permission_cache
+    from src.remediation.rate_limit import ec2_api_bucket, instance_limiter
+    from src.storage.idempotency import idempotency_store
+    from src.utils import aws_clients
+    from src.utils.config import (
+        IDEMPOTENCY_TABLE_NAME,
+        INCIDENT_TABLE_NAME,
+        RATE_LIMIT_TABLE_NAME,
+    )
+
+    latency = latency or {}
+    aws = FakeAWS(
+        table=table or FakeTable(INCIDENT_TABLE_NAME, request_latency=latency.get("dynamodb", 0.0)),
+        s3=s3 or FakeS3Client(request_latency=latency.get("s3", 0.0)),
+        ec2=ec2 or FakeEC2Client(request_latency=latency.get("ec2", 0.0)),
+        ses=ses or FakeSESClient(request_latency=latency.get("ses", 0.0)),
+    )
+    region = aws_clients.AWS_REGION
+    saved = (dict(aws_clients._clients), dict(aws_clients._tables))
+    aws_clients._clients.update(
+        {("s3", region): aws.s3, ("ec2", region): aws.ec2, ("ses", region): aws.ses}
+    )
+    for name in {INCIDENT_TABLE_NAME, IDEMPOTENCY_TABLE_NAME, RATE_LIMIT_TABLE_NAME} - {""}:
+        aws_clients._tables[(name, region)] = aws.table
+    idempotency_store.clear()
+    instance_limiter.clear()
+    ec2_api_bucket.clear()
+    permission_cache.clear()
+    saved_store = incident_store._store
+    incident_store.set_incident_store(store or DynamoDBIncidentStore(aws.table))
+    try:
+        yield aws
+    finally:
+        incident_store.set_incident_store(saved_store)
+        with aws_clients._lock:
+            aws_clients._clients.clear()
+            aws_clients._clients.update(saved[0])
+            aws_clients._tables.clear()
+            aws_clients._tables.update(saved[1])
+        idempotency_store.clear()
+        instance_limiter.clear()
+        ec2_api_bucket.clear()
@@ -0,0 +1,190 @@
+"""
+Benchmark suite: the offline benchmarks that track the hot paths, run
+together and saved as one JSON file per commit for comparison.
+
+  - handler: `lambda_handler` throughput and p50/p99 latency, single
+             events and SQS batches (bench_handler)
+  - report:  `get_incidents_for_date` + `generate_markdown` ("list") and
+             the streamed report ("stream") at several sizes, with peak
+             memory (bench_report_memory)
+  - store:   loading one day into the SQLite incident store, its summary
+             queries and the streamed report over it (bench_incident_store)
+
+Everything runs against the in-memory fakes in benchmarks/fakes.py, so
+no AWS access is needed. Profiles: "quick" (seconds, for local
+iteration) and "full" (1k / 100k / 1M incidents; about 5 minutes and
+2.5 GB of memory, plus about 1 GB of temporary disk for SQLite).
+
+Results go to benchmarks/results/<commit>.json unless --output is
+given. --compare prints the change of every timing, throughput and
+memory figure against an earlier results file and exits non-zero when
+one regressed by more than --threshold percent.
+
+Run with:
+    python3 benchmarks/run_suite.py --profile quick
+    python3 benchmarks/run_suite.py --profile full --compare benchmarks/results/abc1234.json
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import resource
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT_DIR))
+
+from benchmarks import bench_handler, bench_incident_store, bench_report_memory  # noqa: E402
+
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "quick": {
+        "handler": {"events": 300, "batch_size": 10, "instances": 100},
+        "report": {"sizes": [1000, 10000], "paths": ["list", "stream"]},
+        "store": {"sizes": [10000]},
+    },
+    "full": {
+        "handler": {"events": 3000, "batch_size": 10, "instances": 500},
+        "report": {"sizes": [1000, 100000, 1000000], "paths": ["list", "stream"]},
+        "store": {"sizes": [100000, 1000000]},
+    },
+}
+
+DEFAULT_LATENCY = "dynamodb=2,ec2=10,ses=20,s3=5"
+
+# Compared figures, and whether a higher value is better.
+COMPARED_METRICS = {
+    "events_per_second": True,
+    "p50_ms": False,
+    "p99_ms": False,
+    "seconds": False,
+    "summary_seconds": False,
+    "peak_mib": False,
+}
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", *args], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+def _peak_rss_mib() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+def run(profile: str, latency: Dict[str, float]) -> Dict[str, Any]:
+    settings = PROFILES[profile]
+    print(f"== handler ({profile})")
+    handler = bench_handler.run(latency=latency, **settings["handler"])
+    print(f"== report ({profile})")
+    report = bench_report_memory.run(**settings["report"])
+    print(f"== store ({profile})")
+    store = bench_incident_store.run(**settings["store"])
+    return {
+        "profile": profile,
+        "environment": environment(),
+        "latency_ms": {k: v * 1000 for k, v in latency.items()},
+        "peak_rss_mib": _peak_rss_mib(),
+        "handler": handler,
+        "report": report,
+        "store": store,
+    }
+
+
+def flatten(results: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Compared figures keyed like "handler.batch.p99_ms",
+    "report.100000.list.peak_mib" or "store.1000000.sqlite.seconds".
+    """
+    figures: Dict[str, float] = {}
+    for row in results.get("handler", []):
+        for metric in COMPARED_METRICS:
+            if metric in row:
+                figures[f"handler.{row['mode']}.{metric}"] = row[metric]
+    for row in results.get("report", []):
+        for metric in COMPARED_METRICS:
+            if metric in row:
+                figures[f"report.{row['incidents']}.{row['path']}.{metric}"] = row[metric]
+    for row in results.get("store", []):
+        for metric in COMPARED_METRICS:
+            if metric in row:
+                figures[f"store.{row['incidents']}.{row['backend']}.{metric}"] = row[metric]
+    return figures
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Per-figure changes (percent) and the names of the regressed ones."""
+    before, after = flatten(baseline), flatten(current)
+    rows, regressions = [], []
+    for name in sorted(before.keys() & after.keys()):
+        old, new = before[name], after[name]
+        if not old:
+            continue
+        change = (new - old) / old * 100
+        higher_is_better = COMPARED_METRICS[name.rsplit(".", 1)[1]]
+        worse = -change if higher_is_better else change
+        rows.append({"name": name, "baseline": old, "current": new, "change_pct": round(change, 1)})
+        if worse > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--profile", choices=list(PROFILES), default="quick")
+    parser.add_argument(
+        "--latency",
+        default=DEFAULT_LATENCY,
+        help="Injected latency per service in ms, e.g. dynamodb=5,ec2=20.",
+    )
+    parser.add_argument("--output", help="Results path (default benchmarks/results/<commit>.json).")
+    parser.add_argument("--compare", help="Earlier results file to compare against.")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent.")
+    args = parser.parse_args()
+
+    results = run(args.profile, bench_handler.parse_latency(args.latency))
+
+    output = Path(args.output) if args.output else (
+        ROOT_DIR / "benchmarks" / "results" / f"{results['environment']['commit'] or 'unknown'}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"== results written to {output} (peak RSS {results['peak_rss_mib']} MiB)")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        rows, regressions = compare(baseline, results, args.threshold)
+        print(f"== compared with {args.compare} ({baseline.get('environment', {}).get('commit')})")
+        for row in rows:
+            flag = "  REGRESSION" if row["name"] in regressions else ""
+            print(
+                f"{row['name']:<40} {row['baseline']:>12} -> {row['current']:>12} "
+                f"({row['change_pct']:+.1f}%){flag}"
+            )
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
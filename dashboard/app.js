@@ -1,8 +1,17 @@
 const statusEl = document.getElementById("status-text");
 const contentEl = document.getElementById("report-content");
+const rawToggleEl = document.getElementById("raw-toggle");
 const dateInput = document.getElementById("date-input");
+const dateSelect = document.getElementById("date-select");
 const loadBtn = document.getElementById("load-btn");
 
+const bucketUrl =
+  "https://cloud-incident-reports-scott.s3.amazonaws.com/daily-reports";
+
+// manifest.json 里列出的日期（加载失败时为 null，退回逐个日期去请求）
+let manifestDates = null;
+let rawLoadedFor = null;
+
 // 默认把日期设置成今天（YYYY-MM-DD）
 (function setToday() {
   const today = new Date();
@@ -12,31 +21,63 @@ const loadBtn = document.getElementById("load-btn");
   dateInput.value = `${yyyy}-${mm}-${dd}`;
 })();
 
-// 加载报告
+// 加载日期索引：一个小文件列出所有已有报告的日期和总数
+async function loadManifest() {
+  try {
+    const res = await fetch(`${bucketUrl}/manifest.json`, { cache: "no-cache" });
+    if (!res.ok) return;
+    const manifest = await res.json();
+    manifestDates = new Map(manifest.dates.map((d) => [d.date, d]));
+
+    dateSelect.innerHTML = "";
+    manifest.dates.forEach((d) => {
+      const option = document.createElement("option");
+      option.value = d.date;
+      option.textContent = `${d.date} · ${d.total} incidents${
+        d.failed ? ` · ${d.failed} failed` : ""
+      }`;
+      dateSelect.appendChild(option);
+    });
+    dateSelect.disabled = manifest.dates.length === 0;
+
+    if (manifest.dates.length > 0) {
+      dateInput.value = manifest.dates[0].date;
+      dateSelect.value = manifest.dates[0].date;
+      statusEl.textContent = `${manifest.dates.length} reports available.`;
+    }
+  } catch (err) {
+    console.error(err);
+  }
+}
+
+// 加载报告：优先读 <date>.json（已经是结构化数据），老报告没有 JSON 时再解析 markdown
 async function loadReportFromS3(dateStr) {
   statusEl.textContent = `Loading report for ${dateStr}...`;
   loadBtn.disabled = true;
-
-  const key = `${dateStr}.md`;
-  const bucketUrl =
-    "https://cloud-incident-reports-scott.s3.amazonaws.com/daily-reports";
-  const fileUrl = `${bucketUrl}/${key}`;
+  rawLoadedFor = null;
+  contentEl.textContent = "Open to load the raw Markdown report.";
 
   try {
-    const res = await fetch(fileUrl);
-
-    if (!res.ok) {
-      contentEl.textContent = `No report found for ${dateStr}.`;
-      statusEl.textContent = "Report not found.";
-      renderParsedReport(null); // 清空卡片 / 表格
-      loadBtn.disabled = false;
+    // 不在 manifest 里的日期（manifest 之前的老报告、或 manifest 更新失败）
+    // 没有 JSON 摘要可期待，直接读 markdown；读不到才算不存在
+    const listed = !manifestDates || manifestDates.has(dateStr);
+    const res = listed ? await fetch(`${bucketUrl}/${dateStr}.json`) : null;
+    if (res && res.ok) {
+      renderReport(dataFromSummaryJson(await res.json()));
+      statusEl.textContent = "Report loaded.";
+      if (rawToggleEl.open) loadRawMarkdown(dateStr);
       return;
     }
 
-    const text = await res.text();
+    const text = await fetchMarkdown(dateStr);
+    if (text === null) {
+      showNotFound(dateStr);
+      return;
+    }
+    rawLoadedFor = dateStr;
     contentEl.textContent = text; // 原始 markdown
     statusEl.textContent = "Report loaded.";
-    renderParsedReport(text); // ← 新增：渲染卡片和表格
+    renderParsedReport(text);
   } catch (err) {
     console.error(err);
     contentEl.textContent = "Error loading report.";
@@ -47,6 +88,43 @@ async function loadReportFromS3(dateStr) {
   }
 }
 
+function showNotFound(dateStr) {
+  contentEl.textContent = `No report found for ${dateStr}.`;
+  statusEl.textContent = "Report not found.";
+  renderParsedReport(null); // 清空卡片 / 表格
+}
+
+async function fetchMarkdown(dateStr) {
+  const res = await fetch(`${bucketUrl}/${dateStr}.md`);
+  return res.ok ? res.text() : null;
+}
+
+// 原始 markdown 只在展开时才下载
+async function loadRawMarkdown(dateStr) {
+  if (rawLoadedFor === dateStr) return;
+  rawLoadedFor = dateStr;
+  contentEl.textContent = "Loading raw Markdown...";
+  try {
+    const text = await fetchMarkdown(dateStr);
+    contentEl.textContent = text ?? `No report found for ${dateStr}.`;
+  } catch (err) {
+    console.error(err);
+    rawLoadedFor = null;
+    contentEl.textContent = "Error loading report.";
+  }
+}
+
+rawToggleEl.addEventListener("toggle", () => {
+  if (rawToggleEl.open && dateInput.value) loadRawMarkdown(dateInput.value);
+});
+
+dateSelect.addEventListener("change", () => {
+  dateInput.value = dateSelect.value;
+  loadReportFromS3(dateSelect.value);
+});
+
+loadManifest();
+
 loadBtn.addEventListener("click", () => {
   const dateStr = dateInput.value;
   if (!dateStr) {
@@ -56,6 +134,32 @@ loadBtn.addEventListener("click", () => {
   loadReportFromS3(dateStr);
 });
 
+// <date>.json 转成和 parseMarkdownReport 一样的结构
+function dataFromSummaryJson(doc) {
+  const toList = (counts) =>
+    Object.entries(counts || {}).map(([name, count]) => ({ name, count }));
+
+  return {
+    date: doc.date,
+    summary: {
+      "total incidents": doc.summary.total,
+      "success (heuristic)": doc.summary.success,
+      "failed (heuristic)": doc.summary.failed,
+      "unique instances": doc.summary.unique_instances,
+    },
+    byEvent: toList(doc.by_event_type),
+    byRemediation: toList(doc.by_remediation_type),
+    incidents: (doc.incidents || []).map((row) => ({
+      "Time (created_at)": row.created_at,
+      "Event Type": row.event_type,
+      "Instance ID": row.instance_id,
+      "Remediation Type": row.remediation_type,
+      Action: row.action,
+      Message: row.message,
+    })),
+  };
+}
+
 function parseMarkdownReport(md) {
   if (!md) return null;
 
@@ -171,6 +275,10 @@ function parseMarkdownReport(md) {
 }
 
 function renderParsedReport(md) {
+  renderReport(md ? parseMarkdownReport(md) : null);
+}
+
+function renderReport(data) {
   const summaryRoot = document.getElementById("summary-cards");
   const breakdownRoot = document.getElementById("breakdown-cards");
   const tbody = document.querySelector("#incident-table tbody");
@@ -182,9 +290,6 @@ function renderParsedReport(md) {
   tbody.innerHTML =
     '<tr class="placeholder-row"><td colspan="6">No report loaded.</td></tr>';
 
-  if (!md) return;
-
-  const data = parseMarkdownReport(md);
   if (!data) return;
 
   // ----- Summary cards -----
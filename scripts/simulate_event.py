@@ -1,47 +1,116 @@
+"""
+Fire alarm events at the remediation Lambda handler, in-process.
+
+    once    one StatusCheckFailed alarm (the original smoke test), against
+            the AWS account configured in the environment by default
+            (the fakes with --sqlite)
+    load    synthesize an alarm storm: CloudWatch alarm, EC2 state-change
+            and SNS/SQS-wrapped events with a configurable type mix,
+            instance cardinality and arrival rate, including bursts
+    replay  re-send recorded events: raw events, incident items with a
+            `raw_event` (e.g. reports/sample-event-log.json) or the
+            "Incoming CloudWatch/SNS event" lines of the handler's logs
+
+`load` and `replay` run against the in-memory fakes of
+benchmarks/fakes.py by default (--target aws to use the real account),
+dispatch invocations at their scheduled arrival times to --workers
+threads, and report throughput, latency percentiles and error counts.
+Latency is reported both as service time (the handler call) and as
+response time from the scheduled arrival, which includes queueing when
+the workers fall behind.
+
+Run with:
+    python3 scripts/simulate_event.py
+    python3 scripts/simulate_event.py load --events 5000 --rate 100 \\
+        --burst-rate 1000 --burst-every 20 --burst-seconds 2 --workers 16
+    python3 scripts/simulate_event.py load --envelope sqs-sns --batch-size 10 \\
+        --mix status_check=6,stopped=3,high_cpu=1 --instances 20 --zipf 1.2
+    python3 scripts/simulate_event.py replay reports/sample-event-log.json --repeat 100
+"""
+
+import argparse
+import bisect
+import collections
+import datetime
+import itertools
 import json
+import os
+import random
 import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT_DIR))
-from src.lambda_handler import lambda_handler
+
+# src modules read their configuration (LOG_LEVEL, ...) at import time, so
+# they are imported once the command line has been parsed.
+
+EVENT_KINDS = ("status_check", "high_cpu", "stopped")
+ENVELOPES = ("direct", "sns", "sqs", "sqs-sns")
 
 
 def load_sample_event():
 
+    return alarm_event("status_check", "i-1234567890abcdef0", event_id="abcd-efgh-1234-5678")
+
+
+# ---- event synthesis --------------------------------------------------------
+
+
+def _iso(when: datetime.datetime) -> str:
+    return when.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def alarm_event(
+    kind: str,
+    instance_id: str,
+    when: Optional[datetime.datetime] = None,
+    event_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """A CloudWatch "Alarm State Change" event for a per-instance EC2 alarm."""
+    when = when or datetime.datetime.utcnow()
+    alarm_name, metric_name, reason = {
+        "status_check": (
+            f"StatusCheckFailed-{instance_id}",
+            "StatusCheckFailed",
+            "Threshold Crossed: 1 datapoint [1.0] was greater than the threshold (0.0).",
+        ),
+        "high_cpu": (
+            f"HighCPU-{instance_id}",
+            "CPUUtilization",
+            "Threshold Crossed: 3 datapoints [97.2, 95.8, 99.1] were greater than the threshold (90.0).",
+        ),
+    }[kind]
     return {
         "version": "0",
-        "id": "abcd-efgh-1234-5678",
+        "id": event_id or str(uuid.uuid4()),
         "detail-type": "CloudWatch Alarm State Change",
         "source": "aws.cloudwatch",
         "account": "123456789012",
-        "time": "2025-01-01T00:00:00Z",
+        "time": _iso(when),
         "region": "ap-southeast-2",
-        "resources": [
-            "arn:aws:cloudwatch:ap-southeast-2:123456789012:alarm:StatusCheckFailed"
-        ],
+        "resources": [f"arn:aws:cloudwatch:ap-southeast-2:123456789012:alarm:{alarm_name}"],
         "detail": {
-            "alarmName": "HighCPUAlarm",
-            "state": {
-                "value": "ALARM",
-                "reason": "StatusCheckFailed > 0 for 1 datapoints...",
-            },
+            "alarmName": alarm_name,
+            "state": {"value": "ALARM", "reason": reason, "timestamp": when.isoformat() + "+0000"},
+            "previousState": {"value": "OK"},
             "configuration": {
                 "metrics": [
                     {
                         "metricStat": {
                             "metric": {
                                 "namespace": "AWS/EC2",
-                                "metricName": "StatusCheckFailed",
-                                "dimensions": [
-                                    {
-                                        "name": "InstanceId",
-                                        "value": "i-1234567890abcdef0",
-                                    }
-                                ],
+                                "metricName": metric_name,
+                                "dimensions": [{"name": "InstanceId", "value": instance_id}],
                             },
                             "period": 60,
-                            "stat": "Minimum",
+                            "stat": "Maximum",
                         }
                     }
                 ]
@@ -50,14 +119,520 @@ def load_sample_event():
     }
 
 
-if __name__ == "__main__":
+def state_change_event(
+    instance_id: str, state: str = "stopped", when: Optional[datetime.datetime] = None
+) -> Dict[str, Any]:
+    """An EventBridge "EC2 Instance State-change Notification"."""
+    when = when or datetime.datetime.utcnow()
+    return {
+        "version": "0",
+        "id": str(uuid.uuid4()),
+        "detail-type": "EC2 Instance State-change Notification",
+        "source": "aws.ec2",
+        "account": "123456789012",
+        "time": _iso(when),
+        "region": "ap-southeast-2",
+        "resources": [f"arn:aws:ec2:ap-southeast-2:123456789012:instance/{instance_id}"],
+        "detail": {"instance-id": instance_id, "state": state},
+    }
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """"status_check=6,stopped=3" -> {"status_check": 6.0, "stopped": 3.0}."""
+    weights: Dict[str, float] = {}
+    for pair in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, weight = pair.partition("=")
+        if name not in EVENT_KINDS:
+            raise ValueError(f"Unknown event kind {name!r}; expected one of {', '.join(EVENT_KINDS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def synthesize_events(
+    count: int,
+    mix: Dict[str, float],
+    instances: int,
+    zipf: float = 0.0,
+    duplicate_rate: float = 0.0,
+    rng: Optional[random.Random] = None,
+) -> List[Dict[str, Any]]:
+    """
+    `count` events with kinds drawn from `mix` over `instances` instance
+    IDs. With `zipf` > 0 instance popularity is Zipf-skewed (a few
+    flapping instances get most alarms). A `duplicate_rate` share of
+    events are redeliveries of an earlier event (same id), as SNS/SQS
+    at-least-once delivery produces.
+    """
+    rng = rng or random.Random()
+    kinds = list(mix)
+    kind_weights = list(itertools.accumulate(mix[k] for k in kinds))
+    instance_ids = [f"i-{n:017x}" for n in range(max(1, instances))]
+    instance_weights = list(
+        itertools.accumulate(1.0 / (rank ** zipf) for rank in range(1, len(instance_ids) + 1))
+    )
+
+    events: List[Dict[str, Any]] = []
+    for _ in range(count):
+        if events and rng.random() < duplicate_rate:
+            events.append(rng.choice(events))
+            continue
+        kind = rng.choices(kinds, cum_weights=kind_weights)[0]
+        instance_id = rng.choices(instance_ids, cum_weights=instance_weights)[0]
+        if kind == "stopped":
+            events.append(state_change_event(instance_id))
+        else:
+            events.append(alarm_event(kind, instance_id))
+    return events
+
+
+def arrival_offsets(
+    count: int,
+    rate: float,
+    burst_rate: float = 0.0,
+    burst_every: float = 0.0,
+    burst_seconds: float = 0.0,
+    rng: Optional[random.Random] = None,
+) -> List[float]:
+    """
+    Arrival time (seconds from the start) of each of `count` events: a
+    Poisson process at `rate` events/s, switching to `burst_rate` for
+    `burst_seconds` at the start of every `burst_every` seconds. A rate
+    of 0 sends everything at once.
+    """
+    rng = rng or random.Random()
+    if rate <= 0:
+        return [0.0] * count
+    offsets, now = [], 0.0
+    for _ in range(count):
+        in_burst = burst_rate > 0 and burst_every > 0 and (now % burst_every) < burst_seconds
+        now += rng.expovariate(burst_rate if in_burst else rate)
+        offsets.append(now)
+    return offsets
+
+
+def wrap(events: List[Dict[str, Any]], envelope: str, batch_size: int = 10) -> List[Dict[str, Any]]:
+    """
+    Lambda invocation payloads for `events`:
+
+      direct   the event itself (EventBridge rule / direct invoke)
+      sns      one SNS record per invocation (SNS -> Lambda)
+      sqs      SQS batches of `batch_size` with the event as body (raw delivery)
+      sqs-sns  SQS batches whose bodies are SNS notification envelopes
+    """
+    if envelope == "direct":
+        return list(events)
+    if envelope == "sns":
+        return [
+            {
+                "Records": [
+                    {
+                        "EventSource": "aws:sns",
+                        "Sns": {"MessageId": str(uuid.uuid4()), "Message": json.dumps(e)},
+                    }
+                ]
+            }
+            for e in events
+        ]
+
+    def body(event: Dict[str, Any]) -> str:
+        if envelope == "sqs-sns":
+            return json.dumps(
+                {"Type": "Notification", "MessageId": str(uuid.uuid4()), "Message": json.dumps(event)}
+            )
+        return json.dumps(event)
+
+    return [
+        {
+            "Records": [
+                {"messageId": str(uuid.uuid4()), "eventSource": "aws:sqs", "body": body(e)}
+                for e in events[start : start + batch_size]
+            ]
+        }
+        for start in range(0, len(events), max(1, batch_size))
+    ]
+
+
+# ---- recorded events --------------------------------------------------------
+
+
+def _records(text: str) -> Iterator[Any]:
+    """JSON values of a file: one document (object or list) or JSON lines."""
+    try:
+        document = json.loads(text)
+    except ValueError:
+        document = None
+    if document is not None:
+        yield from document if isinstance(document, list) else [document]
+        return
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        # Handler log lines: "<time> [INFO] <logger> - {json}".
+        if not line.startswith(("{", "[")) and " - {" in line:
+            line = line[line.index(" - {") + 3 :]
+        try:
+            yield json.loads(line)
+        except ValueError:
+            continue
+
+
+def _event_of(record: Any) -> Optional[Dict[str, Any]]:
+    """The event a recorded item, log line or raw event holds (None: none / unreadable)."""
+    from src.storage.payload_codec import ENCODING_ATTR, RAW_EVENT_ATTR, decode_raw_event
+
+    if not isinstance(record, dict):
+        return None
+    if ENCODING_ATTR in record or RAW_EVENT_ATTR in record:  # incident item
+        try:
+            event = decode_raw_event(_plain_attributes(record))
+        except Exception:
+            # Offloaded to an unreachable bucket, truncated, unknown encoding...
+            return None
+        return event if isinstance(event, dict) else None
+    extra = record.get("extra")
+    if isinstance(extra, dict) and isinstance(extra.get("event"), dict):  # step 1 log line
+        return extra["event"]
+    if "message" in record and "extra" in record:  # other log lines
+        return None
+    return record
+
+
+def _plain_attributes(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Unwrap the string and binary attributes of an item exported as DynamoDB JSON."""
+    return {
+        k: v["S"] if isinstance(v, dict) and set(v) == {"S"} else v for k, v in item.items()
+    }
+
+
+def _recorded_at(event: Dict[str, Any], record: Any) -> Optional[datetime.datetime]:
+    for value in (
+        record.get("created_at") if isinstance(record, dict) else None,
+        event.get("time"),
+        (event.get("detail") or {}).get("state", {}).get("timestamp")
+        if isinstance((event.get("detail") or {}).get("state"), dict)
+        else None,
+    ):
+        if isinstance(value, str):
+            try:
+                return datetime.datetime.fromisoformat(value.replace("Z", "+00:00")[:26].rstrip("+"))
+            except ValueError:
+                continue
+    return None
+
+
+def load_recorded_events(paths: Iterable[str]) -> List[Tuple[Optional[datetime.datetime], Dict[str, Any]]]:
+    """(recorded time or None, event) for every event found in `paths`."""
+    recorded = []
+    for path in paths:
+        for record in _records(Path(path).read_text()):
+            event = _event_of(record)
+            if event is not None:
+                recorded.append((_recorded_at(event, record), event))
+    return recorded
+
+
+def replay_offsets(
+    recorded: List[Tuple[Optional[datetime.datetime], Dict[str, Any]]], speed: float
+) -> List[float]:
+    """Arrival offsets keeping the recorded spacing, `speed` times faster (0: all at once)."""
+    times = [t for t, _ in recorded]
+    if speed <= 0 or any(t is None for t in times):
+        return [0.0] * len(recorded)
+    start = min(times)
+    return [(t - start).total_seconds() / speed for t in times]
+
+
+# ---- driver -----------------------------------------------------------------
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """`q` quantile of sorted `samples` (nearest rank)."""
+    return samples[min(len(samples) - 1, int(len(samples) * q))] if samples else 0.0
+
+
+class _Stats:
+    def __init__(self) -> None:
+        self.service_ms: List[float] = []
+        self.response_ms: List[float] = []
+        self.events = 0
+        self.failed_events = 0
+        self.errors: collections.Counter = collections.Counter()
+        self._lock = threading.Lock()
+
+    def add(self, events: int, failed: int, service_ms: float, response_ms: float, error: Optional[str]) -> None:
+        with self._lock:
+            self.events += events
+            self.failed_events += failed
+            self.service_ms.append(service_ms)
+            self.response_ms.append(response_ms)
+            if error:
+                self.errors[error] += 1
+
+
+def _outcome(invocation: Dict[str, Any], response: Dict[str, Any]) -> Tuple[int, Optional[str]]:
+    """(failed events, error label) of one handler response."""
+    if "Records" in invocation:
+        failed = len(response.get("batchItemFailures", []))
+        return failed, "BatchItemFailure" if failed else None
+    if response.get("statusCode") != 200:
+        return 1, f"HTTP {response.get('statusCode')}"
+    return 0, None
+
+
+def drive(
+    invocations: List[Dict[str, Any]], offsets: List[float], workers: int
+) -> Dict[str, Any]:
+    """
+    Send each invocation to `lambda_handler` at its arrival offset, on a
+    pool of `workers` threads (open loop: arrivals do not wait for
+    earlier invocations to finish). Returns throughput, latency and
+    error figures.
+    """
+    from src.lambda_handler import lambda_handler
+
+    stats = _Stats()
+
+    def invoke(invocation: Dict[str, Any], due: float) -> None:
+        events = len(invocation.get("Records", [invocation]))
+        started = time.perf_counter()
+        try:
+            failed, error = _outcome(invocation, lambda_handler(invocation, None))
+        except Exception as e:
+            failed, error = events, type(e).__name__
+        finished = time.perf_counter()
+        stats.add(events, failed, (finished - started) * 1000, (finished - due) * 1000, error)
+
+    order = sorted(range(len(invocations)), key=offsets.__getitem__)
+    max_lag = 0.0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        start = time.perf_counter()
+        for i in order:
+            due = start + offsets[i]
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                max_lag = max(max_lag, -delay)
+            pool.submit(invoke, invocations[i], due)
+    elapsed = time.perf_counter() - start
+
+    service, response = sorted(stats.service_ms), sorted(stats.response_ms)
+    return {
+        "invocations": len(invocations),
+        "events": stats.events,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "offered_events_per_second": round(stats.events / max(offsets, default=0), 1)
+        if max(offsets, default=0) > 0
+        else None,
+        "events_per_second": round(stats.events / elapsed, 1) if elapsed else None,
+        "service_ms": {
+            "p50": round(percentile(service, 0.50), 2),
+            "p90": round(percentile(service, 0.90), 2),
+            "p99": round(percentile(service, 0.99), 2),
+            "max": round(service[-1], 2) if service else 0.0,
+        },
+        "response_ms": {
+            "p50": round(percentile(response, 0.50), 2),
+            "p90": round(percentile(response, 0.90), 2),
+            "p99": round(percentile(response, 0.99), 2),
+            "max": round(response[-1], 2) if response else 0.0,
+        },
+        "failed_events": stats.failed_events,
+        "errors": dict(stats.errors),
+        "max_dispatch_lag_ms": round(max_lag * 1000, 2),
+    }
+
+
+def _target(name: str, latency: str, sqlite_path: Optional[str] = None):
+    """
+    Context for the AWS target: the in-memory fakes (incidents in the fake
+    table, or in a SQLite database at `sqlite_path`) or the real account.
+    """
+    if name == "aws":
+        return nullcontext()
+    from benchmarks.bench_handler import parse_latency
+    from benchmarks.fakes import installed
+
+    store = None
+    if sqlite_path:
+        from src.storage.sqlite_store import SQLiteIncidentStore
+
+        store = SQLiteIncidentStore(sqlite_path)
+    return installed(latency=parse_latency(latency), store=store)
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    print("=== Load summary ===")
+    offered = result["offered_events_per_second"]
+    print(
+        f"{result['events']} events in {result['invocations']} invocations over "
+        f"{result['seconds']}s on {result['workers']} workers: "
+        f"{result['events_per_second']} events/s"
+        + (f" (offered {offered}/s)" if offered else "")
+    )
+    for name in ("service_ms", "response_ms"):
+        figures = result[name]
+        print(
+            f"{name:<12} p50 {figures['p50']:>9.2f} | p90 {figures['p90']:>9.2f} | "
+            f"p99 {figures['p99']:>9.2f} | max {figures['max']:>9.2f}"
+        )
+    print(f"failed events: {result['failed_events']}  errors: {result['errors'] or '-'}")
+    if result.get("aws_requests"):
+        print(f"AWS requests: {result['aws_requests']}")
+
+
+def _run(args: argparse.Namespace, invocations: List[Dict[str, Any]], offsets: List[float]) -> Dict[str, Any]:
+    from src.utils import metrics
+
+    if not args.emf:
+        metrics.set_emitter(lambda line: None)
+    with _target(args.target, args.latency, args.sqlite) as aws:
+        result = drive(invocations, offsets, args.workers)
+        if aws is not None:
+            result["aws_requests"] = aws.requests()
+    result["target"] = args.target
+    print_report(result)
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2))
+    return result
+
+
+def _spread(offsets: List[float], per_invocation: int) -> List[float]:
+    """Arrival offset of each batch: when its last event arrived."""
+    return [offsets[min(len(offsets), i + per_invocation) - 1] for i in range(0, len(offsets), per_invocation)]
+
+
+def cmd_load(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    events = synthesize_events(
+        args.events, parse_weights(args.mix), args.instances, args.zipf, args.duplicate_rate, rng
+    )
+    offsets = arrival_offsets(
+        len(events), args.rate, args.burst_rate, args.burst_every, args.burst_seconds, rng
+    )
+    invocations = wrap(events, args.envelope, args.batch_size)
+    if args.envelope in ("sqs", "sqs-sns"):
+        offsets = _spread(offsets, args.batch_size)
+    _run(args, invocations, offsets)
+
+
+def cmd_replay(args: argparse.Namespace) -> None:
+    recorded = load_recorded_events(args.paths)
+    if not recorded:
+        sys.exit("No events found in " + ", ".join(args.paths))
+    offsets = replay_offsets(recorded, args.speed)
+    span = max(offsets, default=0.0)
+
+    events, all_offsets = [], []
+    for n in range(args.repeat):
+        for offset, (_, event) in zip(offsets, recorded):
+            if not args.keep_ids:
+                # Fresh ids so repeats are not de-duplicated as redeliveries.
+                event = dict(event, id=str(uuid.uuid4()))
+            events.append(event)
+            all_offsets.append(offset + n * span)
+    order = sorted(range(len(events)), key=all_offsets.__getitem__)
+    events = [events[i] for i in order]
+    all_offsets = [all_offsets[i] for i in order]
+
+    invocations = wrap(events, args.envelope, args.batch_size)
+    if args.envelope in ("sqs", "sqs-sns"):
+        all_offsets = _spread(all_offsets, args.batch_size)
+    _run(args, invocations, all_offsets)
+
+
+def cmd_once(args: argparse.Namespace) -> None:
+    from src.lambda_handler import lambda_handler
+
     # sample
     event = load_sample_event()
 
-    # src/lambda_handler.py
-    result = lambda_handler(event, context=None)
+    with _target(args.target, args.latency, args.sqlite):
+        # src/lambda_handler.py
+        result = lambda_handler(event, context=None)
 
     # print result
     print("=== Lambda Result ===")
     print(json.dumps(result, indent=2, ensure_ascii=False))
-    print(" | Step 7: Result")
+
+
+def _add_common(parser: argparse.ArgumentParser, default_target: str) -> None:
+    parser.add_argument(
+        "--target",
+        choices=("fake", "aws"),
+        help=f"In-memory fakes (benchmarks/fakes.py) or the configured AWS account "
+        f"(default {default_target}; fake with --sqlite).",
+    )
+    parser.set_defaults(default_target=default_target)
+    parser.add_argument(
+        "--latency",
+        default="dynamodb=2,ec2=10,ses=20,s3=5",
+        help="Injected latency of the fakes per service in ms.",
+    )
+    parser.add_argument(
+        "--sqlite",
+        metavar="PATH",
+        help="Run against the fakes, keeping incidents in this SQLite database "
+        "(kept after the run).",
+    )
+
+
+def _add_driver(parser: argparse.ArgumentParser) -> None:
+    _add_common(parser, "fake")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent handler invocations.")
+    parser.add_argument("--envelope", choices=ENVELOPES, default="direct")
+    parser.add_argument("--batch-size", type=int, default=10, help="Records per SQS invocation.")
+    parser.add_argument("--emf", action="store_true", help="Print the EMF metric lines.")
+    parser.add_argument("--verbose", action="store_true", help="Keep the handler's info logs.")
+    parser.add_argument("--output", help="Write the summary as JSON to this path.")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command")
+
+    once = commands.add_parser("once", help="Send the sample StatusCheckFailed alarm once.")
+    _add_common(once, "aws")
+    once.set_defaults(func=cmd_once)
+
+    load = commands.add_parser("load", help="Synthesize an alarm storm.")
+    load.add_argument("--events", type=int, default=1000)
+    load.add_argument("--mix", default="status_check=5,high_cpu=3,stopped=2", help="Event kind weights.")
+    load.add_argument("--instances", type=int, default=100, help="Distinct instance IDs.")
+    load.add_argument("--zipf", type=float, default=0.0, help="Instance popularity skew (0 = uniform).")
+    load.add_argument("--duplicate-rate", type=float, default=0.0, help="Share of redelivered events.")
+    load.add_argument("--rate", type=float, default=50.0, help="Mean arrival rate, events/s (0 = all at once).")
+    load.add_argument("--burst-rate", type=float, default=0.0, help="Arrival rate during bursts.")
+    load.add_argument("--burst-every", type=float, default=0.0, help="Seconds between burst starts.")
+    load.add_argument("--burst-seconds", type=float, default=0.0, help="Length of each burst.")
+    load.add_argument("--seed", type=int, help="Random seed, for repeatable storms.")
+    _add_driver(load)
+    load.set_defaults(func=cmd_load)
+
+    replay = commands.add_parser("replay", help="Re-send recorded events.")
+    replay.add_argument("paths", nargs="+", help="JSON / JSON-lines files or handler log exports.")
+    replay.add_argument("--speed", type=float, default=0.0, help="Replay N times faster than recorded (0 = all at once).")
+    replay.add_argument("--repeat", type=int, default=1, help="Send the recording this many times.")
+    replay.add_argument("--keep-ids", action="store_true", help="Keep event ids (repeats become duplicates).")
+    _add_driver(replay)
+    replay.set_defaults(func=cmd_replay)
+
+    args = parser.parse_args(argv)
+    if args.command is None:
+        args = parser.parse_args(["once"] + (argv if argv is not None else sys.argv[1:]))
+    if args.target is None:
+        args.target = "fake" if args.sqlite else args.default_target
+    elif args.target == "aws" and args.sqlite:
+        parser.error(
+            "--sqlite runs against the fakes; against AWS set "
+            "INCIDENT_STORE_BACKEND=sqlite and INCIDENT_STORE_PATH instead"
+        )
+    if args.command != "once" and not args.verbose:
+        os.environ.setdefault("LOG_LEVEL", "warning")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,51 @@
 import json
+import time
 import datetime
-from typing import Any, Dict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from .utils.aws_clients import get_s3_client
-from .utils.config import REPORT_BUCKET_NAME, REPORT_PREFIX
+from .utils.config import (
+    BACKFILL_MAX_DAYS,
+    BACKFILL_MAX_WORKERS,
+    BACKFILL_SINKS,
+    REPORT_BUCKET_NAME,
+    REPORT_PREFIX,
+    REPORT_SINKS,
+)
 from .utils.logging_utils import get_logger, log_json
-from .reporting.daily_report import build_daily_report
-from .reporting.send_email import send_report_email
+from .utils.metrics import bind_scope, count, metrics_scope, span
+from .utils.resilience import NOT_FOUND, classify_error
+from .reporting.daily_report import (
+    SummaryMismatch,
+    daily_report_fingerprint,
+    daily_report_summary,
+    stream_daily_report_formats,
+)
+from .reporting.sinks import (
+    ReportSink,
+    SinkContext,
+    create_sinks,
+    encode_report_body,
+    report_content_encoding,
+    report_object_args,
+)
 
 logger = get_logger(__name__)
 
+# Metadata key of the published report listing the sinks that received
+# it. It is written together with the fingerprint, and only once every
+# sink of a publish has succeeded, so a partly failed publish is retried.
+DELIVERED_SINKS_KEY = "delivered-sinks"
 
-def upload_report_to_s3(date_str: str, markdown_report: str) -> Dict[str, Any]:
-    """
-    Upload the daily incident report (Markdown) to S3.
+# Metadata key of the published report holding the ETag it was uploaded
+# with. Stamping copies the object onto itself, which gives it a new ETag
+# (a multipart report's "-<parts>" ETag becomes a plain MD5), so the
+# S3 sink compares the rendered report against this one instead.
+CONTENT_ETAG_KEY = "content-etag"
 
-    The target bucket and prefix are controlled via configuration
-    (REPORT_BUCKET_NAME, REPORT_PREFIX), typically set by environment variables.
-    """
+
+def _report_location(date_str: str) -> Tuple[str, str]:
     bucket = REPORT_BUCKET_NAME
     if not bucket:
         # Fail fast if configuration is missing.
@@ -27,7 +55,17 @@ def upload_report_to_s3(date_str: str, markdown_report: str) -> Dict[str, Any]:
     if prefix and not prefix.endswith("/"):
         prefix += "/"
 
-    key = f"{prefix}{date_str}.md"
+    return bucket, f"{prefix}{date_str}.md"
+
+
+def upload_report_to_s3(date_str: str, markdown_report: str) -> Dict[str, Any]:
+    """
+    Upload the daily incident report (Markdown) to S3.
+
+    The target bucket and prefix are controlled via configuration
+    (REPORT_BUCKET_NAME, REPORT_PREFIX), typically set by environment variables.
+    """
+    bucket, key = _report_location(date_str)
 
     s3 = get_s3_client()
 
@@ -35,9 +73,8 @@ def upload_report_to_s3(date_str: str, markdown_report: str) -> Dict[str, Any]:
         s3.put_object(
             Bucket=bucket,
             Key=key,
-            Body=markdown_report.encode("utf-8"),
-            ContentType="text/markdown; charset=utf-8",
-            ContentDisposition="inline",
+            Body=encode_report_body(markdown_report),
+            **report_object_args(),
         )
         log_json(
             logger,
@@ -57,6 +94,230 @@ def upload_report_to_s3(date_str: str, markdown_report: str) -> Dict[str, Any]:
         return {"status": "FAILED", "error": error_msg, "bucket": bucket, "key": key}
 
 
+def _existing_report(bucket: str, key: str) -> Optional[Dict[str, Any]]:
+    """Content ETag, metadata and encoding of the published report, or None."""
+    try:
+        head = get_s3_client().head_object(Bucket=bucket, Key=key)
+    except Exception as e:
+        if classify_error(e) != NOT_FOUND:
+            log_json(
+                logger,
+                "warning",
+                "Could not read existing daily report; publishing anyway",
+                {"bucket": bucket, "key": key, "error": str(e)},
+            )
+        return None
+    metadata = head.get("Metadata") or {}
+    return {
+        "etag": metadata.get(CONTENT_ETAG_KEY) or head.get("ETag"),
+        "metadata": metadata,
+        "content_encoding": head.get("ContentEncoding"),
+    }
+
+
+def _delivered(existing: Optional[Dict[str, Any]], names: List[str]) -> bool:
+    """True if the published report is stamped as received by every sink in `names`."""
+    if existing is None:
+        return False
+    delivered = existing["metadata"].get(DELIVERED_SINKS_KEY)
+    return delivered is not None and set(names) <= set(delivered.split(","))
+
+
+def _stamp_report(bucket: str, key: str, metadata: Dict[str, str]) -> bool:
+    """Replace the published report's metadata in place (CopyObject onto itself)."""
+    try:
+        get_s3_client().copy_object(
+            Bucket=bucket,
+            Key=key,
+            CopySource={"Bucket": bucket, "Key": key},
+            MetadataDirective="REPLACE",
+            **report_object_args(metadata),
+        )
+    except Exception as e:
+        log_json(
+            logger,
+            "warning",
+            "Failed to record daily report delivery",
+            {"bucket": bucket, "key": key, "error": str(e)},
+        )
+        return False
+    return True
+
+
+def deliver_report(
+    chunks: Iterable[Tuple[str, str]],
+    sinks: Dict[str, ReportSink],
+    skip_unchanged: bool = True,
+) -> Dict[str, Any]:
+    """
+    Feed the rendered (format, chunk) stream to the sinks taking each
+    format, then finish all sinks concurrently, so delivery takes as long
+    as the slowest sink rather than the sum of them. Returns
+    {name: result}.
+
+    With `skip_unchanged` false the sinks are never told the report is
+    unchanged, so notifications go out even when the stored copies match.
+
+    A sink whose `write` fails is aborted and reported FAILED; the others
+    still get the whole report. If rendering itself fails every sink is
+    aborted and the error propagates.
+    """
+    results: Dict[str, Any] = {}
+    active = dict(sinks)
+    try:
+        with span("Render"):
+            for fmt, chunk in chunks:
+                for name, sink in list(active.items()):
+                    if sink.format != fmt:
+                        continue
+                    try:
+                        sink.write(chunk)
+                    except Exception as e:
+                        sink.abort()
+                        del active[name]
+                        results[name] = {"status": "FAILED", "error": str(e)}
+                        log_json(logger, "error", "Report sink failed", {"sink": name, "error": str(e)})
+    except BaseException:
+        # Rendering failed (e.g. a DynamoDB error): drop partial deliveries.
+        for sink in active.values():
+            sink.abort()
+        raise
+
+    verdicts = []
+    for sink in active.values():
+        try:
+            verdicts.append(sink.unchanged())
+        except Exception:
+            pass  # finish() reports the error
+    known = [v for v in verdicts if v is not None]
+    unchanged = skip_unchanged and bool(known) and all(known)
+
+    def _finish(name: str, sink: ReportSink) -> Dict[str, Any]:
+        with span(f"Sink.{name}"):
+            return sink.finish(unchanged)
+
+    if active:
+        with span("Deliver"), ThreadPoolExecutor(max_workers=len(active)) as pool:
+            futures = {
+                name: pool.submit(bind_scope(_finish), name, sink)
+                for name, sink in active.items()
+            }
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                results[name] = {"status": "FAILED", "error": str(e)}
+
+    return {name: results[name] for name in sinks}
+
+
+def _render(ctx: SinkContext, names: List[str], skip_unchanged: bool) -> Dict[str, Any]:
+    """Create the sinks in `names` and deliver `ctx`'s report to them."""
+    sink_map = create_sinks(names, ctx)
+    formats = {sink.format for sink in sink_map.values()}
+    return deliver_report(
+        stream_daily_report_formats(ctx.date_str, ctx.summary, formats),
+        sink_map,
+        skip_unchanged=skip_unchanged,
+    )
+
+
+def publish_report(
+    date_str: str, sinks: Optional[List[str]] = None, force: bool = False
+) -> Dict[str, Any]:
+    """
+    Render `date_str`'s report once (in every format the sinks take) and
+    deliver it to `sinks` (default REPORT_SINKS), skipping everything that
+    would not change.
+
+    1. Before rendering, the day's fingerprint (incident count, newest sk,
+       report format version) is compared with the metadata of the report
+       already in S3; if they match, nothing is rendered or delivered.
+    2. Otherwise the report is rendered and fed to every sink; if the
+       rendered object's ETag equals the one the existing report was
+       uploaded with, no sink delivers.
+
+    Both checks trust the existing report only if it is stamped as
+    delivered to all of `sinks`. The stamp (fingerprint, sink names and
+    the uploaded content's ETag) is written onto the Markdown object
+    after every sink has succeeded, so a publish where one sink failed is
+    redone in full next time.
+
+    A stored daily summary that the rendering pass finds out of step with
+    the incidents is repaired, and the report rendered again from the
+    rows' counts (see `SummaryMismatch`).
+
+    `force` skips both checks. Each sink's result is under "<name>_result".
+    """
+    names = list(dict.fromkeys(REPORT_SINKS if sinks is None else sinks))
+    bucket, key = _report_location(date_str)
+    with span("Fingerprint"):
+        fingerprint = daily_report_fingerprint(date_str)
+        existing = None if force else _existing_report(bucket, key)
+
+    delivered = _delivered(existing, names)
+    if (
+        delivered
+        and fingerprint is not None
+        and existing["content_encoding"] == report_content_encoding()
+        and all(existing["metadata"].get(k) == v for k, v in fingerprint.items())
+    ):
+        log_json(
+            logger,
+            "info",
+            "Daily report unchanged; render skipped",
+            {"date": date_str, "bucket": bucket, "key": key, **fingerprint},
+        )
+        results = {name: {"status": "UNCHANGED"} for name in names}
+        status = "UNCHANGED"
+    else:
+        with span("Summary"):
+            summary = daily_report_summary(date_str)
+        ctx = SinkContext(
+            date_str,
+            bucket,
+            key,
+            existing_etag=existing["etag"] if existing else None,
+            summary=summary,
+        )
+        try:
+            results = _render(ctx, names, skip_unchanged=delivered)
+        except SummaryMismatch as e:
+            # The stored summary missed incidents and the sinks were
+            # aborted; render again with the counts the rows gave.
+            count("ReportSummaryMismatch")
+            log_json(
+                logger,
+                "warning",
+                "Daily summary did not match incidents; rendering again",
+                {"date": date_str, "stored_total": summary["total"], "total": e.summary["total"]},
+            )
+            ctx.summary = summary = e.summary
+            if fingerprint is not None:
+                fingerprint = daily_report_fingerprint(date_str, summary)
+            results = _render(ctx, names, skip_unchanged=delivered)
+        statuses = {r["status"] for r in results.values()}
+        if "FAILED" in statuses:
+            status = "FAILED"
+        elif statuses <= {"UNCHANGED"}:
+            status = "UNCHANGED"
+        else:
+            status = "PUBLISHED"
+
+        if status != "FAILED" and "s3" in names:
+            stamp = dict(fingerprint or {}, **{DELIVERED_SINKS_KEY: ",".join(names)})
+            if results["s3"].get("etag"):
+                stamp[CONTENT_ETAG_KEY] = results["s3"]["etag"].strip('"')
+            if existing is None or existing["metadata"] != stamp or status != "UNCHANGED":
+                _stamp_report(bucket, key, stamp)
+
+    count("Reports" + status.capitalize())
+    result: Dict[str, Any] = {"date": date_str, "status": status}
+    for name in names:
+        result[f"{name}_result"] = results[name]
+    return result
+
+
 def _get_report_date_from_event(event: Dict[str, Any]) -> str:
     """
     Derive the report date from the incoming event.
@@ -77,16 +338,129 @@ def _get_report_date_from_event(event: Dict[str, Any]) -> str:
     return datetime.datetime.utcnow().strftime("%Y-%m-%d")
 
 
+def _get_report_range_from_event(event: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """Return (from, to) when the event asks for a backfill, else None."""
+    if not isinstance(event, dict):
+        return None
+    for source in (event, event.get("detail") or {}):
+        if isinstance(source.get("from"), str) and isinstance(source.get("to"), str):
+            return source["from"], source["to"]
+    return None
+
+
+def report_dates(start: str, end: str) -> List[str]:
+    """Every date from `start` to `end` inclusive, as YYYY-MM-DD strings."""
+    first = datetime.datetime.strptime(start, "%Y-%m-%d").date()
+    last = datetime.datetime.strptime(end, "%Y-%m-%d").date()
+    if last < first:
+        raise ValueError(f"Backfill range ends before it starts: {start} > {end}")
+    days = (last - first).days + 1
+    if days > BACKFILL_MAX_DAYS:
+        raise ValueError(f"Backfill range of {days} days exceeds BACKFILL_MAX_DAYS={BACKFILL_MAX_DAYS}")
+    return [(first + datetime.timedelta(days=n)).isoformat() for n in range(days)]
+
+
+def _backfill_day(date_str: str, force: bool) -> Dict[str, Any]:
+    started = time.perf_counter()
+    try:
+        result = publish_report(date_str, sinks=BACKFILL_SINKS, force=force)
+    except Exception as e:
+        result = {"status": "FAILED", "error": str(e)}
+
+    sink_results = [v for k, v in result.items() if k.endswith("_result")]
+    day = {
+        "date": date_str,
+        "status": "SUCCESS" if result["status"] == "PUBLISHED" else result["status"],
+        "seconds": round(time.perf_counter() - started, 3),
+        "bytes": sum(r.get("bytes") or 0 for r in sink_results) or None,
+    }
+    errors = [r["error"] for r in sink_results if "error" in r]
+    if "error" in result or errors:
+        day["error"] = result.get("error") or "; ".join(errors)
+    return day
+
+
+def backfill_reports(
+    start: str, end: str, max_workers: Optional[int] = None, force: bool = False
+) -> Dict[str, Any]:
+    """
+    Regenerate and upload the report for every day from `start` to `end`.
+
+    Days are rendered and uploaded concurrently on a worker pool (each day
+    streams its own per-partition queries) to BACKFILL_SINKS only, so no
+    email is sent. Progress
+    is logged as each day finishes; the result lists per-day status and
+    timing. A failed day does not stop the others. Days whose report is
+    unchanged are skipped (status UNCHANGED) unless `force` is set.
+    """
+    dates = report_dates(start, end)
+    if max_workers is None:
+        max_workers = BACKFILL_MAX_WORKERS
+    workers = max(1, min(max_workers, len(dates)))
+
+    started = time.perf_counter()
+    days: List[Dict[str, Any]] = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(bind_scope(_backfill_day), d, force) for d in dates]
+        for completed, future in enumerate(as_completed(futures), 1):
+            day = future.result()
+            days.append(day)
+            log_json(
+                logger,
+                "error" if day["status"] == "FAILED" else "info",
+                "Backfill progress",
+                {"completed": completed, "total": len(dates), **day},
+            )
+
+    days.sort(key=lambda d: d["date"])
+    failed = [d["date"] for d in days if d["status"] == "FAILED"]
+    summary = {
+        "from": dates[0],
+        "to": dates[-1],
+        "days": len(dates),
+        "succeeded": len(dates) - len(failed),
+        "unchanged": sum(1 for d in days if d["status"] == "UNCHANGED"),
+        "failed": failed,
+        "workers": workers,
+        "seconds": round(time.perf_counter() - started, 3),
+        "slowest_day_seconds": max(d["seconds"] for d in days),
+    }
+    log_json(logger, "info", "Backfill completed", summary)
+    return dict(summary, day_results=days)
+
+
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Main entry point for the Daily Report Lambda.
 
+    An event with "from" and "to" dates (top level or under "detail")
+    runs `backfill_reports` for that range instead: reports are uploaded
+    to S3 only, without email. Reports that would not change are not
+    re-rendered, re-uploaded or re-sent unless the event has "force": true.
+
     Steps:
     1. Determine which date to build the report for.
-    2. Generate the Markdown daily report from DynamoDB.
-    3. Send the report via SES.
-    4. Upload the report to S3 for archival.
+    2. Render the Markdown daily report from DynamoDB once, streaming it
+       into every sink in REPORT_SINKS (S3 multipart upload, gzip-encoded;
+       a bounded copy for the email).
+    3. Finish the sinks concurrently: complete the S3 upload and send the
+       report via SES at the same time.
+
+    Step and AWS call durations are emitted as one EMF record per
+    invocation (Handler dimension).
     """
+    force = isinstance(event, dict) and bool(event.get("force"))
+    report_range = _get_report_range_from_event(event)
+    if report_range is not None:
+        log_json(
+            logger,
+            "info",
+            "Daily report backfill triggered",
+            {"from": report_range[0], "to": report_range[1]},
+        )
+        with metrics_scope(Handler="Backfill"):
+            return backfill_reports(*report_range, force=force)
+
     date_str = _get_report_date_from_event(event)
     log_json(
         logger,
@@ -95,20 +469,9 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         {"date": date_str, "raw_event": event},
     )
 
-    # Build Markdown report content from DynamoDB incidents.
-    markdown_report = build_daily_report(date_str)
-
-    # Send the report via SES.
-    email_result = send_report_email(date_str, markdown_report)
-
-    # Upload the report to S3.
-    s3_result = upload_report_to_s3(date_str, markdown_report)
-
-    result = {
-        "date": date_str,
-        "email_result": email_result,
-        "s3_result": s3_result,
-    }
+    with metrics_scope(Handler="DailyReport") as metrics:
+        metrics.set_property("date", date_str)
+        result = publish_report(date_str, force=force)
 
     log_json(
         logger,
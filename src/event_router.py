@@ -1,38 +1,342 @@
-from typing import Any, Dict
+import re
+import json
+import threading
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Pattern, Tuple, Union
 
+# EC2 instance ARN, as listed in an event's `resources`.
+_INSTANCE_ARN_RE = re.compile(r"^arn:[\w-]+:ec2:[\w-]*:\d*:instance/(i-[0-9a-zA-Z]+)$")
 
-def extract_instance_id(event):
-    try:
-        metrics = event.get("detail", {}).get("configuration", {}).get("metrics", [])
 
-        if not metrics:
-            return None
+def _dimension_instance_ids(dimensions: Any) -> Iterator[str]:
+    # [{"name": "InstanceId", "value": ...}] (SNS alarm messages and this
+    # project's samples) or {"InstanceId": ...} (EventBridge alarm events).
+    if isinstance(dimensions, dict):
+        value = dimensions.get("InstanceId")
+        if value:
+            yield str(value)
+        return
+    for d in dimensions or []:
+        if isinstance(d, dict) and d.get("name") == "InstanceId" and d.get("value"):
+            yield str(d["value"])
 
-        dimensions = (
-            metrics[0].get("metricStat", {}).get("metric", {}).get("dimensions", [])
-        )
 
-        for d in dimensions:
-            if d.get("name") == "InstanceId":
-                return d.get("value")
+def extract_instance_ids(event: Dict[str, Any]) -> List[str]:
+    """
+    Every EC2 instance an event targets, in first-seen order, without
+    duplicates: InstanceId dimensions of all the alarm's metrics (metric
+    math alarms list several), the `instance-id` of EC2 state-change
+    events, instance ARNs in `resources`, and the dimensions of SNS alarm
+    messages (`Trigger`).
+    """
+    if not isinstance(event, dict):
+        return []
+    ids: List[str] = []
+    detail = event.get("detail") or {}
+    if isinstance(detail, dict):
+        configuration = detail.get("configuration")
+        metrics = configuration.get("metrics") if isinstance(configuration, dict) else None
+        for m in metrics if isinstance(metrics, list) else []:
+            stat = m.get("metricStat") if isinstance(m, dict) else None
+            metric = stat.get("metric") if isinstance(stat, dict) else None
+            if isinstance(metric, dict):
+                ids.extend(_dimension_instance_ids(metric.get("dimensions")))
+        if detail.get("instance-id"):
+            ids.append(str(detail["instance-id"]))
+
+    for arn in event.get("resources") or []:
+        match = _INSTANCE_ARN_RE.match(str(arn))
+        if match:
+            ids.append(match.group(1))
+
+    trigger = event.get("Trigger") or {}
+    if isinstance(trigger, dict):
+        ids.extend(_dimension_instance_ids(trigger.get("Dimensions")))
+        for m in trigger.get("Metrics") or []:
+            metric = ((m or {}).get("MetricStat") or {}).get("Metric") or {}
+            ids.extend(_dimension_instance_ids(metric.get("Dimensions")))
+    return list(dict.fromkeys(ids))
 
-        return None
 
+def extract_instance_id(event: Dict[str, Any]) -> Optional[str]:
+    """The first instance the event targets (see `extract_instance_ids`), or None."""
+    try:
+        ids = extract_instance_ids(event)
     except Exception:
         return None
+    return ids[0] if ids else None
+
+
+FieldPattern = Union[str, Pattern[str]]
+
+
+class Rule(NamedTuple):
+    """
+    One classification rule; all set fields must match.
+
+    A string field matches when it occurs as a case-insensitive substring
+    of the event field; a compiled regex is searched instead.
+    """
+
+    event_type: str
+    alarm_name: Optional[FieldPattern] = None
+    metric_name: Optional[FieldPattern] = None
+    namespace: Optional[FieldPattern] = None
+    source: Optional[FieldPattern] = None
+    detail_type: Optional[FieldPattern] = None
+    state: Optional[FieldPattern] = None
+
+
+RULE_FIELDS = ("source", "detail_type", "state", "namespace", "metric_name", "alarm_name")
+
+# Built-in rules, most specific first. Metric-based rules win over alarm-name
+# keywords, and "status" is checked before "cpu" so names such as
+# "StatusCheckCPU" route to the status-check remediation.
+DEFAULT_RULES = [
+    Rule("EC2_STATUS_CHECK_FAILED", namespace="AWS/EC2", metric_name="StatusCheckFailed"),
+    Rule("EC2_HIGH_CPU", namespace="AWS/EC2", metric_name="CPUUtilization"),
+    Rule(
+        "EC2_UNEXPECTED_STOP",
+        source="aws.ec2",
+        detail_type="EC2 Instance State-change Notification",
+        # Only the final state; pending, running, stopping, shutting-down
+        # and terminated notifications are not unexpected stops.
+        state=re.compile(r"^stopped$"),
+    ),
+    Rule("EC2_STATUS_CHECK_FAILED", alarm_name="status"),
+    Rule("EC2_HIGH_CPU", alarm_name="cpu"),
+    Rule("EC2_UNEXPECTED_STOP", alarm_name="stop"),
+]
+
+
+def _event_fields(event: Dict[str, Any]) -> Tuple[str, ...]:
+    """Event values in RULE_FIELDS order."""
+    detail = event.get("detail")
+    if not isinstance(detail, dict):
+        detail = {}
+    configuration = detail.get("configuration")
+    metrics = configuration.get("metrics") if isinstance(configuration, dict) else None
+    metric: Dict[str, Any] = {}
+    for m in metrics if isinstance(metrics, list) else []:
+        if not isinstance(m, dict):
+            continue
+        stat = m.get("metricStat")
+        metric = stat.get("metric") if isinstance(stat, dict) else None
+        if isinstance(metric, dict) and metric:
+            break
+        metric = {}
+    # A string on EC2 state-change events; alarm events carry a dict
+    # (value, reason, timestamp) that would only spoil the cache key.
+    state = detail.get("state")
+
+    return (
+        str(event.get("source", "")),
+        str(event.get("detail-type", "")),
+        state if isinstance(state, str) else "",
+        str(metric.get("namespace", "")),
+        str(metric.get("metricName", "")),
+        str(detail.get("alarmName", "")),
+    )
+
+
+def _trie_regex(keywords: List[str]) -> str:
+    """
+    Regex alternation shaped as a trie, so matching at a position costs
+    O(keyword length) instead of O(number of keywords). Optional suffixes
+    are greedy, so the longest keyword at each position wins.
+    """
+    trie: Dict[str, Any] = {}
+    for kw in keywords:
+        node = trie
+        for ch in kw:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            return "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class _FieldMatcher:
+    """All literal and regex conditions registered for one event field."""
+
+    def __init__(self) -> None:
+        self.literal_rules: Dict[str, List[int]] = {}
+        self.regex_rules: List[Tuple[Pattern[str], List[int]]] = []
+        self.scanner: Optional[Pattern[str]] = None
+        self.implied: Dict[str, List[str]] = {}
+
+    def add(self, pattern: FieldPattern, rule_index: int) -> None:
+        if isinstance(pattern, str):
+            self.literal_rules.setdefault(pattern.lower(), []).append(rule_index)
+        else:
+            for compiled, indexes in self.regex_rules:
+                if compiled is pattern:
+                    indexes.append(rule_index)
+                    break
+            else:
+                self.regex_rules.append((pattern, [rule_index]))
+
+    def compile(self) -> None:
+        keywords = list(self.literal_rules)
+        if keywords:
+            self.scanner = re.compile("(?=(" + _trie_regex(keywords) + "))")
+        # The scanner reports the longest keyword per position; shorter
+        # keywords that are prefixes of it matched at the same position.
+        self.implied = {
+            kw: [other for other in keywords if kw.startswith(other)] for kw in keywords
+        }
+
+    def matching_rules(self, value: str) -> Iterator[int]:
+        if self.scanner is not None and value:
+            seen = set()
+            for m in self.scanner.finditer(value.lower()):
+                for kw in self.implied[m.group(1)]:
+                    if kw not in seen:
+                        seen.add(kw)
+                        yield from self.literal_rules[kw]
+        for compiled, indexes in self.regex_rules:
+            if compiled.search(value):
+                yield from indexes
+
+
+class EventClassifier:
+    """
+    Ordered rule table compiled into one multi-pattern matcher per field.
+
+    Literal conditions of a field are merged into a single trie-shaped
+    regex that finds every keyword in one pass; the first rule (in table
+    order) whose conditions all matched wins. Results are memoized per
+    field tuple, since alarm storms repeat the same alarms.
+    """
+
+    def __init__(self, rules: Optional[List[Rule]] = None, cache_size: int = 4096):
+        self._rules: List[Rule] = []
+        self._matchers: Optional[Dict[str, _FieldMatcher]] = None
+        self._required: List[int] = []
+        self._cache: Dict[Tuple[str, ...], str] = {}
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        for rule in rules or []:
+            self.add_rule(rule)
+
+    @property
+    def rules(self) -> List[Rule]:
+        return list(self._rules)
+
+    def add_rule(self, rule: Rule, index: Optional[int] = None) -> None:
+        """Append a rule (or insert it at `index` to give it priority)."""
+        if not any(getattr(rule, f) for f in RULE_FIELDS):
+            raise ValueError("Rule must set at least one field pattern")
+        with self._lock:
+            if index is None:
+                self._rules.append(rule)
+            else:
+                self._rules.insert(index, rule)
+            self._matchers = None
+            self._cache = {}
+
+    def _compile(self) -> Dict[str, _FieldMatcher]:
+        matchers = {f: _FieldMatcher() for f in RULE_FIELDS}
+        required = []
+        for n, rule in enumerate(self._rules):
+            conditions = 0
+            for field in RULE_FIELDS:
+                pattern = getattr(rule, field)
+                if pattern:
+                    matchers[field].add(pattern, n)
+                    conditions += 1
+            required.append(conditions)
+        for matcher in matchers.values():
+            matcher.compile()
+        self._required = required
+        return matchers
+
+    def classify_fields(self, fields: Tuple[str, ...]) -> str:
+        cached = self._cache.get(fields)
+        if cached is not None:
+            return cached
+
+        matchers = self._matchers
+        if matchers is None:
+            with self._lock:
+                if self._matchers is None:
+                    self._matchers = self._compile()
+                matchers = self._matchers
+
+        hits: Dict[int, int] = {}
+        best: Optional[int] = None
+        required = self._required
+        for field, value in zip(RULE_FIELDS, fields):
+            for n in matchers[field].matching_rules(value):
+                count = hits.get(n, 0) + 1
+                hits[n] = count
+                if count == required[n] and (best is None or n < best):
+                    best = n
+
+        event_type = self._rules[best].event_type if best is not None else "UNKNOWN"
+
+        if self.cache_size:
+            if len(self._cache) >= self.cache_size:
+                self._cache = {}
+            self._cache[fields] = event_type
+        return event_type
+
+    def classify(self, event: Dict[str, Any]) -> str:
+        return self.classify_fields(_event_fields(event))
+
+
+_classifier = EventClassifier(DEFAULT_RULES)
+
+
+def register_rule(rule: Rule, index: Optional[int] = None) -> None:
+    """Add a classification rule to the default router."""
+    _classifier.add_rule(rule, index)
+
+
+def get_classifier() -> EventClassifier:
+    return _classifier
 
 
 def identify_event_type(event: Dict[str, Any]) -> str:
-    detail = event.get("detail", {})
-    alarm_name = str(detail.get("alarmName", "")).lower()
+    return _classifier.classify(event)
+
+
+def is_batch_event(event: Dict[str, Any]) -> bool:
+    """True for SQS / SNS invocations that carry a `Records` batch."""
+    records = event.get("Records") if isinstance(event, dict) else None
+    return isinstance(records, list) and bool(records)
+
+
+def unwrap_record(record: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Return (item identifier, inner event) for one SQS or SNS record.
+
+    Handles SQS bodies that hold either the event itself (raw message
+    delivery) or an SNS notification envelope, and direct SNS records.
+    Raises ValueError when the payload is not a JSON object.
+    """
+    if "Sns" in record:
+        identifier = record["Sns"].get("MessageId", "")
+        payload: Any = record["Sns"].get("Message", "")
+    else:
+        identifier = record.get("messageId", "")
+        payload = record.get("body", "")
 
-    if "cpu" in alarm_name:
-        return "EC2_HIGH_CPU"
+    if isinstance(payload, str):
+        payload = json.loads(payload)
 
-    if "status" in alarm_name:
-        return "EC2_STATUS_CHECK_FAILED"
+    # SNS -> SQS without raw message delivery wraps the event once more.
+    if isinstance(payload, dict) and payload.get("Type") == "Notification":
+        payload = json.loads(payload.get("Message", ""))
 
-    if "stop" in alarm_name:
-        return "EC2_UNEXPECTED_STOP"
+    if not isinstance(payload, dict):
+        raise ValueError("Record payload is not a JSON object")
 
-    return "UNKNOWN"
+    return identifier, payload
@@ -1,96 +1,447 @@
 import json
-from typing import Any, Dict
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
-from .event_router import identify_event_type, extract_instance_id
+from .event_router import (
+    identify_event_type,
+    extract_instance_id,
+    extract_instance_ids,
+    is_batch_event,
+    unwrap_record,
+)
 from .remediation import run_remediation
-from .storage.dynamodb_client import put_incident
-from .utils.logging_utils import get_logger, log_json
+from .remediation.ec2_batcher import batching as ec2_batching
+from .storage.incident_store import (
+    IncidentBatchWriter,
+    IncidentKey,
+    build_incident_item,
+    get_incident_store,
+    incident_key,
+)
+from .storage.idempotency import (
+    STATUS_COMPLETED,
+    STATUS_PARTIAL,
+    idempotency_key,
+    idempotency_store,
+)
+from .storage.payload_codec import without_payload
+from .utils.config import BATCH_MAX_WORKERS, IDEMPOTENCY_ENABLED, REMEDIATION_MAX_WORKERS
+from .utils.logging_utils import get_logger, log_json, log_sampling
+from .utils.metrics import MetricsContext, bind_scope, metrics_scope
 
 logger = get_logger(__name__)
 
 
-def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+class IncidentsNotStored(RuntimeError):
     """
-    Main entry point for the Auto-Remediation Lambda.
+    Some of an event's incidents could not be stored. `stored` maps the
+    instances whose incidents were (this time or by an earlier delivery)
+    to their remediation results.
+    """
+
+    def __init__(self, message: str, stored: Dict[str, Dict[str, Any]]):
+        super().__init__(message)
+        self.stored = stored
+
+
+def _remediate(
+    event_type: str, event: Dict[str, Any], instance_ids: List[str]
+) -> List[Dict[str, Any]]:
+    """
+    One remediation result per instance (one for an event without any),
+    in `instance_ids` order. Several instances are remediated concurrently
+    on up to REMEDIATION_MAX_WORKERS threads.
+    """
+    targets: List[Optional[str]] = list(instance_ids) or [None]
+
+    def remediate(instance_id: Optional[str]) -> Dict[str, Any]:
+        return run_remediation(event_type, {"raw": event, "instance_id": instance_id})
+
+    if len(targets) == 1:
+        return [remediate(targets[0])]
+    workers = max(1, min(REMEDIATION_MAX_WORKERS, len(targets)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(bind_scope(remediate), targets))
+
+
+def _store_incidents(items: List[Dict[str, Any]]) -> Dict[IncidentKey, Dict[str, Any]]:
+    """
+    Write the event's incidents: put_item for one, one batch for several
+    (whose unprocessed items the store retries). Returns the outcomes of
+    the incidents that could not be stored.
+    """
+    store = get_incident_store()
+    if len(items) == 1:
+        store.put(items[0])
+        return {}
+    outcomes = store.put_batch(items)
+    failed = {}
+    for item in items:
+        outcome = outcomes.get(incident_key(item), {})
+        if outcome.get("status") != "SUCCESS":
+            failed[incident_key(item)] = outcome
+    return failed
+
+
+def process_event(
+    event: Dict[str, Any],
+    writer: Optional[IncidentBatchWriter] = None,
+    done: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Run the remediation pipeline for a single alarm event.
+
+    Returns (response body, incident items). When `writer` is given the
+    incidents are buffered for a batched write instead of written here.
+    Instances in `done` (instance id -> remediation result, from an
+    earlier delivery whose incidents were only partly stored) are neither
+    remediated nor stored again; their results go into the response as
+    they are. Without a writer, IncidentsNotStored is raised when some of
+    the incidents cannot be stored.
 
     Steps performed:
     1. Log the incoming CloudWatch/SNS event.
-    2. Extract instance_id or related resource ID.
+    2. Extract the IDs of every instance the event targets.
     3. Identify the event type (StatusCheckFailed, HighCPU, UnexpectedStop, etc.).
-    4. Run the corresponding remediation action.
-    5. Store incident details in DynamoDB.
-    6. Return a structured response.
+    4. Run the corresponding remediation action for each instance, in
+       parallel when there are several (e.g. an alarm on an ASG-wide
+       metric); outside batch invocations their EC2 calls are coalesced.
+    5. Store one incident per instance in DynamoDB, several in one batch.
+    6. Return the response body; with several instances it lists
+       `remediations` per instance instead of one `remediation`.
+
+    The duration of each step and of every AWS call is emitted as one EMF
+    record per event, with EventType and RemediationAction dimensions.
     """
 
-    # Step 1 — Log the raw incoming event
-    log_json(
-        logger,
-        "info",
-        "Incoming CloudWatch/SNS event (deployed-v2)",
-        {"step": 1, "event": event},
-    )
+    with metrics_scope(EventType="UNKNOWN", RemediationAction="NONE") as metrics:
+        # The event type is identified up front so that the info logs of
+        # the whole pipeline are sampled together (LOG_SAMPLE_RATES), and
+        # so that it can label this event's metrics.
+        with metrics.span("IdentifyEventType"):
+            event_type = identify_event_type(event)
+        metrics.set_dimensions(EventType=event_type)
 
-    # Step 2 — Extract instance ID from the event payload
-    instance_id = extract_instance_id(event)
-    parsed_event = {
-        "raw": event,
-        "instance_id": instance_id,
-    }
-    log_json(
-        logger,
-        "info",
-        "Extracted instance ID",
-        {"step": 2, "instance_id": instance_id},
-    )
+        with log_sampling(str(event_type)):
+            # Step 1 — Log the raw incoming event
+            with metrics.span("LogEvent"):
+                log_json(
+                    logger,
+                    "info",
+                    "Incoming CloudWatch/SNS event (deployed-v2)",
+                    {"step": 1, "event": event},
+                )
 
-    # Step 3 — Determine which remediation rule should be triggered
-    event_type = identify_event_type(event)
-    log_json(
-        logger,
-        "info",
-        "Identified event type",
-        {"step": 3, "event_type": str(event_type)},
+            # Step 2 — Extract the instance IDs from the event payload
+            with metrics.span("ExtractInstanceId"):
+                instance_ids = extract_instance_ids(event)
+            extracted: Dict[str, Any] = {
+                "step": 2,
+                "instance_id": instance_ids[0] if instance_ids else None,
+            }
+            if len(instance_ids) > 1:
+                extracted["instance_ids"] = instance_ids
+            log_json(logger, "info", "Extracted instance ID", extracted)
+
+            # Step 3 — Determine which remediation rule should be triggered
+            log_json(
+                logger,
+                "info",
+                "Identified event type",
+                {"step": 3, "event_type": str(event_type)},
+            )
+
+            # Step 4 — Execute remediation logic based on event type
+            done = done or {}
+            pending = [i for i in instance_ids if i not in done]
+            coalesce = writer is None and len(pending) > 1
+            with metrics.span("Remediate"), (
+                ec2_batching() if coalesce else contextlib.nullcontext()
+            ):
+                new_results = (
+                    _remediate(event_type, event, pending) if pending or not instance_ids else []
+                )
+            fresh = dict(zip(pending, new_results))
+            results = [fresh[i] if i in fresh else done[i] for i in instance_ids] or new_results
+            actions = {r.get("action") or "NONE" for r in results}
+            metrics.set_dimensions(
+                RemediationAction=actions.pop() if len(actions) == 1 else "MIXED"
+            )
+            for remediation_result in new_results:
+                log_json(
+                    logger,
+                    "info",
+                    "Remediation executed",
+                    {
+                        "step": 4,
+                        "event_type": str(event_type),
+                        "remediation_result": remediation_result,
+                    },
+                )
+
+            # Step 5 — Persist one incident per instance into DynamoDB
+            with metrics.span("StoreIncident"):
+                saved_items = [
+                    build_incident_item(
+                        event_type=event_type,
+                        instance_id=instance_id,
+                        remediation=remediation_result,
+                        raw_event=event,
+                    )
+                    for instance_id, remediation_result in zip(pending or [None], new_results)
+                ]
+                if writer is None:
+                    failed = _store_incidents(saved_items)
+                    if failed:
+                        stored = dict(done)
+                        stored.update(
+                            (instance_id, fresh[instance_id])
+                            for instance_id, item in zip(pending, saved_items)
+                            if incident_key(item) not in failed
+                        )
+                        error = next(iter(failed.values())).get("error")
+                        raise IncidentsNotStored(
+                            f"Failed to store {len(failed)} of {len(saved_items)} "
+                            f"incidents: {error}",
+                            stored,
+                        )
+                else:
+                    for saved_item in saved_items:
+                        writer.add(saved_item)
+            for saved_item in saved_items:
+                log_json(
+                    logger,
+                    "info",
+                    "Incident stored in DynamoDB" if writer is None else "Incident queued for batch write",
+                    {"step": 5, "saved_item": without_payload(saved_item)},
+                )
+
+            # Step 6 — Construct API/Lambda response
+            response_body: Dict[str, Any] = {"event_type": str(event_type)}
+            if len(results) == 1:
+                response_body["remediation"] = results[0]
+            else:
+                response_body["instance_ids"] = instance_ids
+                response_body["remediations"] = results
+
+            log_json(
+                logger,
+                "info",
+                "Lambda execution completed successfully",
+                {"step": 6, "response_body": response_body},
+            )
+            metrics.count("Incidents", len(saved_items))
+
+            return response_body, saved_items
+
+
+def _claim_event(
+    event: Dict[str, Any]
+) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Return (idempotency key, earlier delivery). The earlier delivery is None
+    when this event has not been seen and should be processed; a PARTIAL
+    one should be processed too, skipping what it already did.
+    """
+    if not IDEMPOTENCY_ENABLED:
+        return None, None
+    key = idempotency_key(event, extract_instance_id(event))
+    if key is None:
+        return None, None
+    previous = idempotency_store.begin(key)
+    if previous is not None:
+        log_json(
+            logger,
+            "info",
+            "Resuming partly processed event"
+            if previous.get("status") == STATUS_PARTIAL
+            else "Duplicate event skipped",
+            {"idempotency_key": key, "previous_status": previous.get("status")},
+        )
+    return key, previous
+
+
+def _done(previous: Optional[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Instances an earlier, partly processed delivery already stored."""
+    if previous is None or previous.get("status") != STATUS_PARTIAL:
+        return {}
+    return dict((previous.get("result") or {}).get("remediations") or {})
+
+
+def _give_up(key: Optional[str], stored: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Let a failed event be retried: keep the instances whose incidents are
+    stored for the retry to skip, or forget the claim when there are none.
+    """
+    if key is None:
+        return
+    if stored:
+        idempotency_store.checkpoint(key, {"remediations": stored})
+    else:
+        idempotency_store.release(key)
+
+
+def _remediations(response_body: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Instance id -> remediation result of a multi-instance response."""
+    return dict(
+        zip(response_body.get("instance_ids") or [], response_body.get("remediations") or [])
     )
 
-    # Step 4 — Execute remediation logic based on event type
-    remediation_result = run_remediation(event_type, parsed_event)
+
+def _process_record(
+    record: Dict[str, Any], writer: IncidentBatchWriter
+) -> Dict[str, Any]:
+    identifier = record.get("messageId") or record.get("Sns", {}).get("MessageId", "")
+    key = None
+    done: Dict[str, Dict[str, Any]] = {}
+    try:
+        identifier, event = unwrap_record(record)
+        key, previous = _claim_event(event)
+        done = _done(previous)
+        if previous is not None and previous.get("status") != STATUS_PARTIAL:
+            # A delivery still in progress elsewhere goes back to the queue;
+            # its retry will find the completed result.
+            completed = previous.get("status") == STATUS_COMPLETED
+            return {
+                "itemIdentifier": identifier,
+                "status": "DUPLICATE" if completed else "FAILED",
+                "incident_keys": [],
+            }
+        response_body, saved_items = process_event(event, writer, done)
+        return {
+            "itemIdentifier": identifier,
+            "status": "SUCCESS",
+            "incident_keys": [incident_key(i) for i in saved_items],
+            "incident_instances": {incident_key(i): i.get("instance_id") for i in saved_items},
+            "done": done,
+            "idempotency_key": key,
+            "response": response_body,
+        }
+    except Exception as e:
+        _give_up(key, done)
+        log_json(
+            logger,
+            "error",
+            "Failed to process batch record",
+            {"item_identifier": identifier, "error": str(e)},
+        )
+        return {"itemIdentifier": identifier, "status": "FAILED", "error": str(e)}
+
+
+def handle_batch(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Process an SQS/SNS `Records` batch on a bounded worker pool.
+
+    EC2 remediation calls from concurrent records are coalesced into
+    multi-instance requests, and incidents are collected in one
+    IncidentBatchWriter and flushed with one batch put (BatchWriteItem on
+    DynamoDB) at the end. Returns the partial batch response format,
+    so with ReportBatchItemFailures enabled on the SQS event source mapping
+    only the failed messages (processing or persistence) go back to the
+    queue.
+    """
+    with metrics_scope(Handler="Batch") as metrics:
+        return _handle_batch(event, metrics)
+
+
+def _handle_batch(event: Dict[str, Any], metrics: MetricsContext) -> Dict[str, Any]:
+    records: List[Dict[str, Any]] = event["Records"]
+    workers = max(1, min(BATCH_MAX_WORKERS, len(records)))
+
+    # Per-event metrics go to each event's own scope; the idempotency and
+    # BatchWriteItem calls around them to this invocation's.
+    with IncidentBatchWriter() as writer, ec2_batching():
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            process = bind_scope(lambda r: _process_record(r, writer))
+            outcomes = list(pool.map(process, records))
+
+    failures = []
+    for o in outcomes:
+        if o["status"] == "DUPLICATE":
+            continue
+        persisted = o["status"] == "SUCCESS" and all(
+            writer.outcomes.get(k, {}).get("status") == "SUCCESS" for k in o["incident_keys"]
+        )
+        # Only mark an event done once its incidents are stored, so a retried
+        # message re-runs instead of replaying a result that was never saved;
+        # the retry skips the instances whose incidents were.
+        if o.get("idempotency_key") is not None:
+            if persisted:
+                idempotency_store.complete(o["idempotency_key"], o["response"])
+            else:
+                stored = dict(o.get("done") or {})
+                if o["status"] == "SUCCESS":
+                    remediations = _remediations(o["response"])
+                    stored.update(
+                        (instance_id, remediations[instance_id])
+                        for k, instance_id in o["incident_instances"].items()
+                        if instance_id in remediations
+                        and writer.outcomes.get(k, {}).get("status") == "SUCCESS"
+                    )
+                _give_up(o["idempotency_key"], stored)
+        if not persisted:
+            failures.append({"itemIdentifier": o["itemIdentifier"]})
+
+    duplicates = sum(1 for o in outcomes if o["status"] == "DUPLICATE")
+    metrics.count("Records", len(records))
+    metrics.count("FailedRecords", len(failures))
+    metrics.count("DuplicateRecords", duplicates)
     log_json(
         logger,
         "info",
-        "Remediation executed",
+        "Batch execution completed",
         {
-            "step": 4,
-            "event_type": str(event_type),
-            "remediation_result": remediation_result,
+            "records": len(records),
+            "failed": len(failures),
+            "duplicates": duplicates,
+            "workers": workers,
         },
     )
 
-    # Step 5 — Persist incident result into DynamoDB
-    saved_item = put_incident(
-        event_type=event_type,
-        instance_id=parsed_event.get("instance_id"),
-        remediation=remediation_result,
-        raw_event=parsed_event.get("raw"),
-    )
-    log_json(
-        logger,
-        "info",
-        "Incident stored in DynamoDB",
-        {"step": 5, "saved_item": saved_item},
-    )
+    return {"batchItemFailures": failures}
 
-    # Step 6 — Construct API/Lambda response
-    response_body = {
-        "event_type": str(event_type),
-        "remediation": remediation_result,
-    }
 
-    log_json(
-        logger,
-        "info",
-        "Lambda execution completed successfully",
-        {"step": 6, "response_body": response_body},
-    )
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Main entry point for the Auto-Remediation Lambda.
+
+    Accepts either a single alarm event (EventBridge / direct invoke) or an
+    SQS/SNS batch with `Records[]`; batches return `batchItemFailures`.
+    Repeated deliveries of an event already processed return the stored
+    response without remediating or writing an incident again. A
+    multi-instance event whose incidents were only partly stored is
+    retried for the remaining instances only.
+    """
+    if is_batch_event(event):
+        return handle_batch(event)
+
+    with metrics_scope(Handler="Event"):
+        return _handle_event(event)
+
+
+def _handle_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    key, previous = _claim_event(event)
+    if previous is not None and previous.get("status") != STATUS_PARTIAL:
+        response_body = dict(previous.get("result") or {}, duplicate=True)
+        if previous.get("status") != STATUS_COMPLETED:
+            response_body["status"] = previous.get("status")
+        return {
+            "statusCode": 200,
+            "body": json.dumps(response_body),
+        }
+
+    done = _done(previous)
+    try:
+        response_body, _ = process_event(event, done=done)
+    except IncidentsNotStored as e:
+        _give_up(key, e.stored)
+        raise
+    except Exception:
+        _give_up(key, done)
+        raise
+    if key is not None:
+        idempotency_store.complete(key, response_body)
 
     return {
         "statusCode": 200,
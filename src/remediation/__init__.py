@@ -1,25 +1,64 @@
-from typing import Any, Dict
+import importlib
+import threading
+from typing import Any, Callable, Dict, Optional
 
-from . import ec2_high_cpu
-from . import ec2_status_check
-from . import ec2_unexpected_stop
+from ..utils.logging_utils import get_logger, log_json
 
+logger = get_logger(__name__)
 
-def run_remediation(event_type: str, parsed_event: Dict[str, Any]) -> Dict[str, Any]:
+Handler = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+# Built-in event type -> remediation module in this package. Modules are
+# imported only when their event type first fires, keeping cold starts cheap.
+REMEDIATION_MODULES = {
+    "EC2_HIGH_CPU": "ec2_high_cpu",
+    "EC2_STATUS_CHECK_FAILED": "ec2_status_check",
+    "EC2_UNEXPECTED_STOP": "ec2_unexpected_stop",
+}
+
+_handlers: Dict[str, Handler] = {}
+_lock = threading.Lock()
+
+
+def register_handler(event_type: str, handler: Handler) -> None:
+    """Register (or replace) the remediation handler for an event type."""
+    with _lock:
+        _handlers[event_type] = handler
+
+
+def remediation_handler(event_type: str) -> Callable[[Handler], Handler]:
+    """Decorator form of `register_handler`."""
 
-    if event_type == "EC2_HIGH_CPU":
+    def decorator(handler: Handler) -> Handler:
+        register_handler(event_type, handler)
+        return handler
 
-        return ec2_high_cpu.handle(parsed_event)
+    return decorator
 
-    if event_type == "EC2_STATUS_CHECK_FAILED":
 
-        return ec2_status_check.handle(parsed_event)
+def get_handler(event_type: str) -> Optional[Handler]:
+    handler = _handlers.get(event_type)
+    if handler is not None:
+        return handler
+
+    module_name = REMEDIATION_MODULES.get(event_type)
+    if module_name is None:
+        return None
+
+    module = importlib.import_module("." + module_name, __name__)
+    with _lock:
+        return _handlers.setdefault(event_type, module.handle)
+
+
+def run_remediation(event_type: str, parsed_event: Dict[str, Any]) -> Dict[str, Any]:
+
+    handler = get_handler(event_type)
 
-    if event_type == "EC2_UNEXPECTED_STOP":
+    if handler is not None:
 
-        return ec2_unexpected_stop.handle(parsed_event)
+        return handler(parsed_event)
 
-    print("[Remediation] No remediation rule for event type:", event_type)
+    log_json(logger, "info", "No remediation rule for event type", {"event_type": event_type})
     return {
         "remediation_type": "UNKNOWN",
         "action": "SKIP",
@@ -0,0 +1,318 @@
+import re
+import threading
+import contextvars
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from ..utils.aws_clients import AWS_REGION, get_client
+from ..utils.config import (
+    EC2_BATCH_MAX_INSTANCES,
+    EC2_BATCH_WINDOW_SECONDS,
+    RATE_LIMIT_ENABLED,
+)
+from ..utils.metrics import bind_scope
+from ..utils.resilience import DRY_RUN, CircuitOpenError, classify_error, error_code
+from .permission_cache import permission_cache, resource_scope
+from .rate_limit import RateLimitExceeded, ec2_api_bucket, instance_limiter
+
+# Remediation action -> EC2 API operation. Both accept many InstanceIds.
+EC2_OPERATIONS = {
+    "reboot": "reboot_instances",
+    "start": "start_instances",
+}
+
+# Error codes that concern a single instance. When a multi-instance call
+# fails with one of these, the instances named in the error message are
+# failed and the rest of the group is retried, so one bad instance does not
+# fail every incident in the batch.
+_INSTANCE_ID_RE = re.compile(r"\bi-[0-9a-zA-Z]+\b")
+_INSTANCE_ERROR_PREFIXES = (
+    "InvalidInstanceID",
+    "IncorrectInstanceState",
+    "IncorrectState",
+    "UnsupportedOperation",
+    "InsufficientInstanceCapacity",
+)
+
+
+def _invoke(
+    operation: Callable[..., Any], instance_ids: List[str], dry_run: bool
+) -> Tuple[Dict[str, Any], Optional[str], str]:
+    """
+    Call `operation`; return (response, error code or None, error message).
+    Rate limit and open-circuit errors propagate, failing the record so it
+    is retried later.
+    """
+    try:
+        return operation(InstanceIds=instance_ids, DryRun=dry_run), None, ""
+    except (RateLimitExceeded, CircuitOpenError):
+        raise
+    except Exception as e:
+        if dry_run and classify_error(e) == DRY_RUN:
+            return {}, None, ""
+        return {}, error_code(e), str(e)
+
+
+def _split_per_instance(code: Optional[str], instance_ids: List[str]) -> bool:
+    return len(instance_ids) > 1 and bool(code) and code.startswith(_INSTANCE_ERROR_PREFIXES)
+
+
+def _isolate(
+    operation: Callable[..., Any],
+    instance_ids: List[str],
+    dry_run_only: bool,
+    dry_run: bool,
+    code: str,
+    message: str,
+) -> Dict[str, Dict[str, Any]]:
+    """Fail the instances an error names and retry the others as a group."""
+    status = "FAILED_DRY_RUN" if dry_run else "FAILED"
+    named = [i for i in dict.fromkeys(_INSTANCE_ID_RE.findall(message)) if i in instance_ids]
+    if not named:
+        # Nothing to pin the error on: fall back to one call per instance.
+        results: Dict[str, Dict[str, Any]] = {}
+        for i in instance_ids:
+            results.update(_run_group(operation, [i], dry_run_only, dry_run))
+        return results
+
+    results = {i: {"status": status, "error_code": code, "error": message} for i in named}
+    rest = [i for i in instance_ids if i not in results]
+    if rest:
+        results.update(_run_group(operation, rest, dry_run_only, dry_run))
+    return results
+
+
+def _run_group(
+    operation: Callable[..., Any],
+    instance_ids: List[str],
+    dry_run_only: bool,
+    dry_run: bool = True,
+) -> Dict[str, Dict[str, Any]]:
+    if dry_run:
+        _, code, message = _invoke(operation, instance_ids, True)
+        if code is not None:
+            if _split_per_instance(code, instance_ids):
+                return _isolate(operation, instance_ids, dry_run_only, True, code, message)
+            return {
+                i: {"status": "FAILED_DRY_RUN", "error_code": code, "error": message}
+                for i in instance_ids
+            }
+
+    if dry_run_only:
+        return {i: {"status": "DRY_RUN_OK"} for i in instance_ids}
+
+    response, code, message = _invoke(operation, instance_ids, False)
+    if code is not None:
+        if _split_per_instance(code, instance_ids):
+            return _isolate(operation, instance_ids, dry_run_only, False, code, message)
+        return {
+            i: {"status": "FAILED", "error_code": code, "error": message}
+            for i in instance_ids
+        }
+
+    states = {
+        s.get("InstanceId"): (s.get("CurrentState") or {}).get("Name")
+        for s in response.get("StartingInstances", [])
+    }
+    return {i: {"status": "SUCCESS", "state": states.get(i)} for i in instance_ids}
+
+
+def run_ec2_action(
+    action: str,
+    instance_ids: List[str],
+    region: Optional[str] = None,
+    dry_run_only: bool = False,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Run one EC2 action for many instances: one DryRun call, then (unless
+    `dry_run_only`) one real call. Returns a result per instance id with a
+    `status` of SUCCESS, DRY_RUN_OK, FAILED_DRY_RUN or FAILED.
+
+    When a real call follows and every instance's permission probe is
+    cached, the DryRun is skipped. With `dry_run_only` the DryRun is the
+    action itself, so it is made every time on purpose: the cache is only
+    read before real actions (DRY_RUN_ONLY=false). An UnauthorizedOperation
+    from any call drops the cached probe.
+
+    Every call takes a token from the account and region's EC2 API
+    bucket; RateLimitExceeded is raised when none comes in time.
+    """
+    ids = list(dict.fromkeys(instance_ids))
+    region = region or AWS_REGION
+    call = getattr(get_client("ec2", region), EC2_OPERATIONS[action])
+
+    def operation(**kwargs: Any) -> Any:
+        if RATE_LIMIT_ENABLED:
+            ec2_api_bucket.acquire(region)
+        return call(**kwargs)
+
+    probe = dry_run_only or not all(
+        permission_cache.is_allowed(action, region, resource_scope(i)) for i in ids
+    )
+    results = _run_group(operation, ids, dry_run_only, dry_run=probe)
+
+    for instance_id, result in results.items():
+        scope = resource_scope(instance_id)
+        if result["status"] in ("SUCCESS", "DRY_RUN_OK"):
+            permission_cache.record_allowed(action, region, scope)
+        elif result.get("error_code") == "UnauthorizedOperation":
+            permission_cache.invalidate(action, region, scope)
+
+    return results
+
+
+class EC2ActionBatcher:
+    """
+    Coalesce EC2 actions submitted from concurrent workers.
+
+    Submissions are grouped by (action, region, dry-run mode). A group is
+    sent as one multi-instance request when it reaches `max_instances` or
+    `window_seconds` after its first submission, whichever comes first;
+    each submitter gets a Future resolving to its own instance's result.
+    """
+
+    def __init__(
+        self,
+        window_seconds: Optional[float] = None,
+        max_instances: Optional[int] = None,
+    ):
+        self.window_seconds = (
+            EC2_BATCH_WINDOW_SECONDS if window_seconds is None else window_seconds
+        )
+        self.max_instances = max(
+            1, EC2_BATCH_MAX_INSTANCES if max_instances is None else max_instances
+        )
+        self._groups: Dict[Tuple[str, str, bool], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        action: str,
+        instance_id: str,
+        region: Optional[str] = None,
+        dry_run_only: bool = False,
+    ) -> "Future[Dict[str, Any]]":
+        if action not in EC2_OPERATIONS:
+            raise ValueError(f"Unsupported EC2 action: {action}")
+
+        key = (action, region or AWS_REGION, dry_run_only)
+        future: "Future[Dict[str, Any]]" = Future()
+        ready = None
+
+        with self._lock:
+            group = self._groups.get(key)
+            if group is None:
+                group = {"entries": [], "timer": None}
+                self._groups[key] = group
+            group["entries"].append((instance_id, future))
+
+            if len(group["entries"]) >= self.max_instances:
+                ready = self._groups.pop(key)
+            elif group["timer"] is None:
+                # The call is timed in the metrics of the event that opened
+                # the group.
+                timer = threading.Timer(
+                    self.window_seconds, bind_scope(self._flush_group), (key, group)
+                )
+                timer.daemon = True
+                group["timer"] = timer
+                timer.start()
+
+        if ready is not None:
+            self._execute(key, ready)
+        return future
+
+    def flush(self) -> None:
+        """Send every pending group now."""
+        with self._lock:
+            groups, self._groups = self._groups, {}
+        for key, group in groups.items():
+            self._execute(key, group)
+
+    def _flush_group(self, key: Tuple[str, str, bool], group: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._groups.get(key) is not group:
+                return  # already sent because it filled up, or by flush()
+            del self._groups[key]
+        self._execute(key, group)
+
+    def _execute(self, key: Tuple[str, str, bool], group: Dict[str, Any]) -> None:
+        if group["timer"] is not None:
+            group["timer"].cancel()
+        action, region, dry_run_only = key
+        entries = group["entries"]
+        try:
+            results = run_ec2_action(
+                action, [i for i, _ in entries], region, dry_run_only
+            )
+        except Exception as e:
+            for _, future in entries:
+                future.set_exception(e)
+            return
+        for instance_id, future in entries:
+            future.set_result(results[instance_id])
+
+
+# The batcher of the innermost open `batching()` block. A context variable,
+# so concurrent handlers in one process each see their own; worker threads
+# started with `bind_scope` inherit it.
+_active_batcher: "contextvars.ContextVar[Optional[EC2ActionBatcher]]" = (
+    contextvars.ContextVar("ec2_batcher", default=None)
+)
+
+
+@contextmanager
+def batching(
+    window_seconds: Optional[float] = None,
+    max_instances: Optional[int] = None,
+) -> Iterator[EC2ActionBatcher]:
+    """Coalesce every `execute_ec2_action` call made inside the block."""
+    batcher = EC2ActionBatcher(window_seconds, max_instances)
+    token = _active_batcher.set(batcher)
+    try:
+        yield batcher
+    finally:
+        batcher.flush()
+        _active_batcher.reset(token)
+
+
+def execute_ec2_action(
+    action: str,
+    instance_id: str,
+    region: Optional[str] = None,
+    dry_run_only: bool = False,
+) -> Dict[str, Any]:
+    """
+    Run an EC2 action for one instance, through the active batcher when a
+    `batching()` block is open, otherwise as a direct call.
+
+    Real actions over the instance's limit (INSTANCE_ACTION_LIMIT per
+    INSTANCE_ACTION_WINDOW_SECONDS) are not sent and return status
+    RATE_LIMITED; DryRun-only ones change nothing and are not counted,
+    though their calls still take EC2 API bucket tokens. An action whose
+    call is refused by the EC2 API bucket or an open circuit gets its slot
+    back before the error propagates, so the event's retry is not
+    suppressed by it.
+    """
+    decision = None
+    if RATE_LIMIT_ENABLED and not dry_run_only:
+        decision = instance_limiter.acquire(action, instance_id)
+        if not decision["allowed"]:
+            return {
+                "status": "RATE_LIMITED",
+                "error": (
+                    f"{action} of {instance_id} suppressed: {decision['count']} in the last "
+                    f"{decision['window_seconds']}s (limit {decision['limit']})"
+                ),
+            }
+
+    batcher = _active_batcher.get()
+    try:
+        if batcher is None:
+            return run_ec2_action(action, [instance_id], region, dry_run_only)[instance_id]
+        return batcher.submit(action, instance_id, region, dry_run_only).result()
+    except (RateLimitExceeded, CircuitOpenError):
+        if decision is not None:
+            instance_limiter.refund(action, instance_id, decision)
+        raise
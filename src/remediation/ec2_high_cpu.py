@@ -1,11 +1,13 @@
-import logging
 from typing import Any, Dict
 
+from ..utils.logging_utils import get_logger, log_json
+
+logger = get_logger(__name__)
 
-def handle(parsed_event: Dict[str, Any]) -> Dict[str, Any]:
-    print("[Remediation] High CPU remediation started")
 
+def handle(parsed_event: Dict[str, Any]) -> Dict[str, Any]:
     instance_id = parsed_event.get("instance_id")
+    log_json(logger, "info", "High CPU remediation started", {"instance_id": instance_id})
 
     return {
         "remediation_type": "EC2_HIGH_CPU",
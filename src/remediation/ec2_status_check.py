@@ -1,45 +1,67 @@
-import os
 from typing import Any, Dict
-from src.utils.aws_clients import get_ec2_client
 
+from ..utils.config import DRY_RUN_ONLY
+from ..utils.logging_utils import get_logger, log_json
+from .ec2_batcher import execute_ec2_action
 
-DRY_RUN_ONLY = os.getenv("DRY_RUN_ONLY", "true").lower() == "true"
+logger = get_logger(__name__)
 
 
 def handle(parsed_event: Dict[str, Any]) -> Dict[str, Any]:
 
-    print("[Remediation] StatusCheckFailed remediation started")
+    log_json(logger, "info", "StatusCheckFailed remediation started")
 
     instance_id = parsed_event.get("instance_id")
 
     if not instance_id:
-        print("[Remediation] No instance ID found.")
+        log_json(logger, "warning", "No instance ID found")
         return {
             "remediation_type": "EC2_STATUS_CHECK_FAILED",
             "action": "SKIP",
             "message": "No instance ID found in event",
         }
 
-    # get EC2 client
-    ec2 = get_ec2_client()
-
     # 执行重启前打印安全日志
-    print("[Remediation] Attempting to reboot instance:", instance_id)
-
-    try:
-        # ⭐ 安全保护：DryRun 先尝试，如果没权限 / 无效会抛 DryRunOperation
-        ec2.reboot_instances(InstanceIds=[instance_id], DryRun=True)
-    except Exception as e:
-        if "DryRunOperation" not in str(e):
-            print("[Remediation] DryRun failed:", str(e))
-            return {
-                "remediation_type": "EC2_STATUS_CHECK_FAILED",
-                "action": "FAILED_DRY_RUN",
-                "message": str(e),
-            }
-
-    if DRY_RUN_ONLY:
-        print("[Remediation] DRY_RUN_ONLY=true, skip real reboot.")
+    log_json(logger, "info", "Attempting to reboot instance", {"instance_id": instance_id})
+
+    # ⭐ 安全保护：DryRun 先尝试，如果没权限 / 无效会失败。
+    # In batch invocations the call is coalesced with other instances'.
+    result = execute_ec2_action("reboot", instance_id, dry_run_only=DRY_RUN_ONLY)
+
+    if result["status"] == "RATE_LIMITED":
+        log_json(
+            logger,
+            "warning",
+            "Reboot suppressed by rate limit",
+            {"instance_id": instance_id, "error": result["error"]},
+        )
+        return {
+            "remediation_type": "EC2_STATUS_CHECK_FAILED",
+            "instance_id": instance_id,
+            "action": "SUPPRESSED",
+            "message": result["error"],
+        }
+
+    if result["status"] == "FAILED_DRY_RUN":
+        log_json(
+            logger,
+            "warning",
+            "DryRun failed",
+            {"instance_id": instance_id, "error": result["error"]},
+        )
+        return {
+            "remediation_type": "EC2_STATUS_CHECK_FAILED",
+            "action": "FAILED_DRY_RUN",
+            "message": result["error"],
+        }
+
+    if result["status"] == "DRY_RUN_OK":
+        log_json(
+            logger,
+            "info",
+            "DRY_RUN_ONLY=true, skip real reboot",
+            {"instance_id": instance_id},
+        )
         return {
             "remediation_type": "EC2_STATUS_CHECK_FAILED",
             "instance_id": instance_id,
@@ -47,10 +69,21 @@ def handle(parsed_event: Dict[str, Any]) -> Dict[str, Any]:
             "message": "DryRun succeeded; real reboot skipped because DRY_RUN_ONLY=true",
         }
 
-    # ⭐ DryRun 成功，说明权限OK，可以安全执行重启
-    ec2.reboot_instances(InstanceIds=[instance_id], DryRun=False)
+    if result["status"] == "FAILED":
+        log_json(
+            logger,
+            "error",
+            "Reboot failed",
+            {"instance_id": instance_id, "error": result["error"]},
+        )
+        return {
+            "remediation_type": "EC2_STATUS_CHECK_FAILED",
+            "instance_id": instance_id,
+            "action": "FAILED",
+            "message": result["error"],
+        }
 
-    print("[Remediation] Reboot executed for:", instance_id)
+    log_json(logger, "info", "Reboot executed", {"instance_id": instance_id})
 
     return {
         "remediation_type": "EC2_STATUS_CHECK_FAILED",
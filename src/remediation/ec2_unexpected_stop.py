@@ -1,19 +1,44 @@
-import logging
 from typing import Dict, Any
-from ..utils.aws_clients import get_ec2_client
+
+from ..utils.config import DRY_RUN_ONLY
+from ..utils.logging_utils import get_logger, log_json
+from .ec2_batcher import execute_ec2_action
+
+logger = get_logger(__name__)
 
 
 def handle(parsed_event: Dict[str, Any]) -> Dict[str, Any]:
-    print("[Remediation] Unexpected Stop remediation started")
+    log_json(logger, "info", "Unexpected Stop remediation started")
 
     instance_id = parsed_event.get("instance_id")
-    ec2 = get_ec2_client()
 
-    try:
-        print("[DryRun] Attempting to start instance: " + str(instance_id))
+    if not instance_id:
+        return {
+            "remediation_type": "EC2_UNEXPECTED_STOP",
+            "action": "SKIP",
+            "message": "No instance ID found in event",
+        }
+
+    log_json(logger, "info", "Attempting to start instance", {"instance_id": instance_id})
 
-        ec2.start_instances(InstanceIds=[instance_id], DryRun=True)
+    # In batch invocations the call is coalesced with other instances'.
+    result = execute_ec2_action("start", instance_id, dry_run_only=DRY_RUN_ONLY)
 
+    if result["status"] == "RATE_LIMITED":
+        log_json(
+            logger,
+            "warning",
+            "Start suppressed by rate limit",
+            {"instance_id": instance_id, "error": result["error"]},
+        )
+        return {
+            "remediation_type": "EC2_UNEXPECTED_STOP",
+            "instance_id": instance_id,
+            "action": "SUPPRESSED",
+            "message": result["error"],
+        }
+
+    if result["status"] == "DRY_RUN_OK":
         return {
             "remediation_type": "EC2_UNEXPECTED_STOP",
             "instance_id": instance_id,
@@ -23,10 +48,21 @@ def handle(parsed_event: Dict[str, Any]) -> Dict[str, Any]:
             + " would be started",
         }
 
-    except Exception as e:
+    if result["status"] == "SUCCESS":
         return {
             "remediation_type": "EC2_UNEXPECTED_STOP",
             "instance_id": instance_id,
-            "action": "FAILED",
-            "message": str(e),
+            "action": "STARTED",
+            "message": "Instance "
+            + str(instance_id)
+            + " started (state: "
+            + str(result.get("state"))
+            + ")",
         }
+
+    return {
+        "remediation_type": "EC2_UNEXPECTED_STOP",
+        "instance_id": instance_id,
+        "action": "FAILED",
+        "message": result["error"],
+    }
@@ -0,0 +1,71 @@
+import time
+import threading
+from typing import Dict, Optional, Tuple
+
+from ..utils.config import PERMISSION_CACHE_SCOPE, PERMISSION_CACHE_TTL_SECONDS
+
+CacheKey = Tuple[str, str, str]
+
+
+class PermissionProbeCache:
+    """
+    Remember which (action, region, resource scope) combinations recently
+    passed an EC2 DryRun permission probe.
+
+    Entries expire after `ttl_seconds` and are dropped as soon as a real
+    call reports UnauthorizedOperation. Only successful probes are cached,
+    so a permission that gets granted is picked up on the next call.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        self.ttl_seconds = (
+            PERMISSION_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        )
+        self._expiry: Dict[CacheKey, float] = {}
+        self._lock = threading.Lock()
+
+    def is_allowed(self, action: str, region: str, scope: str) -> bool:
+        key = (action, region, scope)
+        expiry = self._expiry.get(key)
+        if expiry is None:
+            return False
+        if expiry <= time.monotonic():
+            with self._lock:
+                if self._expiry.get(key) == expiry:
+                    del self._expiry[key]
+            return False
+        return True
+
+    def record_allowed(self, action: str, region: str, scope: str) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._expiry[(action, region, scope)] = time.monotonic() + self.ttl_seconds
+
+    def invalidate(self, action: str, region: str, scope: Optional[str] = None) -> None:
+        """Drop one scope, or every scope of (action, region) when scope is None."""
+        with self._lock:
+            if scope is not None:
+                self._expiry.pop((action, region, scope), None)
+                return
+            for key in [k for k in self._expiry if k[:2] == (action, region)]:
+                del self._expiry[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._expiry.clear()
+
+
+def resource_scope(instance_id: str) -> str:
+    """
+    Scope a probe result applies to. With PERMISSION_CACHE_SCOPE=instance
+    each instance is probed separately (for IAM policies conditioned on
+    resource ARNs or tags); otherwise one probe covers the whole region.
+    """
+    if PERMISSION_CACHE_SCOPE == "instance":
+        return instance_id
+    return "*"
+
+
+# Module-level so results survive across warm invocations of the container.
+permission_cache = PermissionProbeCache()
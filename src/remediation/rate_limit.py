@@ -0,0 +1,394 @@
+import math
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from ..utils.aws_clients import get_dynamodb_table
+from ..utils.config import (
+    AWS_ACCOUNT_ID,
+    EC2_API_BURST,
+    EC2_API_MAX_WAIT_SECONDS,
+    EC2_API_RATE_PER_SECOND,
+    EC2_API_TOKEN_LEASE,
+    INSTANCE_ACTION_LIMIT,
+    INSTANCE_ACTION_WINDOW_SECONDS,
+    RATE_LIMIT_CACHE_SIZE,
+    RATE_LIMIT_TABLE_NAME,
+)
+from ..utils.logging_utils import get_logger, log_json
+from ..utils.metrics import count, span
+from ..utils.resilience import CONFLICT, classify_error
+
+logger = get_logger(__name__)
+
+# Counter items live in their own partitions of the rate-limit table.
+RATE_LIMIT_PREFIX = "RATELIMIT#"
+
+_UNSET = object()
+
+
+class RateLimitExceeded(Exception):
+    """No EC2 API token became available within the allowed wait."""
+
+
+def _table(name: str):
+    return get_dynamodb_table(name) if name else None
+
+
+def _store_error(operation: str, key: Any, error: Exception) -> None:
+    log_json(
+        logger,
+        "warning",
+        "Rate limit store unavailable; limiting this container only",
+        {"operation": operation, "key": str(key), "error": str(error)},
+    )
+
+
+class InstanceActionLimiter:
+    """
+    At most `limit` remediation actions of one kind per instance in any
+    `window_seconds` (a sliding window).
+
+    The window is approximated with two fixed windows: the current one's
+    count plus the previous one's, weighted by how much of it the sliding
+    window still covers. Each window's count is one item in the table,
+    incremented with an atomic ADD conditional on staying under the
+    limit, so containers racing on the same instance cannot exceed it
+    together.
+
+    The warm container caches closed windows' counts and a lower bound on
+    the current one, so instances already at their limit are suppressed
+    without a DynamoDB call. Without a table, or while it fails, the
+    container counts on its own.
+    """
+
+    def __init__(
+        self,
+        limit: Optional[int] = None,
+        window_seconds: Optional[int] = None,
+        table: Any = _UNSET,
+        cache_size: Optional[int] = None,
+    ):
+        self.limit = INSTANCE_ACTION_LIMIT if limit is None else limit
+        self.window_seconds = max(
+            1, INSTANCE_ACTION_WINDOW_SECONDS if window_seconds is None else window_seconds
+        )
+        self.cache_size = RATE_LIMIT_CACHE_SIZE if cache_size is None else cache_size
+        self._table = table
+        self._counts: "OrderedDict[Tuple[str, str, int], int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def table(self):
+        if self._table is _UNSET:
+            self._table = _table(RATE_LIMIT_TABLE_NAME)
+        return self._table
+
+    def _cached(self, key: Tuple[str, str, int]) -> Optional[int]:
+        with self._lock:
+            value = self._counts.get(key)
+            if value is not None:
+                self._counts.move_to_end(key)
+            return value
+
+    def _remember(self, key: Tuple[str, str, int], value: int) -> None:
+        with self._lock:
+            self._counts[key] = max(value, self._counts.get(key, 0))
+            self._counts.move_to_end(key)
+            while len(self._counts) > max(1, self.cache_size):
+                self._counts.popitem(last=False)
+
+    @staticmethod
+    def _item_key(action: str, instance_id: str, window: int) -> Dict[str, str]:
+        return {"pk": f"{RATE_LIMIT_PREFIX}{action}#{instance_id}", "sk": f"WINDOW#{window}"}
+
+    def _previous_count(self, action: str, instance_id: str, window: int) -> int:
+        key = (action, instance_id, window)
+        cached = self._cached(key)
+        if cached is not None or self.table is None:
+            return cached or 0
+        try:
+            item = self.table.get_item(Key=self._item_key(action, instance_id, window)).get("Item")
+        except Exception as e:
+            _store_error("read", key, e)
+            return 0
+        # The window is closed, so its count no longer changes.
+        value = int(item.get("count", 0)) if item else 0
+        self._remember(key, value)
+        return value
+
+    def _increment(self, action: str, instance_id: str, window: int, threshold: int) -> Optional[int]:
+        """The window's new count, or None when it is not below `threshold`."""
+        key = (action, instance_id, window)
+        if self.table is not None:
+            from boto3.dynamodb.conditions import Attr
+
+            try:
+                response = self.table.update_item(
+                    Key=self._item_key(action, instance_id, window),
+                    UpdateExpression="SET #expires = :expires ADD #count :one",
+                    ExpressionAttributeNames={"#count": "count", "#expires": "expires_at"},
+                    ExpressionAttributeValues={
+                        ":one": 1,
+                        ":expires": (window + 2) * self.window_seconds,
+                    },
+                    ConditionExpression=Attr("count").not_exists()
+                    | Attr("count").lt(threshold),
+                    ReturnValues="UPDATED_NEW",
+                )
+                value = int(response["Attributes"]["count"])
+                self._remember(key, value)
+                return value
+            except Exception as e:
+                if classify_error(e) == CONFLICT:
+                    self._remember(key, threshold)
+                    return None
+                _store_error("increment", key, e)
+
+        with self._lock:
+            value = self._counts.get(key, 0)
+            if value >= threshold:
+                return None
+            self._counts[key] = value + 1
+        self._remember(key, value + 1)
+        return value + 1
+
+    def acquire(self, action: str, instance_id: str, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Count one `action` on `instance_id` if it is within the limit.
+        Returns {"allowed", "count", "limit", "window_seconds", "window"};
+        `count` is the (estimated) number of actions in the sliding window,
+        including this one when allowed, and `window` the fixed window it
+        was counted in (None when nothing was counted).
+        """
+        decision: Dict[str, Any] = {
+            "allowed": True,
+            "count": 0,
+            "limit": self.limit,
+            "window_seconds": self.window_seconds,
+            "window": None,
+        }
+        if self.limit <= 0:
+            return decision
+
+        now = time.time() if now is None else now
+        window = int(now // self.window_seconds)
+        overlap = 1 - (now % self.window_seconds) / self.window_seconds
+        carried = self._previous_count(action, instance_id, window - 1) * overlap
+        # Allowed while this action keeps the estimate within the limit.
+        threshold = math.floor(self.limit - carried + 1e-9)
+
+        known = self._cached((action, instance_id, window)) or 0
+        current = None if known >= threshold else self._increment(action, instance_id, window, threshold)
+        if current is None:
+            count("RateLimited.Instance")
+            current = self._cached((action, instance_id, window)) or 0
+            decision["allowed"] = False
+        else:
+            decision["window"] = window
+        decision["count"] = math.floor(current + carried)
+        return decision
+
+    def refund(self, action: str, instance_id: str, decision: Dict[str, Any]) -> None:
+        """
+        Give back the slot an allowed `acquire` counted, for an action that
+        was never sent (its EC2 call was throttled or its circuit open), so
+        the retry of the event is not charged twice.
+        """
+        window = decision.get("window")
+        if window is None:
+            return
+        key = (action, instance_id, window)
+        with self._lock:
+            if key in self._counts:
+                self._counts[key] = max(0, self._counts[key] - 1)
+        if self.table is None:
+            return
+        from boto3.dynamodb.conditions import Attr
+
+        try:
+            self.table.update_item(
+                Key=self._item_key(action, instance_id, window),
+                UpdateExpression="ADD #count :minus_one",
+                ConditionExpression=Attr("count").gt(0),
+                ExpressionAttributeNames={"#count": "count"},
+                ExpressionAttributeValues={":minus_one": -1},
+            )
+        except Exception as e:
+            if classify_error(e) != CONFLICT:
+                _store_error("refund", key, e)
+
+    def clear(self) -> None:
+        """Forget cached counts and re-resolve the table on next use."""
+        with self._lock:
+            self._counts.clear()
+            self._table = _UNSET
+
+
+class ApiTokenBucket:
+    """
+    Token bucket on EC2 API calls per (account, region): `rate` calls per
+    second on average, bursts of up to `burst`.
+
+    The bucket is kept as GCRA state, a single "theoretical arrival time"
+    (`tat`, epoch milliseconds) per bucket item: taking n tokens moves it
+    n intervals forward, and is allowed while it stays within `burst`
+    intervals of now. Both cases (bucket partly drained: ADD to tat;
+    bucket full: SET tat from now) are conditional updates, so no read is
+    needed and concurrent containers share one bucket.
+
+    Containers take `lease` tokens per update and spend them locally;
+    leased tokens lapse after the time they represent. Without a table,
+    or while it fails, each container keeps its own bucket.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        lease: Optional[int] = None,
+        max_wait_seconds: Optional[float] = None,
+        table: Any = _UNSET,
+    ):
+        self.rate = EC2_API_RATE_PER_SECOND if rate is None else rate
+        self.burst = max(1, EC2_API_BURST if burst is None else burst)
+        self.lease = max(1, min(self.burst, EC2_API_TOKEN_LEASE if lease is None else lease))
+        self.max_wait_seconds = (
+            EC2_API_MAX_WAIT_SECONDS if max_wait_seconds is None else max_wait_seconds
+        )
+        self._table = table
+        # Per bucket: leased tokens, when they lapse (monotonic), last known
+        # tat, and until when the table is skipped after an error.
+        self._state: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def table(self):
+        if self._table is _UNSET:
+            self._table = _table(RATE_LIMIT_TABLE_NAME)
+        return self._table
+
+    @property
+    def interval_ms(self) -> float:
+        return 1000.0 / self.rate
+
+    def _bucket(self, key: Tuple[str, str]) -> Tuple[threading.Lock, Dict[str, Any]]:
+        with self._lock:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+                self._state[key] = {"tokens": 0, "lapse": 0.0, "tat": 0, "local_until": 0.0}
+            return self._locks[key], self._state[key]
+
+    @staticmethod
+    def _item_key(key: Tuple[str, str]) -> Dict[str, str]:
+        account, region = key
+        return {"pk": f"{RATE_LIMIT_PREFIX}ec2-api#{account}#{region}", "sk": "BUCKET"}
+
+    def _take_shared(self, key: Tuple[str, str], state: Dict[str, Any], n: int, now_ms: int) -> bool:
+        """Take `n` tokens from the table's bucket; raises when the table fails."""
+        from boto3.dynamodb.conditions import Attr
+
+        cost = math.ceil(n * self.interval_ms)
+        tolerance = math.ceil(self.burst * self.interval_ms)
+        expires = now_ms // 1000 + math.ceil(tolerance / 1000) + 3600
+        drained = {
+            "UpdateExpression": "SET #expires = :expires ADD #tat :cost",
+            "ConditionExpression": Attr("tat").gte(now_ms) & Attr("tat").lte(now_ms + tolerance - cost),
+            "ExpressionAttributeValues": {":cost": cost, ":expires": expires},
+        }
+        full = {
+            "UpdateExpression": "SET #tat = :tat, #expires = :expires",
+            "ConditionExpression": Attr("tat").not_exists() | Attr("tat").lt(now_ms),
+            "ExpressionAttributeValues": {":tat": now_ms + cost, ":expires": expires},
+        }
+        # Try the case the last known state points to first.
+        attempts = (drained, full) if state["tat"] >= now_ms else (full, drained)
+        for update in attempts:
+            try:
+                response = self.table.update_item(
+                    Key=self._item_key(key),
+                    ExpressionAttributeNames={"#tat": "tat", "#expires": "expires_at"},
+                    ReturnValues="UPDATED_NEW",
+                    **update,
+                )
+            except Exception as e:
+                if classify_error(e) != CONFLICT:
+                    raise
+                continue
+            state["tat"] = int(response["Attributes"]["tat"])
+            return True
+        state["tat"] = now_ms + tolerance  # at least this drained
+        return False
+
+    def _take_local(self, state: Dict[str, Any], n: int, now_ms: int) -> bool:
+        cost = n * self.interval_ms
+        tat = max(state["tat"], now_ms)
+        if tat + cost - now_ms > self.burst * self.interval_ms:
+            return False
+        state["tat"] = tat + cost
+        return True
+
+    def _take(self, key: Tuple[str, str], state: Dict[str, Any], n: int) -> bool:
+        now_ms = int(time.time() * 1000)
+        if self.table is not None and state["local_until"] <= time.monotonic():
+            try:
+                return self._take_shared(key, state, n, now_ms)
+            except Exception as e:
+                _store_error("take", key, e)
+                state["tat"] = now_ms
+                # Try the table again in a minute.
+                state["local_until"] = time.monotonic() + 60
+        return self._take_local(state, n, now_ms)
+
+    def acquire(self, region: str, account: Optional[str] = None) -> None:
+        """
+        Take one token for an EC2 call in `region`, waiting up to
+        `max_wait_seconds` for one. Raises RateLimitExceeded otherwise.
+        """
+        if self.rate <= 0:
+            return
+        key = (account or AWS_ACCOUNT_ID or "default", region)
+        lock, state = self._bucket(key)
+        deadline = time.monotonic() + self.max_wait_seconds
+
+        if not lock.acquire(timeout=max(0.0, self.max_wait_seconds)):
+            count("RateLimited.EC2Api")
+            raise RateLimitExceeded(f"EC2 API rate limit reached for {key[0]}/{region}")
+        sizes = tuple(dict.fromkeys((self.lease, 1)))
+        try:
+            while True:
+                if state["tokens"] > 0 and state["lapse"] > time.monotonic():
+                    state["tokens"] -= 1
+                    return
+                for n in sizes:
+                    if self._take(key, state, n):
+                        state["tokens"] = n - 1
+                        state["lapse"] = time.monotonic() + n * self.interval_ms / 1000
+                        return
+                # Drained: wait for single tokens to come back.
+                sizes = (1,)
+                wait = self.interval_ms / 1000
+                if time.monotonic() + wait > deadline:
+                    count("RateLimited.EC2Api")
+                    raise RateLimitExceeded(
+                        f"EC2 API rate limit reached for {key[0]}/{region}: "
+                        f"no token within {self.max_wait_seconds}s"
+                    )
+                with span("EC2ApiThrottleWait"):
+                    time.sleep(wait)
+        finally:
+            lock.release()
+
+    def clear(self) -> None:
+        """Drop leased tokens and bucket state and re-resolve the table on next use."""
+        with self._lock:
+            self._state.clear()
+            self._locks.clear()
+            self._table = _UNSET
+
+
+# Module-level so counts and leased tokens survive across warm invocations.
+instance_limiter = InstanceActionLimiter()
+ec2_api_bucket = ApiTokenBucket()
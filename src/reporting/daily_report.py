@@ -1,145 +1,775 @@
-import os
 import sys
+import json
+import heapq
+import queue
+import itertools
 import datetime
+import threading
 import collections
-from typing import List, Dict, Optional
-
-import boto3
-from boto3.dynamodb.conditions import Attr
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Dict, Iterable, Iterator, Optional, Tuple
+
+from ..event_router import get_classifier
+from ..storage.daily_aggregates import (
+    AGGREGATE_KEY,
+    IncidentTally,
+    same_counts,
+    summarize_incidents,
+)
+from ..storage.incident_store import IncidentStore, get_incident_store
+from ..utils.aws_clients import get_dynamodb_table as _get_pooled_table
+from ..utils.config import (
+    INCIDENT_EVENT_TYPES,
+    REPORT_QUERY_WORKERS,
+    REPORT_READ_MODE,
+    REPORT_SCAN_UNKNOWN_PARTITIONS,
+    SCAN_MAX_IN_FLIGHT_PAGES,
+    SCAN_TOTAL_SEGMENTS,
+)
+from ..utils.logging_utils import get_logger, log_json
+from ..utils.metrics import bind_scope
+
+logger = get_logger(__name__)
+
+PARTITION_PREFIX = "INCIDENT#"
+
+# Bump whenever the rendered report changes for the same incidents, so
+# reports published by older code are not mistaken for up to date.
+REPORT_FORMAT_VERSION = "2"
+
+# Formats `iter_report_formats` can render.
+REPORT_FORMATS = ("markdown", "json")
 
 
 def get_dynamodb_table(table_name: str):
 
-    dynamodb = boto3.resource("dynamodb")
-    return dynamodb.Table(table_name)
-
-
-def get_incidents_for_date(table, date_str: str) -> List[Dict]:
-
-    items: List[Dict] = []
+    return _get_pooled_table(table_name)
+
+
+def known_event_types() -> List[str]:
+    """
+    Event types whose partitions the report queries directly:
+    INCIDENT_EVENT_TYPES plus every type the router's rules can emit,
+    including rules added with `event_router.register_rule`.
+    """
+    types = list(INCIDENT_EVENT_TYPES)
+    types.extend(rule.event_type for rule in get_classifier().rules)
+    types.append("UNKNOWN")
+    return list(dict.fromkeys(str(t) for t in types))
+
+
+def _partition_keys(event_types: Optional[List[str]]) -> List[str]:
+    if event_types is None:
+        event_types = known_event_types()
+    return [PARTITION_PREFIX + str(t) for t in dict.fromkeys(event_types)]
+
+
+def _day_sk_bounds(date_str: str) -> Tuple[str, str]:
+    """
+    Sort-key range covering every incident created on `date_str`.
+
+    sk is "<iso timestamp>#<uuid>", so all items of the day start with
+    "YYYY-MM-DDT" followed by digits; "~" sorts after every digit.
+    """
+    return f"{date_str}T", f"{date_str}T~"
+
+
+def _partition_pages(table, pk: str, date_str: str) -> Iterator[List[Dict]]:
+    """Page through one partition's items for the day using a key condition."""
+    from boto3.dynamodb.conditions import Key
+
+    start, end = _day_sk_bounds(date_str)
+    kwargs: Dict[str, Any] = {
+        "KeyConditionExpression": Key("pk").eq(pk) & Key("sk").between(start, end)
+    }
+
+    while True:
+        response = table.query(**kwargs)
+        yield response.get("Items", [])
+        if "LastEvaluatedKey" not in response:
+            return
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def _query_partition(table, pk: str, date_str: str) -> List[Dict]:
+    return [item for page in _partition_pages(table, pk, date_str) for item in page]
+
+
+def _prefetched(pages: Iterator[List[Dict]], pool: ThreadPoolExecutor) -> Iterator[Dict]:
+    """Yield items of `pages` while the following page is fetched on `pool`."""
+    fetch = bind_scope(next)
+    pending = pool.submit(fetch, pages, None)
+    while True:
+        page = pending.result()
+        if page is None:
+            return
+        pending = pool.submit(fetch, pages, None)
+        yield from page
+
+
+_SEGMENT_DONE = object()
+
+
+def parallel_scan(
+    table,
+    filter_expression=None,
+    total_segments: Optional[int] = None,
+    max_in_flight_pages: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    projection: Optional[str] = None,
+) -> Iterator[Dict]:
+    """
+    Stream every item of `table` using a segmented (Segment/TotalSegments) scan.
+
+    Each segment is paged sequentially on a worker thread; pages are handed
+    to the caller through a bounded queue, so at most `max_in_flight_pages`
+    pages are buffered at any time and workers block until the consumer
+    catches up. Items are yielded in no particular order.
+    """
+    if total_segments is None:
+        total_segments = SCAN_TOTAL_SEGMENTS
+    if max_in_flight_pages is None:
+        max_in_flight_pages = SCAN_MAX_IN_FLIGHT_PAGES
+    total_segments = max(1, total_segments)
+    if max_workers is None:
+        max_workers = total_segments
+
+    pages: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, max_in_flight_pages))
+    stop = threading.Event()
+
+    def _put(value: Any) -> bool:
+        # Block while the buffer is full, but give up once the consumer is gone.
+        while not stop.is_set():
+            try:
+                pages.put(value, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _scan_segment(segment: int) -> None:
+        kwargs: Dict[str, Any] = {}
+        if filter_expression is not None:
+            kwargs["FilterExpression"] = filter_expression
+        if projection is not None:
+            kwargs["ProjectionExpression"] = projection
+        if total_segments > 1:
+            kwargs["Segment"] = segment
+            kwargs["TotalSegments"] = total_segments
+        try:
+            while not stop.is_set():
+                response = table.scan(**kwargs)
+                if not _put(response.get("Items", [])):
+                    return
+                if "LastEvaluatedKey" not in response:
+                    break
+                kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        except Exception as e:  # surfaced to the consumer
+            _put(e)
+        finally:
+            _put(_SEGMENT_DONE)
+
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, total_segments)))
+    try:
+        for segment in range(total_segments):
+            pool.submit(bind_scope(_scan_segment), segment)
+
+        remaining = total_segments
+        while remaining:
+            page = pages.get()
+            if page is _SEGMENT_DONE:
+                remaining -= 1
+            elif isinstance(page, Exception):
+                raise page
+            else:
+                yield from page
+    finally:
+        stop.set()
+        pool.shutdown(wait=True)
+
+
+def scan_incidents_for_date(
+    table,
+    date_str: str,
+    filter_expression=None,
+    total_segments: Optional[int] = None,
+) -> List[Dict]:
+    """
+    Full-table scan filtered on created_at.
+
+    Reads (and bills) every item in the table; only used for partitions
+    that cannot be addressed with a key condition. Segments are scanned
+    in parallel via `parallel_scan`.
+    """
+    from boto3.dynamodb.conditions import Attr
+
+    condition = Attr("created_at").begins_with(date_str)
+    if filter_expression is not None:
+        condition = condition & filter_expression
+
+    items = list(parallel_scan(table, condition, total_segments=total_segments))
+    items.sort(key=lambda i: i.get("created_at", ""))
+    return items
 
-    # 第一次 scan
-    response = table.scan(FilterExpression=Attr("created_at").begins_with(date_str))
-    items.extend(response.get("Items", []))
 
-    # 如果有分页，继续 scan
-    while "LastEvaluatedKey" in response:
-        response = table.scan(
-            FilterExpression=Attr("created_at").begins_with(date_str),
-            ExclusiveStartKey=response["LastEvaluatedKey"],
+def _unknown_partition_filter(pks: List[str]):
+    """Incident items whose partition is not one of `pks`."""
+    from boto3.dynamodb.conditions import Attr
+
+    condition = Attr("pk").begins_with(PARTITION_PREFIX)
+    if pks:
+        condition = condition & ~Attr("pk").is_in(pks)
+    return condition
+
+
+def _warn_unknown_partitions(date_str: str, items: List[Dict]) -> None:
+    if items:
+        log_json(
+            logger,
+            "warning",
+            "Incidents found outside the known partitions; add their event "
+            "types to INCIDENT_EVENT_TYPES so they are queried directly",
+            {
+                "date": date_str,
+                "partitions": sorted({str(i.get("pk")) for i in items}),
+                "incidents": len(items),
+            },
         )
-        items.extend(response.get("Items", []))
 
+
+def scan_unknown_partitions(table, date_str: str, pks: List[str]) -> List[Dict]:
+    """
+    The day's incidents stored outside the partitions `pks`, e.g. written
+    by a newer deployment with more event types. A filtered scan, so it
+    reads the whole table; found items are logged as a warning.
+    """
+    items = scan_incidents_for_date(table, date_str, _unknown_partition_filter(pks))
+    _warn_unknown_partitions(date_str, items)
     return items
 
 
-def generate_markdown(date_str: str, incidents: List[Dict]) -> str:
-    """根据你的表结构，生成 Markdown 报告。"""
-    lines: List[str] = []
+def _unknown_partition_sks(table, date_str: str, pks: List[str]) -> List[str]:
+    """Sort keys of `scan_unknown_partitions`, scanning only pk and sk."""
+    from boto3.dynamodb.conditions import Attr
+
+    condition = Attr("created_at").begins_with(date_str) & _unknown_partition_filter(pks)
+    items = list(parallel_scan(table, condition, projection="pk, sk"))
+    _warn_unknown_partitions(date_str, items)
+    return [i["sk"] for i in items]
+
+
+def _merge_by_created_at(streams: Iterable[List[Dict]]) -> List[Dict]:
+    """Merge per-partition result lists (each already sorted) by created_at."""
+    return list(heapq.merge(*streams, key=lambda i: i.get("created_at", "")))
+
+
+def get_incidents_for_date(
+    table,
+    date_str: str,
+    event_types: Optional[List[str]] = None,
+    scan_unknown: Optional[bool] = None,
+    max_workers: Optional[int] = None,
+    mode: Optional[str] = None,
+) -> List[Dict]:
+    """
+    Fetch all incidents for `date_str`, ordered by created_at.
+
+    In "query" mode (default) runs one Query per known event-type partition
+    (pk = "INCIDENT#<event_type>", sk BETWEEN day-start AND day-end; see
+    `known_event_types`) in parallel and merges the results. Unless
+    `scan_unknown` is disabled, a filtered scan also picks up incidents
+    in any other partition.
+
+    In "scan" mode the whole table is read with a parallel segmented scan,
+    for tables written before the pk/sk layout.
+    """
+    if mode is None:
+        mode = REPORT_READ_MODE
+    if mode == "scan":
+        return scan_incidents_for_date(table, date_str)
+    if mode != "query":
+        raise ValueError(f"Unsupported report read mode: {mode}")
+
+    if scan_unknown is None:
+        scan_unknown = REPORT_SCAN_UNKNOWN_PARTITIONS
+    if max_workers is None:
+        max_workers = REPORT_QUERY_WORKERS
+
+    pks = _partition_keys(event_types)
+    streams: List[List[Dict]] = []
+
+    if pks:
+        workers = max(1, min(max_workers, len(pks)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            streams.extend(
+                pool.map(bind_scope(lambda pk: _query_partition(table, pk, date_str)), pks)
+            )
+
+    if scan_unknown:
+        streams.append(scan_unknown_partitions(table, date_str, pks))
+
+    return _merge_by_created_at(streams)
+
+
+def _partition_count_and_max_sk(
+    table, pk: str, date_str: str, count: bool = True
+) -> Tuple[int, str]:
+    from boto3.dynamodb.conditions import Key
+
+    start, end = _day_sk_bounds(date_str)
+    key_condition = Key("pk").eq(pk) & Key("sk").between(start, end)
+
+    latest = table.query(
+        KeyConditionExpression=key_condition, ScanIndexForward=False, Limit=1
+    ).get("Items", [])
+    if not latest or not count:
+        return 0, latest[0]["sk"] if latest else ""
+
+    total = 0
+    kwargs: Dict[str, Any] = {"KeyConditionExpression": key_condition, "Select": "COUNT"}
+    while True:
+        response = table.query(**kwargs)
+        total += response.get("Count", 0)
+        if "LastEvaluatedKey" not in response:
+            break
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    return total, latest[0]["sk"]
+
+
+def _partition_min_sk(table, pk: str, date_str: str) -> str:
+    from boto3.dynamodb.conditions import Key
+
+    start, end = _day_sk_bounds(date_str)
+    first = table.query(
+        KeyConditionExpression=Key("pk").eq(pk) & Key("sk").between(start, end),
+        Limit=1,
+    ).get("Items", [])
+    return first[0]["sk"] if first else ""
+
+
+def earliest_incident_sk(
+    table, date_str: str, event_types: Optional[List[str]] = None
+) -> Optional[str]:
+    """
+    The sk of the day's first incident ("" when there is none), with one
+    Limit=1 Query per partition, plus the sort keys found by the
+    unknown-partition scan when REPORT_SCAN_UNKNOWN_PARTITIONS is on.
+    None in scan mode, which this cannot cover.
+    """
+    if REPORT_READ_MODE != "query":
+        return None
+
+    pks = _partition_keys(event_types)
+    with ThreadPoolExecutor(max_workers=max(1, len(pks))) as pool:
+        firsts = list(
+            pool.map(bind_scope(lambda pk: _partition_min_sk(table, pk, date_str)), pks)
+        )
+    if REPORT_SCAN_UNKNOWN_PARTITIONS:
+        firsts.extend(_unknown_partition_sks(table, date_str, pks))
+    return min((sk for sk in firsts if sk), default="")
+
+
+def report_fingerprint(
+    table,
+    date_str: str,
+    summary: Optional[Dict[str, Any]] = None,
+    event_types: Optional[List[str]] = None,
+) -> Optional[Dict[str, str]]:
+    """
+    Cheap change detector for a day's report: incident count, newest sk
+    and REPORT_FORMAT_VERSION, as S3 object metadata.
+
+    The newest sk per partition costs one Limit=1 Query. The count comes
+    from the day's aggregate `summary` when given, otherwise from
+    Select=COUNT queries. Incidents in other partitions are counted by a
+    pk/sk-only scan when REPORT_SCAN_UNKNOWN_PARTITIONS is on. Returns None
+    in scan mode, which this cannot cover.
+    """
+    if REPORT_READ_MODE != "query":
+        return None
+
+    pks = _partition_keys(event_types)
+    with ThreadPoolExecutor(max_workers=max(1, len(pks))) as pool:
+        partitions = list(
+            pool.map(
+                bind_scope(
+                    lambda pk: _partition_count_and_max_sk(
+                        table, pk, date_str, count=summary is None
+                    )
+                ),
+                pks,
+            )
+        )
+
+    if REPORT_SCAN_UNKNOWN_PARTITIONS:
+        unknown = _unknown_partition_sks(table, date_str, pks)
+        partitions.append((len(unknown), max(unknown, default="")))
+
+    count = summary["total"] if summary is not None else sum(c for c, _ in partitions)
+    return {
+        "incident-count": str(count),
+        "max-sk": max((sk for _, sk in partitions), default="") or "-",
+        "format-version": REPORT_FORMAT_VERSION,
+    }
+
+
+def _sort_key(item: Dict):
+    # 用 created_at 排序（如果有的话）
+    return item.get("created_at", "")
+
+
+def iter_incidents_for_date(
+    table,
+    date_str: str,
+    event_types: Optional[List[str]] = None,
+    scan_unknown: Optional[bool] = None,
+    mode: Optional[str] = None,
+) -> Iterator[Dict]:
+    """
+    Streaming form of `get_incidents_for_date`: yields the day's incidents
+    in created_at order without collecting them first.
+
+    Each partition is paged lazily (with the next page prefetched on a
+    worker thread) and the already-sorted partition streams are combined
+    with a k-way merge, so roughly two pages per partition are held at a
+    time. Scan mode and the unknown-partition scan return unordered items
+    and are still sorted in memory.
+    """
+    if mode is None:
+        mode = REPORT_READ_MODE
+    if mode == "scan":
+        yield from scan_incidents_for_date(table, date_str)
+        return
+    if mode != "query":
+        raise ValueError(f"Unsupported report read mode: {mode}")
+
+    if scan_unknown is None:
+        scan_unknown = REPORT_SCAN_UNKNOWN_PARTITIONS
+
+    pks = _partition_keys(event_types)
+    streams: List[Iterator[Dict]] = []
+    if scan_unknown:
+        streams.append(iter(scan_unknown_partitions(table, date_str, pks)))
+
+    with ThreadPoolExecutor(max_workers=max(1, len(pks))) as pool:
+        streams.extend(
+            _prefetched(_partition_pages(table, pk, date_str), pool) for pk in pks
+        )
+        yield from heapq.merge(*streams, key=_sort_key)
 
-    lines.append(f"# Daily Cloud Incident Report - {date_str}")
-    lines.append("")
 
-    if not incidents:
-        lines.append("No incidents recorded for this date.")
-        return "\n".join(lines)
+def _detail_row(item: Dict) -> Dict[str, Any]:
+    """One row of the incident details table."""
+    message = item.get("message", "").replace("\n", " ")
+    if len(message) > 80:
+        message = message[:77] + "..."
 
-    # === Summary 区块 ===
-    total = len(incidents)
-
-    # 这里你没有 status 字段，我们可以根据 action / message 粗略判断
-    # 比如：包含 "FAILED" 的算失败，这只是一个简单 heuristics
-    failed_count = sum(
-        1
-        for i in incidents
-        if "FAILED" in (i.get("action", "") + i.get("message", "")).upper()
-    )
-    success_count = total - failed_count
+    return {
+        "created_at": item.get("created_at", "-"),
+        "event_type": item.get("event_type", "-"),
+        "instance_id": item.get("instance_id", "-"),
+        "remediation_type": item.get("remediation_type", "-"),
+        "action": item.get("action", "-"),
+        "message": message,
+    }
 
-    # 统计唯一实例
-    instance_ids = {i.get("instance_id") for i in incidents if i.get("instance_id")}
-    unique_instances = len(instance_ids)
 
-    # 按 event_type 统计数量
-    by_event_type = collections.Counter(
-        i.get("event_type", "UNKNOWN") for i in incidents
-    )
+def _markdown_head_lines(
+    date_str: str, summary: Dict[str, Any], empty: bool
+) -> Iterator[str]:
+    yield f"# Daily Cloud Incident Report - {date_str}"
+    yield ""
 
-    # 按 remediation_type 统计数量（你未来汇报的时候这块很好用）
-    by_remediation_type = collections.Counter(
-        i.get("remediation_type", "UNKNOWN") for i in incidents
-    )
+    if empty:
+        yield "No incidents recorded for this date."
+        return
 
-    lines.append("**Summary**")
-    lines.append(f"- Total incidents: {total}")
-    lines.append(f"- Success (heuristic): {success_count}")
-    lines.append(f"- Failed (heuristic): {failed_count}")
-    lines.append(f"- Unique instances: {unique_instances}")
-    lines.append("")
+    # 按 event_type / remediation_type 统计数量（你未来汇报的时候这块很好用）
+    by_event_type = collections.Counter(summary["by_event_type"])
+    by_remediation_type = collections.Counter(summary["by_remediation_type"])
 
-    lines.append("**By event type**")
+    # === Summary 区块 ===
+    yield "**Summary**"
+    yield f"- Total incidents: {summary['total']}"
+    yield f"- Success (heuristic): {summary['success']}"
+    yield f"- Failed (heuristic): {summary['failed']}"
+    yield f"- Unique instances: {summary['unique_instances']}"
+    yield ""
+
+    yield "**By event type**"
     for event_type, count in by_event_type.most_common():
-        lines.append(f"- {event_type}: {count}")
-    lines.append("")
+        yield f"- {event_type}: {count}"
+    yield ""
 
-    lines.append("**By remediation type**")
+    yield "**By remediation type**"
     for r_type, count in by_remediation_type.most_common():
-        lines.append(f"- {r_type}: {count}")
-    lines.append("")
-    lines.append("---")
-    lines.append("")
+        yield f"- {r_type}: {count}"
+    yield ""
+    yield "---"
+    yield ""
 
     # === 详情表格 ===
-    lines.append("## Incident Details")
-    lines.append("")
-    lines.append(
-        "| Time (created_at) | Event Type | Instance ID | Remediation Type | Action | Message |"
-    )
-    lines.append(
-        "|-------------------|------------|-------------|------------------|--------|---------|"
-    )
+    yield "## Incident Details"
+    yield ""
+    yield "| Time (created_at) | Event Type | Instance ID | Remediation Type | Action | Message |"
+    yield "|-------------------|------------|-------------|------------------|--------|---------|"
+
 
-    def _sort_key(item: Dict):
-        # 用 created_at 排序（如果有的话）
-        return item.get("created_at", "")
+def _markdown_row(item: Dict) -> str:
+    row = _detail_row(item)
+    return (
+        f"| {row['created_at']} | {row['event_type']} | {row['instance_id']} | "
+        f"{row['remediation_type']} | {row['action']} | {row['message']} |"
+    )
 
-    for item in sorted(incidents, key=_sort_key):
-        created_at = item.get("created_at", "-")
-        event_type = item.get("event_type", "-")
-        instance_id = item.get("instance_id", "-")
-        remediation_type = item.get("remediation_type", "-")
-        action = item.get("action", "-")
-        message = item.get("message", "").replace("\n", " ")
 
-        if len(message) > 80:
-            message = message[:77] + "..."
+def iter_markdown_lines(
+    date_str: str,
+    incidents: Iterable[Dict],
+    summary: Optional[Dict[str, Any]] = None,
+) -> Iterator[str]:
+    """
+    Yield the report line by line (join them with newlines for the text).
+
+    `incidents` must already be ordered by created_at. It is consumed
+    once, row by row, so a lazy stream keeps memory flat. The summary
+    block comes first, so pass `summary` when streaming; without it the
+    incidents are materialized to compute it.
+    """
+    rows: Iterator[Dict] = iter(incidents)
+    first = next(rows, None)
+    if first is None:
+        yield from _markdown_head_lines(date_str, {}, empty=True)
+        return
+
+    if summary is None:
+        materialized = [first, *rows]
+        summary = summarize_incidents(materialized)
+        rows = iter(materialized)
+    else:
+        rows = itertools.chain([first], rows)
+
+    yield from _markdown_head_lines(date_str, summary, empty=False)
+    for item in rows:
+        yield _markdown_row(item)
+
+
+def summary_document(date_str: str, summary: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The report's counters as plain JSON-ready data: the head of the JSON
+    summary and the source of a manifest entry.
+    """
+    return {
+        "date": date_str,
+        "format_version": REPORT_FORMAT_VERSION,
+        "summary": {
+            "total": summary["total"],
+            "success": summary["success"],
+            "failed": summary["failed"],
+            "unique_instances": summary["unique_instances"],
+        },
+        "by_event_type": dict(collections.Counter(summary["by_event_type"]).most_common()),
+        "by_remediation_type": dict(
+            collections.Counter(summary["by_remediation_type"]).most_common()
+        ),
+    }
+
+
+def _json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class SummaryMismatch(Exception):
+    """The day's stored summary disagreed with its incidents; `summary` is theirs."""
+
+    def __init__(self, date_str: str, summary: Dict[str, Any]):
+        super().__init__(f"Stored summary for {date_str} does not match its incidents")
+        self.summary = summary
+
+
+def iter_report_formats(
+    store: IncidentStore,
+    date_str: str,
+    summary: Optional[Dict[str, Any]] = None,
+    formats: Iterable[str] = ("markdown",),
+    reconcile: bool = False,
+) -> Iterator[Tuple[str, str]]:
+    """
+    Stream the report for `date_str` in several formats from one read of
+    the incidents in `store`, as (format, chunk) pairs; each format's chunks
+    concatenate to its document:
+
+      - "markdown": the text `generate_markdown` produces
+      - "json":     `summary_document` plus an "incidents" list of detail rows
+
+    Without a precomputed `summary` the day is read twice: once to
+    summarize (keeping only counters and the set of instance ids), then
+    again for the detail rows.
+
+    With `reconcile`, a `summary` read from the store's write-time
+    aggregate is checked against the rows as they stream by. If they
+    disagree the store repairs its aggregate and SummaryMismatch is
+    raised before the documents are closed, so the caller can discard
+    them and render again with the summary the rows gave.
+    """
+    formats = list(dict.fromkeys(formats))
+    unknown = set(formats) - set(REPORT_FORMATS)
+    if unknown:
+        raise ValueError(f"Unsupported report formats: {', '.join(sorted(unknown))}")
+
+    if summary is None:
+        summary = summarize_incidents(store.incidents_for_date(date_str))
+
+    rows = store.incidents_for_date(date_str)
+    first = next(rows, None)
+    if first is not None:
+        rows = itertools.chain([first], rows)
+
+    if "markdown" in formats:
+        yield "markdown", "\n".join(_markdown_head_lines(date_str, summary, first is None))
+    if "json" in formats:
+        head = _json(summary_document(date_str, summary))
+        yield "json", head[:-1] + ',"incidents":['
+
+    tally = IncidentTally() if reconcile and AGGREGATE_KEY in summary else None
+    for n, item in enumerate(rows):
+        if tally is not None:
+            tally.add(item)
+        if "markdown" in formats:
+            yield "markdown", "\n" + _markdown_row(item)
+        if "json" in formats:
+            yield "json", ("," if n else "") + _json(_detail_row(item))
+
+    if tally is not None and not same_counts(summary, tally.summary()):
+        actual = tally.summary()
+        store.repair_daily_summary(date_str, summary, actual, first.get("sk", "") if first else "")
+        raise SummaryMismatch(date_str, actual)
+
+    if "json" in formats:
+        yield "json", "]}"
+
+
+def generate_markdown(
+    date_str: str, incidents: List[Dict], summary: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    根据你的表结构，生成 Markdown 报告。
+
+    `summary` is the precomputed day summary (see
+    `IncidentStore.daily_summary`); without it the summary
+    block is computed from `incidents`.
+    """
+    return "\n".join(
+        iter_markdown_lines(date_str, sorted(incidents, key=_sort_key), summary)
+    )
 
-        lines.append(
-            f"| {created_at} | {event_type} | {instance_id} | "
-            f"{remediation_type} | {action} | {message} |"
-        )
 
-    return "\n".join(lines)
+def iter_report_chunks(
+    store: IncidentStore, date_str: str, summary: Optional[Dict[str, Any]] = None
+) -> Iterator[str]:
+    """
+    Stream the report for `date_str` as text chunks that concatenate to
+    `generate_markdown` output, reading incidents as a stream (for
+    DynamoDB `iter_incidents_for_date`) so only a few pages are held at
+    a time.
+    """
+    for _, chunk in iter_report_formats(store, date_str, summary, ("markdown",)):
+        yield chunk
 
 
 def build_daily_report(date_str: Optional[str] = None) -> str:
 
-    table_name = os.getenv("INCIDENT_TABLE_NAME", "incident_events")
-    table = get_dynamodb_table(table_name)
+    store = get_incident_store()
 
     if date_str is None:
         date_str = datetime.datetime.utcnow().strftime("%Y-%m-%d")
 
-    incidents = get_incidents_for_date(table, date_str)
-    markdown = generate_markdown(date_str, incidents)
+    incidents = list(store.incidents_for_date(date_str))
+    summary = store.daily_summary(date_str)
+    markdown = generate_markdown(date_str, incidents, summary)
     return markdown
 
 
+def stream_daily_report(date_str: Optional[str] = None) -> Iterator[str]:
+    """Streaming form of `build_daily_report`: yields the report in chunks."""
+    store = get_incident_store()
+
+    if date_str is None:
+        date_str = datetime.datetime.utcnow().strftime("%Y-%m-%d")
+
+    summary = store.daily_summary(date_str)
+    yield from iter_report_chunks(store, date_str, summary)
+
+
+def daily_report_summary(date_str: str) -> Dict[str, Any]:
+    """
+    The day's summary from the incident store when it keeps one (the
+    DynamoDB write-time aggregate, SQLite aggregate queries), otherwise
+    computed with one pass over the day's incidents.
+    """
+    store = get_incident_store()
+
+    summary = store.daily_summary(date_str)
+    if summary is None:
+        summary = summarize_incidents(store.incidents_for_date(date_str))
+    return summary
+
+
+def stream_daily_report_formats(
+    date_str: str, summary: Dict[str, Any], formats: Iterable[str]
+) -> Iterator[Tuple[str, str]]:
+    """
+    `iter_report_formats` for `date_str` against the configured incident
+    store, reconciling a stored summary with the rows (see SummaryMismatch).
+    """
+    yield from iter_report_formats(
+        get_incident_store(), date_str, summary, formats, reconcile=True
+    )
+
+
+def daily_report_fingerprint(
+    date_str: str, summary: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, str]]:
+    """
+    The configured incident store's report fingerprint for `date_str`,
+    counting from `summary` when given, else from the store's own.
+    """
+    store = get_incident_store()
+    if summary is None:
+        summary = store.daily_summary(date_str)
+    return store.fingerprint(date_str, summary)
+
+
 def main():
-    """Allow running the report locally: python daily_report.py 2025-11-26"""
+    """
+    Allow running the report locally: python -m src.reporting.daily_report 2025-11-26
+
+    Backfill a date range to S3 (no email):
+        python -m src.reporting.daily_report --from 2025-10-01 --to 2025-12-31
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the daily incident report.")
     # 从命令行参数拿日期，不传则用今天
-    date_str = sys.argv[1] if len(sys.argv) > 1 else None
-    report = build_daily_report(date_str)
+    parser.add_argument("date", nargs="?", help="Report date (YYYY-MM-DD); default today")
+    parser.add_argument("--from", dest="start", help="First date of a backfill range")
+    parser.add_argument("--to", dest="end", help="Last date of a backfill range")
+    parser.add_argument("--workers", type=int, help="Days processed concurrently")
+    parser.add_argument(
+        "--force", action="store_true", help="Re-publish days whose report is unchanged"
+    )
+    args = parser.parse_args()
+
+    if args.start or args.end:
+        if not (args.start and args.end) or args.date:
+            parser.error("--from and --to go together and replace the date argument")
+        from ..daily_report_lambda import backfill_reports
+
+        result = backfill_reports(args.start, args.end, args.workers, force=args.force)
+        print(json.dumps(result, indent=2))
+        sys.exit(1 if result["failed"] else 0)
+
+    report = build_daily_report(args.date)
     print(report)
 
 
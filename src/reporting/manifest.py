@@ -0,0 +1,118 @@
+import datetime
+import json
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..utils.aws_clients import get_s3_client
+from ..utils.config import REPORT_MANIFEST_MAX_DAYS, REPORT_MANIFEST_RETRIES
+from ..utils.logging_utils import get_logger, log_json
+from ..utils.resilience import CONFLICT, NOT_FOUND, classify_error
+
+logger = get_logger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+# Serializes updates from one process (backfill workers); conditional
+# writes handle concurrent Lambdas.
+_lock = threading.Lock()
+# PutObject's IfMatch / IfNoneMatch need botocore from late 2024; older
+# SDKs (e.g. the one bundled with the Lambda runtime) reject them. Cleared
+# the first time that happens, so updates fall back to plain puts.
+_conditional_writes = True
+
+
+def manifest_entry(document: Dict[str, Any], key: str) -> Dict[str, Any]:
+    """Manifest line for one day, from its `summary_document`."""
+    return {"date": document["date"], "key": key, **document["summary"]}
+
+
+def _read(s3, bucket: str, key: str) -> Tuple[Dict[str, Any], Optional[str]]:
+    try:
+        response = s3.get_object(Bucket=bucket, Key=key)
+    except Exception as e:
+        if classify_error(e) == NOT_FOUND:
+            return {"dates": []}, None
+        raise
+    return json.loads(response["Body"].read()), response.get("ETag")
+
+
+def _merge(manifest: Dict[str, Any], entries: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """New manifest with `entries` applied, or None if nothing changes."""
+    by_date = {e["date"]: e for e in manifest.get("dates", [])}
+    if all(by_date.get(e["date"]) == e for e in entries):
+        return None
+    by_date.update((e["date"], e) for e in entries)
+    dates = sorted(by_date.values(), key=lambda e: e["date"], reverse=True)
+    return {
+        "updated_at": datetime.datetime.utcnow().isoformat() + "Z",
+        "dates": dates[:REPORT_MANIFEST_MAX_DAYS],
+    }
+
+
+def update_manifest(bucket: str, key: str, entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Add or replace `entries` (one per date) in the rolling manifest at
+    s3://bucket/key, keeping the newest REPORT_MANIFEST_MAX_DAYS dates.
+
+    Read-modify-write with S3 conditional writes (If-Match on the ETag
+    read, If-None-Match when creating), retried when another writer got
+    there first. Nothing is written when the entries are already there.
+    With an SDK too old for conditional writes the put is unconditional:
+    updates from one process are still serialized, but a concurrent Lambda
+    can drop an entry (the dashboard still loads unlisted dates).
+    """
+    global _conditional_writes
+    from botocore.exceptions import ParamValidationError
+
+    s3 = get_s3_client()
+    with _lock:
+        for attempt in range(1, REPORT_MANIFEST_RETRIES + 1):
+            manifest, etag = _read(s3, bucket, key)
+            updated = _merge(manifest, entries)
+            if updated is None:
+                return {"status": "UNCHANGED", "bucket": bucket, "key": key}
+
+            args = {
+                "Bucket": bucket,
+                "Key": key,
+                "Body": json.dumps(updated, separators=(",", ":")).encode("utf-8"),
+                "ContentType": "application/json; charset=utf-8",
+                "CacheControl": "no-cache",
+            }
+            try:
+                if not _conditional_writes:
+                    s3.put_object(**args)
+                else:
+                    condition = {"IfMatch": etag} if etag else {"IfNoneMatch": "*"}
+                    try:
+                        s3.put_object(**args, **condition)
+                    except ParamValidationError as e:
+                        _conditional_writes = False
+                        log_json(
+                            logger,
+                            "warning",
+                            "S3 SDK lacks conditional writes; manifest updates are unconditional",
+                            {"bucket": bucket, "key": key, "error": str(e)},
+                        )
+                        s3.put_object(**args)
+            except Exception as e:
+                if classify_error(e) == CONFLICT:
+                    log_json(
+                        logger,
+                        "info",
+                        "Report manifest changed concurrently; retrying",
+                        {"bucket": bucket, "key": key, "attempt": attempt},
+                    )
+                    continue
+                raise
+            return {
+                "status": "SUCCESS",
+                "bucket": bucket,
+                "key": key,
+                "dates": len(updated["dates"]),
+            }
+
+    raise RuntimeError(
+        f"Report manifest s3://{bucket}/{key} kept changing; gave up after "
+        f"{REPORT_MANIFEST_RETRIES} attempts"
+    )
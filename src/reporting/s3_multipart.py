@@ -0,0 +1,204 @@
+import hashlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Union
+
+from ..utils.aws_clients import get_s3_client
+from ..utils.config import REPORT_UPLOAD_MAX_IN_FLIGHT, REPORT_UPLOAD_PART_SIZE
+from ..utils.metrics import bind_scope
+
+# S3 rejects multipart parts under 5 MiB (except the last one).
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+def _md5(data: bytes) -> "hashlib._Hash":
+    # Content fingerprint matching S3's ETag, not a security use.
+    try:
+        return hashlib.md5(data, usedforsecurity=False)
+    except TypeError:  # Python < 3.9
+        return hashlib.md5(data)
+
+
+def same_etag(a: str, b: str) -> bool:
+    """True if two S3 ETags are equal, whether or not they are quoted."""
+    return a.strip('"') == b.strip('"')
+
+
+class S3MultipartWriter:
+    """
+    Write-only stream to an S3 object, uploaded with multipart upload.
+
+    Written data is buffered up to `part_size` bytes, then sent as one
+    part on a background thread while writing continues. At most
+    `max_in_flight` parts are uploading at once; `write` blocks beyond
+    that, so memory stays under (max_in_flight + 1) * part_size.
+    Objects that never fill a part are sent with a single put_object.
+    Extra keyword arguments (ContentType, ContentEncoding, ...) go to the
+    create/put call.
+
+    Use as a context manager: the upload is completed on normal exit and
+    aborted (no orphaned parts) when the block raises.
+
+    The S3 ETag the object will get (MD5 of the body, or for multipart the
+    MD5 of the part MD5s plus "-<parts>") is tracked as data is written,
+    so `close(unless_etag=...)` can drop an upload whose content matches
+    an existing object. This holds for SSE-S3 and unencrypted buckets; with
+    SSE-KMS the ETags never match and the object is always written.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        key: str,
+        part_size: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        client=None,
+        **object_args: Any,
+    ):
+        self.bucket = bucket
+        self.key = key
+        self.part_size = max(
+            MIN_PART_SIZE, REPORT_UPLOAD_PART_SIZE if part_size is None else part_size
+        )
+        self.max_in_flight = max(
+            1, REPORT_UPLOAD_MAX_IN_FLIGHT if max_in_flight is None else max_in_flight
+        )
+        self.client = client if client is not None else get_s3_client()
+        self.object_args = object_args
+
+        self.bytes_written = 0
+        self._buffer = bytearray()
+        self._upload_id: Optional[str] = None
+        self._parts: List["Future[Dict[str, Any]]"] = []
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._part_md5s: List[bytes] = []
+        self._closed = False
+
+    def __enter__(self) -> "S3MultipartWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, data: Union[str, bytes]) -> int:
+        if self._closed:
+            raise ValueError("write to closed S3MultipartWriter")
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self._buffer += data
+        self.bytes_written += len(data)
+        while len(self._buffer) >= self.part_size:
+            part = bytes(memoryview(self._buffer)[: self.part_size])
+            del self._buffer[: self.part_size]
+            self._submit(part)
+        return len(data)
+
+    def _submit(self, body: bytes) -> None:
+        if self._upload_id is None:
+            response = self.client.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key, **self.object_args
+            )
+            self._upload_id = response["UploadId"]
+            self._pool = ThreadPoolExecutor(max_workers=self.max_in_flight)
+
+        # Surface a failed part now instead of after uploading the rest.
+        for future in self._parts:
+            if future.done() and future.exception() is not None:
+                raise future.exception()
+
+        self._part_md5s.append(_md5(body).digest())
+        self._slots.acquire()
+        part_number = len(self._parts) + 1
+        future = self._pool.submit(bind_scope(self._upload_part), part_number, body)
+        future.add_done_callback(lambda _: self._slots.release())
+        self._parts.append(future)
+
+    def _upload_part(self, part_number: int, body: bytes) -> Dict[str, Any]:
+        response = self.client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=body,
+        )
+        return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+    def expected_etag(self) -> str:
+        """ETag S3 will assign if the data written so far is the whole object."""
+        if self._upload_id is None:
+            return '"%s"' % _md5(self._buffer).hexdigest()
+        digests = list(self._part_md5s)
+        if self._buffer:
+            digests.append(_md5(self._buffer).digest())
+        return '"%s-%d"' % (_md5(b"".join(digests)).hexdigest(), len(digests))
+
+    def close(self, unless_etag: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Finish the object; returns {"etag", "parts", "bytes", "unchanged"}.
+
+        When the content's ETag equals `unless_etag` (the existing object's)
+        nothing is written and any multipart upload is aborted.
+        """
+        if self._closed:
+            raise ValueError("S3MultipartWriter already closed")
+
+        etag = self.expected_etag()
+        if unless_etag is not None and same_etag(etag, unless_etag):
+            parts = max(1, len(self._part_md5s) + bool(self._buffer))
+            self.abort()
+            return {"etag": etag, "parts": parts, "bytes": self.bytes_written, "unchanged": True}
+        self._closed = True
+
+        if self._upload_id is None:
+            response = self.client.put_object(
+                Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer), **self.object_args
+            )
+            self._buffer = bytearray()
+            return {
+                "etag": response.get("ETag"),
+                "parts": 1,
+                "bytes": self.bytes_written,
+                "unchanged": False,
+            }
+
+        try:
+            if self._buffer:
+                body, self._buffer = bytes(self._buffer), bytearray()
+                self._submit(body)
+            parts = [future.result() for future in self._parts]
+            response = self.client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self._upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except BaseException:
+            self._abort_upload()
+            raise
+        self._pool.shutdown(wait=True)
+        return {
+            "etag": response.get("ETag"),
+            "parts": len(parts),
+            "bytes": self.bytes_written,
+            "unchanged": False,
+        }
+
+    def abort(self) -> None:
+        """Discard everything written; nothing is left behind in S3."""
+        self._closed = True
+        self._buffer = bytearray()
+        if self._upload_id is not None:
+            self._abort_upload()
+
+    def _abort_upload(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+        upload_id, self._upload_id = self._upload_id, None
+        if upload_id is not None:
+            self.client.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=upload_id
+            )
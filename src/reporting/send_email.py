@@ -1,9 +1,7 @@
 import os
 from typing import Any, Dict, List
 
-import boto3
-from botocore.exceptions import ClientError
-
+from ..utils.aws_clients import get_ses_client
 from ..utils.config import SES_SENDER, SES_RECIPIENT
 from ..utils.logging_utils import get_logger, log_json
 
@@ -41,6 +39,8 @@ def send_report_email(date_str: str, markdown_report: str) -> Dict[str, Any]:
     - SES_SENDER: verified SES identity
     - SES_RECIPIENTS / SES_RECIPIENT: target inbox(es)
     """
+    from botocore.exceptions import ClientError
+
     if not SES_SENDER:
         raise ValueError("SES_SENDER is not configured")
 
@@ -48,7 +48,7 @@ def send_report_email(date_str: str, markdown_report: str) -> Dict[str, Any]:
 
     subject = f"Daily Incident Report - {date_str}"
 
-    ses = boto3.client("ses")
+    ses = get_ses_client()
 
     try:
         response = ses.send_email(
@@ -0,0 +1,302 @@
+import gzip
+import posixpath
+import zlib
+from typing import Any, Callable, Dict, List, Optional
+
+from ..utils.aws_clients import get_s3_client
+from ..utils.config import REPORT_EMAIL_MAX_BYTES, REPORT_GZIP_ENABLED, REPORT_GZIP_LEVEL
+from ..utils.logging_utils import get_logger, log_json
+from .daily_report import summary_document
+from .manifest import MANIFEST_NAME, manifest_entry, update_manifest
+from .s3_multipart import S3MultipartWriter, same_etag
+from .send_email import send_report_email
+
+logger = get_logger(__name__)
+
+MARKDOWN_CONTENT_TYPE = "text/markdown; charset=utf-8"
+JSON_CONTENT_TYPE = "application/json; charset=utf-8"
+
+
+def report_content_encoding() -> Optional[str]:
+    """Content-Encoding reports are stored with (None = stored as-is)."""
+    return "gzip" if REPORT_GZIP_ENABLED else None
+
+
+def report_object_args(
+    metadata: Optional[Dict[str, str]] = None, content_type: str = MARKDOWN_CONTENT_TYPE
+) -> Dict[str, Any]:
+    args: Dict[str, Any] = {"ContentType": content_type, "ContentDisposition": "inline"}
+    if report_content_encoding():
+        args["ContentEncoding"] = report_content_encoding()
+    if metadata:
+        args["Metadata"] = metadata
+    return args
+
+
+def encode_report_body(markdown_report: str) -> bytes:
+    """The bytes stored in S3 for a whole report (gzip with mtime 0)."""
+    body = markdown_report.encode("utf-8")
+    if REPORT_GZIP_ENABLED:
+        body = gzip.compress(body, compresslevel=REPORT_GZIP_LEVEL, mtime=0)
+    return body
+
+
+class SinkContext:
+    """What every sink knows about the report being published."""
+
+    def __init__(
+        self,
+        date_str: str,
+        bucket: str,
+        key: str,
+        metadata: Optional[Dict[str, str]] = None,
+        existing_etag: Optional[str] = None,
+        summary: Optional[Dict[str, Any]] = None,
+    ):
+        self.date_str = date_str
+        self.bucket = bucket
+        self.key = key
+        self.metadata = metadata
+        self.existing_etag = existing_etag
+        self.summary = summary
+
+    @property
+    def location(self) -> str:
+        return f"s3://{self.bucket}/{self.key}"
+
+
+class ReportSink:
+    """
+    One delivery target of the daily report.
+
+    `write` receives the chunks of the report rendered in `format` (see
+    `daily_report.REPORT_FORMATS`) in order on the rendering thread and
+    should only buffer or hand off. `finish` runs once rendering is done,
+    concurrently with the other sinks' `finish`, and returns the sink's
+    result dict ({"status": ...}). `unchanged` tells whether the target
+    already holds exactly this report (None: cannot tell); when every
+    sink that can tell says so, all sinks get `finish(unchanged=True)`
+    and notifications are skipped. `abort` discards the delivery when
+    rendering fails.
+    """
+
+    name = ""
+    format = "markdown"
+
+    def write(self, chunk: str) -> None:
+        raise NotImplementedError
+
+    def unchanged(self) -> Optional[bool]:
+        return None
+
+    def finish(self, unchanged: bool = False) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def abort(self) -> None:
+        pass
+
+
+class S3ReportSink(ReportSink):
+    """
+    Stream the report into S3 (gzip-encoded unless REPORT_GZIP_ENABLED is
+    false) with a multipart upload, parts uploading while rendering runs.
+    The gzip stream has a zero mtime, so identical reports get identical
+    ETags and the existing object is left alone, whatever `finish` is told.
+    """
+
+    name = "s3"
+    content_type = MARKDOWN_CONTENT_TYPE
+
+    def __init__(self, ctx: SinkContext):
+        self.ctx = ctx
+        self.key = self.object_key(ctx)
+        self.existing_etag = self.lookup_existing_etag(ctx)
+        self.writer = S3MultipartWriter(
+            ctx.bucket,
+            self.key,
+            client=get_s3_client(),
+            **report_object_args(ctx.metadata, self.content_type),
+        )
+        # wbits=31: gzip container; zlib writes mtime 0 in the header.
+        self._gzip = (
+            zlib.compressobj(REPORT_GZIP_LEVEL, zlib.DEFLATED, 31)
+            if REPORT_GZIP_ENABLED
+            else None
+        )
+        self.uncompressed_bytes = 0
+        self._flushed = False
+
+    def object_key(self, ctx: SinkContext) -> str:
+        return ctx.key
+
+    def lookup_existing_etag(self, ctx: SinkContext) -> Optional[str]:
+        return ctx.existing_etag
+
+    def write(self, chunk: str) -> None:
+        data = chunk.encode("utf-8")
+        self.uncompressed_bytes += len(data)
+        if self._gzip is not None:
+            data = self._gzip.compress(data)
+        if data:
+            self.writer.write(data)
+
+    def _flush(self) -> None:
+        if self._gzip is not None and not self._flushed:
+            self.writer.write(self._gzip.flush())
+        self._flushed = True
+
+    def unchanged(self) -> Optional[bool]:
+        if self.existing_etag is None:
+            return None
+        self._flush()
+        return same_etag(self.writer.expected_etag(), self.existing_etag)
+
+    def finish(self, unchanged: bool = False) -> Dict[str, Any]:
+        ctx = self.ctx
+        where = {"bucket": ctx.bucket, "key": self.key}
+        try:
+            self._flush()
+            upload = self.writer.close(unless_etag=self.existing_etag)
+        except Exception as e:
+            self.abort()
+            log_json(
+                logger,
+                "error",
+                "Failed to upload daily report to S3",
+                {**where, "date": ctx.date_str, "error": str(e)},
+            )
+            return dict(where, status="FAILED", error=str(e))
+
+        sizes = {"bytes": upload["bytes"], "uncompressed_bytes": self.uncompressed_bytes}
+        if upload["unchanged"]:
+            log_json(
+                logger,
+                "info",
+                "Daily report content unchanged; upload skipped",
+                {**where, "date": ctx.date_str, "etag": upload["etag"]},
+            )
+            return dict(where, status="UNCHANGED", etag=upload["etag"], **sizes)
+
+        log_json(
+            logger,
+            "info",
+            "Daily report uploaded to S3",
+            {**where, "date": ctx.date_str, **upload, **sizes},
+        )
+        return dict(where, status="SUCCESS", etag=upload["etag"], **sizes)
+
+    def abort(self) -> None:
+        try:
+            self.writer.abort()
+        except Exception:
+            pass  # left to the bucket's incomplete-upload lifecycle rule
+
+
+class S3JsonSummarySink(S3ReportSink):
+    """
+    Store the day's JSON summary (counters and detail rows) next to the
+    Markdown report as <date>.json, and record the day in the rolling
+    manifest.json the dashboard lists dates from.
+    """
+
+    name = "json"
+    format = "json"
+    content_type = JSON_CONTENT_TYPE
+
+    def object_key(self, ctx: SinkContext) -> str:
+        return posixpath.splitext(ctx.key)[0] + ".json"
+
+    def lookup_existing_etag(self, ctx: SinkContext) -> Optional[str]:
+        try:
+            return get_s3_client().head_object(Bucket=ctx.bucket, Key=self.key).get("ETag")
+        except Exception:
+            return None
+
+    def finish(self, unchanged: bool = False) -> Dict[str, Any]:
+        result = super().finish(unchanged)
+        if result["status"] == "FAILED" or self.ctx.summary is None:
+            return result
+
+        ctx = self.ctx
+        manifest_key = posixpath.join(posixpath.dirname(self.key), MANIFEST_NAME)
+        entry = manifest_entry(summary_document(ctx.date_str, ctx.summary), self.key)
+        try:
+            result["manifest"] = update_manifest(ctx.bucket, manifest_key, [entry])["status"]
+        except Exception as e:
+            log_json(
+                logger,
+                "error",
+                "Failed to update report manifest",
+                {"bucket": ctx.bucket, "key": manifest_key, "date": ctx.date_str, "error": str(e)},
+            )
+            return dict(result, status="FAILED", error=str(e))
+        return result
+
+
+class EmailReportSink(ReportSink):
+    """
+    Send the report via SES. SES needs the body in one piece, so only the
+    first REPORT_EMAIL_MAX_BYTES are kept; longer reports are cut at a
+    line boundary and point to the full copy in S3.
+    """
+
+    name = "email"
+
+    def __init__(self, ctx: SinkContext, max_bytes: Optional[int] = None):
+        self.ctx = ctx
+        self.max_bytes = REPORT_EMAIL_MAX_BYTES if max_bytes is None else max_bytes
+        self.size = 0
+        self.truncated = False
+        self._parts: List[str] = []
+
+    def write(self, chunk: str) -> None:
+        if self.truncated:
+            return
+        size = len(chunk.encode("utf-8"))
+        if self.size + size <= self.max_bytes:
+            self._parts.append(chunk)
+            self.size += size
+        else:
+            self.truncated = True
+
+    def text(self) -> str:
+        body = "".join(self._parts)
+        if self.truncated:
+            body += f"\n\n_Report truncated for email; full report: {self.ctx.location}_"
+        return body
+
+    def finish(self, unchanged: bool = False) -> Dict[str, Any]:
+        if unchanged:
+            return {"status": "UNCHANGED"}
+        try:
+            return send_report_email(self.ctx.date_str, self.text())
+        except Exception as e:
+            # Configuration errors (no sender / recipients) raise before sending.
+            log_json(
+                logger,
+                "error",
+                "Failed to send daily report email via SES",
+                {"date": self.ctx.date_str, "error": str(e)},
+            )
+            return {"status": "FAILED", "error": str(e)}
+
+
+# Sink name -> factory. Names are what REPORT_SINKS lists; register more
+# targets with `register_sink`.
+SINKS: Dict[str, Callable[[SinkContext], ReportSink]] = {
+    S3ReportSink.name: S3ReportSink,
+    S3JsonSummarySink.name: S3JsonSummarySink,
+    EmailReportSink.name: EmailReportSink,
+}
+
+
+def register_sink(name: str, factory: Callable[[SinkContext], ReportSink]) -> None:
+    SINKS[name] = factory
+
+
+def create_sinks(names: List[str], ctx: SinkContext) -> Dict[str, ReportSink]:
+    """{name: sink} for each distinct name in `names`, in order."""
+    unknown = [n for n in names if n not in SINKS]
+    if unknown:
+        raise ValueError(f"Unknown report sinks: {', '.join(unknown)}")
+    return {name: SINKS[name](ctx) for name in dict.fromkeys(names)}
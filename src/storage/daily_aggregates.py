@@ -0,0 +1,324 @@
+import collections
+import datetime
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..utils.config import DAILY_AGGREGATE_SEEN_CACHE_SIZE
+from ..utils.logging_utils import get_logger, log_json
+from ..utils.resilience import error_code
+
+logger = get_logger(__name__)
+
+# Per-day aggregate: one summary item plus one marker item per instance seen
+# that day, all in partition "SUMMARY#<date>" of the incident table.
+SUMMARY_PREFIX = "SUMMARY#"
+SUMMARY_SK = "SUMMARY"
+INSTANCE_SK_PREFIX = "INSTANCE#"
+
+# Counter attributes on the summary item. Breakdown counters are flat
+# top-level attributes ("event_type:EC2_HIGH_CPU") because UpdateItem ADD
+# cannot create a nested map path that does not exist yet.
+TOTAL_ATTR = "total"
+FAILED_ATTR = "failed"
+UNIQUE_INSTANCES_ATTR = "unique_instances"
+EVENT_TYPE_PREFIX = "event_type:"
+REMEDIATION_TYPE_PREFIX = "remediation_type:"
+# Start marker: sk of the first incident the summary item was created
+# with. Incidents stored before it (on the day aggregation was deployed
+# or enabled) are not in the counters.
+FIRST_SK_ATTR = "first_sk"
+UPDATED_ATTR = "updated_at"
+# Key of the summary dict under which `get_daily_summary` returns the
+# aggregate's own attributes, for `repair_daily_summary`.
+AGGREGATE_KEY = "aggregate"
+
+
+def summary_pk(date_str: str) -> str:
+    return SUMMARY_PREFIX + date_str
+
+
+def is_failed(incident: Dict[str, Any]) -> bool:
+    # 这里你没有 status 字段，我们可以根据 action / message 粗略判断
+    # 比如：包含 "FAILED" 的算失败，这只是一个简单 heuristics
+    return "FAILED" in (
+        (incident.get("action") or "") + (incident.get("message") or "")
+    ).upper()
+
+
+class IncidentTally:
+    """`summarize_incidents` over incidents added one at a time."""
+
+    def __init__(self) -> None:
+        self.total = 0
+        self.failed = 0
+        self.instance_ids: set = set()
+        self.by_event_type: collections.Counter = collections.Counter()
+        self.by_remediation_type: collections.Counter = collections.Counter()
+
+    def add(self, incident: Dict[str, Any]) -> None:
+        self.total += 1
+        self.failed += is_failed(incident)
+        if incident.get("instance_id"):
+            self.instance_ids.add(incident["instance_id"])
+        self.by_event_type[incident.get("event_type", "UNKNOWN")] += 1
+        self.by_remediation_type[incident.get("remediation_type", "UNKNOWN")] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "failed": self.failed,
+            "success": self.total - self.failed,
+            "unique_instances": len(self.instance_ids),
+            "by_event_type": self.by_event_type,
+            "by_remediation_type": self.by_remediation_type,
+        }
+
+
+def summarize_incidents(incidents: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Compute the report summary from the incidents themselves."""
+    tally = IncidentTally()
+    for incident in incidents:
+        tally.add(incident)
+    return tally.summary()
+
+
+def same_counts(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    """True if two summaries hold the same counters."""
+    return all(a[k] == b[k] for k in ("total", "failed", "unique_instances")) and all(
+        +collections.Counter(a[k]) == +collections.Counter(b[k])
+        for k in ("by_event_type", "by_remediation_type")
+    )
+
+
+class DailyAggregator:
+    """
+    Maintain the per-day summary item at write time.
+
+    Each batch of stored incidents becomes one UpdateItem per day that ADDs
+    to the counters. Unique instances are counted exactly: the first
+    incident for an instance on a day creates a marker item with a
+    conditional put and adds 1 to `unique_instances`. A warm-container LRU
+    of markers already written skips the conditional put for repeat
+    instances. The summary item stays the same small size however many
+    incidents a day has, so both the updates and the report's GetItem
+    stay at one capacity unit.
+
+    The item that creates a day's summary also stamps it with its first
+    sk (FIRST_SK_ATTR), so readers can tell whether the counters cover
+    the whole day.
+    """
+
+    def __init__(self, seen_cache_size: Optional[int] = None):
+        self.seen_cache_size = (
+            DAILY_AGGREGATE_SEEN_CACHE_SIZE if seen_cache_size is None else seen_cache_size
+        )
+        self._seen: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _is_seen(self, key: Tuple[str, str]) -> bool:
+        with self._lock:
+            if key in self._seen:
+                self._seen.move_to_end(key)
+                return True
+            return False
+
+    def _mark_seen(self, key: Tuple[str, str]) -> None:
+        if self.seen_cache_size <= 0:
+            return
+        with self._lock:
+            self._seen[key] = None
+            self._seen.move_to_end(key)
+            while len(self._seen) > self.seen_cache_size:
+                self._seen.popitem(last=False)
+
+    def _claim_instance(self, table, date_str: str, instance_id: str) -> bool:
+        """True when this is the first incident for the instance on that day."""
+        from boto3.dynamodb.conditions import Attr
+
+        key = (date_str, instance_id)
+        if self._is_seen(key):
+            return False
+        try:
+            table.put_item(
+                Item={"pk": summary_pk(date_str), "sk": INSTANCE_SK_PREFIX + instance_id},
+                ConditionExpression=Attr("sk").not_exists(),
+            )
+            new = True
+        except Exception as e:
+            if error_code(e) != "ConditionalCheckFailedException":
+                return self._marker_error(date_str, instance_id, e)
+            new = False
+        self._mark_seen(key)
+        return new
+
+    @staticmethod
+    def _marker_error(date_str: str, instance_id: str, error: Exception) -> bool:
+        # Undercount unique instances rather than lose the other counters.
+        log_json(
+            logger,
+            "warning",
+            "Failed to write daily instance marker",
+            {"date": date_str, "instance_id": instance_id, "error": str(error)},
+        )
+        return False
+
+    def record(self, table, items: List[Dict[str, Any]]) -> None:
+        """
+        Add stored incident items to their days' summaries. Errors are
+        logged, never raised: the incidents themselves are already saved.
+        """
+        by_day: Dict[str, List[Dict[str, Any]]] = collections.defaultdict(list)
+        for item in items:
+            by_day[str(item.get("created_at", ""))[:10]].append(item)
+
+        for date_str, day_items in by_day.items():
+            try:
+                self._record_day(table, date_str, day_items)
+            except Exception as e:
+                log_json(
+                    logger,
+                    "error",
+                    "Failed to update daily aggregate",
+                    {"date": date_str, "incidents": len(day_items), "error": str(e)},
+                )
+
+    def _record_day(self, table, date_str: str, items: List[Dict[str, Any]]) -> None:
+        summary = summarize_incidents(items)
+        counters: Dict[str, int] = {
+            TOTAL_ATTR: summary["total"],
+            FAILED_ATTR: summary["failed"],
+        }
+        for event_type, count in summary["by_event_type"].items():
+            counters[EVENT_TYPE_PREFIX + str(event_type)] = count
+        for remediation_type, count in summary["by_remediation_type"].items():
+            counters[REMEDIATION_TYPE_PREFIX + str(remediation_type)] = count
+
+        instance_ids = {i["instance_id"] for i in items if i.get("instance_id")}
+        new_instances = sum(
+            self._claim_instance(table, date_str, instance_id) for instance_id in instance_ids
+        )
+        if new_instances:
+            counters[UNIQUE_INSTANCES_ATTR] = new_instances
+
+        names = {"#updated": UPDATED_ATTR, "#first": FIRST_SK_ATTR}
+        values: Dict[str, Any] = {
+            ":updated": _now(),
+            ":first": min(str(i.get("sk", "")) for i in items),
+        }
+        adds = []
+        for n, (attr, count) in enumerate(counters.items()):
+            names[f"#c{n}"] = attr
+            values[f":c{n}"] = count
+            adds.append(f"#c{n} :c{n}")
+
+        table.update_item(
+            Key={"pk": summary_pk(date_str), "sk": SUMMARY_SK},
+            UpdateExpression=(
+                "SET #updated = :updated, #first = if_not_exists(#first, :first) "
+                "ADD " + ", ".join(adds)
+            ),
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+        )
+
+
+def _now() -> str:
+    return datetime.datetime.utcnow().isoformat() + "Z"
+
+
+def get_daily_summary(table, date_str: str, earliest_sk: str) -> Optional[Dict[str, Any]]:
+    """
+    Read a day's summary with one GetItem, in the shape returned by
+    `summarize_incidents`, plus the aggregate's own attributes under
+    AGGREGATE_KEY. `earliest_sk` is the sk of the day's first incident.
+
+    None when no aggregate exists for that day or it does not cover the
+    whole day: it has no start marker (created before markers existed) or
+    started after `earliest_sk`, e.g. on the day aggregation was deployed.
+    """
+    item = table.get_item(Key={"pk": summary_pk(date_str), "sk": SUMMARY_SK}).get("Item")
+    if not item:
+        return None
+    first_sk = item.get(FIRST_SK_ATTR)
+    if first_sk is None or (earliest_sk and earliest_sk < first_sk):
+        log_json(
+            logger,
+            "info",
+            "Daily aggregate does not cover the whole day; summarizing incidents",
+            {"date": date_str, "first_sk": first_sk, "earliest_sk": earliest_sk},
+        )
+        return None
+
+    by_event_type: collections.Counter = collections.Counter()
+    by_remediation_type: collections.Counter = collections.Counter()
+    for attr, value in item.items():
+        if attr.startswith(EVENT_TYPE_PREFIX):
+            by_event_type[attr[len(EVENT_TYPE_PREFIX) :]] = int(value)
+        elif attr.startswith(REMEDIATION_TYPE_PREFIX):
+            by_remediation_type[attr[len(REMEDIATION_TYPE_PREFIX) :]] = int(value)
+
+    total = int(item.get(TOTAL_ATTR, 0))
+    failed = int(item.get(FAILED_ATTR, 0))
+    return {
+        "total": total,
+        "failed": failed,
+        "success": total - failed,
+        "unique_instances": int(item.get(UNIQUE_INSTANCES_ATTR, 0)),
+        "by_event_type": by_event_type,
+        "by_remediation_type": by_remediation_type,
+        AGGREGATE_KEY: {FIRST_SK_ATTR: first_sk, UPDATED_ATTR: item.get(UPDATED_ATTR)},
+    }
+
+
+def repair_daily_summary(
+    table, date_str: str, stored: Dict[str, Any], actual: Dict[str, Any], first_sk: str
+) -> bool:
+    """
+    Overwrite a day's aggregate (`stored`, from `get_daily_summary`) with
+    the counters of a full pass over its incidents (`actual`), e.g. after
+    an UpdateItem was lost. The write is conditional on the aggregate not
+    having been updated since it was read, so increments made meanwhile
+    are never clobbered; a skipped repair is retried by the next report.
+    Returns True if the aggregate was replaced.
+    """
+    from boto3.dynamodb.conditions import Attr
+
+    item: Dict[str, Any] = {
+        "pk": summary_pk(date_str),
+        "sk": SUMMARY_SK,
+        UPDATED_ATTR: _now(),
+        FIRST_SK_ATTR: first_sk,
+        TOTAL_ATTR: actual["total"],
+        FAILED_ATTR: actual["failed"],
+        UNIQUE_INSTANCES_ATTR: actual["unique_instances"],
+    }
+    for event_type, count in actual["by_event_type"].items():
+        item[EVENT_TYPE_PREFIX + str(event_type)] = count
+    for remediation_type, count in actual["by_remediation_type"].items():
+        item[REMEDIATION_TYPE_PREFIX + str(remediation_type)] = count
+
+    try:
+        table.put_item(
+            Item=item,
+            ConditionExpression=Attr(UPDATED_ATTR).eq(stored[AGGREGATE_KEY][UPDATED_ATTR]),
+        )
+    except Exception as e:
+        log_json(
+            logger,
+            "info" if error_code(e) == "ConditionalCheckFailedException" else "warning",
+            "Daily aggregate not repaired",
+            {"date": date_str, "error": str(e)},
+        )
+        return False
+    log_json(
+        logger,
+        "warning",
+        "Daily aggregate repaired from incidents",
+        {"date": date_str, "stored_total": stored["total"], "total": actual["total"]},
+    )
+    return True
+
+
+# Module-level so the marker LRU survives across warm invocations.
+daily_aggregator = DailyAggregator()
@@ -0,0 +1,227 @@
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from ..utils.aws_clients import get_dynamodb_table
+from ..utils.config import (
+    IDEMPOTENCY_CACHE_SIZE,
+    IDEMPOTENCY_LEASE_SECONDS,
+    IDEMPOTENCY_TABLE_NAME,
+    IDEMPOTENCY_TTL_SECONDS,
+)
+from ..utils.logging_utils import get_logger, log_json
+from ..utils.resilience import error_code
+
+logger = get_logger(__name__)
+
+STATUS_IN_PROGRESS = "IN_PROGRESS"
+STATUS_COMPLETED = "COMPLETED"
+# Processed in part (e.g. some of a multi-instance event's incidents could
+# not be stored); the result records the progress for the retry to resume.
+STATUS_PARTIAL = "PARTIAL"
+
+_UNSET = object()
+
+
+def idempotency_key(event: Dict[str, Any], instance_id: Optional[str] = None) -> Optional[str]:
+    """
+    Stable key for one delivery of an alarm.
+
+    Uses the EventBridge event `id` when present; otherwise the alarm name,
+    state-change time and instance. Returns None when the event carries
+    neither, in which case it is not de-duplicated.
+    """
+    if not isinstance(event, dict):
+        return None
+
+    if event.get("id"):
+        return "event#" + str(event["id"])
+
+    detail = event.get("detail") or {}
+    alarm_name = detail.get("alarmName") or event.get("AlarmName")
+    state = detail.get("state") if isinstance(detail.get("state"), dict) else {}
+    changed_at = state.get("timestamp") or event.get("StateChangeTime") or event.get("time")
+    if alarm_name and changed_at:
+        return f"alarm#{alarm_name}#{changed_at}#{instance_id or '-'}"
+
+    return None
+
+
+class IdempotencyStore:
+    """
+    Two-level de-duplication of alarm deliveries.
+
+    A warm-container LRU holds recently completed results. Misses fall
+    through to a conditional put on DynamoDB that claims the key
+    (IN_PROGRESS, with a lease so a crashed invocation does not block
+    retries forever). Completed records keep the serialized result and an
+    `expires_at` attribute for DynamoDB TTL; partial ones keep the progress
+    made, and are handed to the next delivery that claims the key. Without
+    a table (empty IDEMPOTENCY_TABLE_NAME) only the LRU is consulted.
+    """
+
+    def __init__(
+        self,
+        table: Any = _UNSET,
+        ttl_seconds: Optional[int] = None,
+        lease_seconds: Optional[int] = None,
+        cache_size: Optional[int] = None,
+    ):
+        self._table = table
+        self.ttl_seconds = IDEMPOTENCY_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.lease_seconds = (
+            IDEMPOTENCY_LEASE_SECONDS if lease_seconds is None else lease_seconds
+        )
+        self.cache_size = IDEMPOTENCY_CACHE_SIZE if cache_size is None else cache_size
+        # key -> {"status": COMPLETED or PARTIAL, "result": ...}
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def table(self):
+        if self._table is _UNSET:
+            self._table = (
+                get_dynamodb_table(IDEMPOTENCY_TABLE_NAME) if IDEMPOTENCY_TABLE_NAME else None
+            )
+        return self._table
+
+    @staticmethod
+    def _item_key(key: str) -> Dict[str, str]:
+        return {"pk": "IDEMPOTENCY#" + key, "sk": "IDEMPOTENCY"}
+
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+            return result
+
+    def _cache_put(self, key: str, status: str, result: Dict[str, Any]) -> None:
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            self._cache[key] = {"status": status, "result": result}
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def begin(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Claim `key` for processing.
+
+        Returns None when the caller should process the event, or a dict
+        {"status": ..., "result": ...} describing the earlier delivery when
+        this one is a duplicate. When the earlier delivery was only partly
+        processed the key is claimed all the same and its PARTIAL record is
+        returned, for the caller to finish the rest. Store errors fail open
+        (process the event).
+        """
+        cached = self._cache_get(key)
+        if cached is not None and cached["status"] == STATUS_COMPLETED:
+            return dict(cached)
+        if self.table is None:
+            if cached is not None:
+                with self._lock:
+                    self._cache.pop(key, None)
+            return cached
+
+        from boto3.dynamodb.conditions import Attr
+
+        now = int(time.time())
+        item = dict(
+            self._item_key(key),
+            status=STATUS_IN_PROGRESS,
+            lease_expires_at=now + self.lease_seconds,
+            expires_at=now + self.ttl_seconds,
+        )
+        claimable = (
+            Attr("pk").not_exists()
+            | Attr("expires_at").lt(now)
+            | Attr("status").eq(STATUS_PARTIAL)
+            | (Attr("status").eq(STATUS_IN_PROGRESS) & Attr("lease_expires_at").lt(now))
+        )
+
+        try:
+            old = self.table.put_item(
+                Item=item, ConditionExpression=claimable, ReturnValues="ALL_OLD"
+            ).get("Attributes")
+            if old and old.get("status") == STATUS_PARTIAL and old.get("expires_at", 0) >= now:
+                return {"status": STATUS_PARTIAL, "result": json.loads(old["result"])}
+            # A checkpoint this container could not write to the table.
+            return dict(cached) if cached is not None else None
+        except Exception as e:
+            if error_code(e) != "ConditionalCheckFailedException":
+                self._store_error("claim", key, e)
+                return None
+
+        try:
+            existing = self.table.get_item(Key=self._item_key(key), ConsistentRead=True).get("Item")
+        except Exception as e:
+            self._store_error("read", key, e)
+            return None
+        if not existing:
+            return None
+
+        result = json.loads(existing["result"]) if existing.get("result") else None
+        if existing.get("status") == STATUS_COMPLETED and result is not None:
+            self._cache_put(key, STATUS_COMPLETED, result)
+        return {"status": existing.get("status"), "result": result}
+
+    def complete(self, key: str, result: Dict[str, Any]) -> None:
+        """Record the result of a processed event."""
+        self._record(key, STATUS_COMPLETED, result, "complete")
+
+    def checkpoint(self, key: str, progress: Dict[str, Any]) -> None:
+        """
+        Record the progress of a partly processed event and give up the
+        claim, so its retry is processed again and handed `progress`.
+        """
+        self._record(key, STATUS_PARTIAL, progress, "checkpoint")
+
+    def _record(self, key: str, status: str, result: Dict[str, Any], operation: str) -> None:
+        self._cache_put(key, status, result)
+        if self.table is None:
+            return
+        try:
+            self.table.put_item(
+                Item=dict(
+                    self._item_key(key),
+                    status=status,
+                    result=json.dumps(result, default=str),
+                    expires_at=int(time.time()) + self.ttl_seconds,
+                )
+            )
+        except Exception as e:
+            self._store_error(operation, key, e)
+
+    def release(self, key: str) -> None:
+        """Forget a claim so a retry of the same event is processed again."""
+        with self._lock:
+            self._cache.pop(key, None)
+        if self.table is None:
+            return
+        try:
+            self.table.delete_item(Key=self._item_key(key))
+        except Exception as e:
+            self._store_error("release", key, e)
+
+    def clear(self) -> None:
+        """Forget cached results and re-resolve the table on next use."""
+        with self._lock:
+            self._cache.clear()
+            self._table = _UNSET
+
+    @staticmethod
+    def _store_error(operation: str, key: str, error: Exception) -> None:
+        log_json(
+            logger,
+            "warning",
+            "Idempotency store unavailable; continuing without de-duplication",
+            {"operation": operation, "key": key, "error": str(error)},
+        )
+
+
+# Module-level so the LRU survives across warm invocations.
+idempotency_store = IdempotencyStore()
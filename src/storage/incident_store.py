@@ -0,0 +1,243 @@
+import time
+import uuid
+import datetime
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..utils.config import (
+    INCIDENT_BATCH_MAX_DELAY_SECONDS,
+    INCIDENT_STORE_BACKEND,
+    INCIDENT_STORE_PATH,
+)
+from .payload_codec import encode_raw_event
+
+# BatchWriteItem accepts at most 25 put/delete requests per call; also the
+# default number of items IncidentBatchWriter buffers before a flush.
+BATCH_WRITE_LIMIT = 25
+
+# Backends `get_incident_store` can build, selected by INCIDENT_STORE_BACKEND.
+INCIDENT_STORE_BACKENDS = ("dynamodb", "sqlite")
+
+IncidentKey = Tuple[str, str]
+
+
+def incident_key(item: Dict[str, Any]) -> IncidentKey:
+    return item["pk"], item["sk"]
+
+
+def day_range(date_str: str) -> Tuple[str, str]:
+    """[start, end) created_at bounds of the incidents of `date_str`."""
+    day = datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
+    return date_str, (day + datetime.timedelta(days=1)).isoformat()
+
+
+class IncidentStore:
+    """
+    Where incident items are written and read back for reports.
+
+    Items are the dicts built by `build_incident_item` (pk/sk layout,
+    raw event encoded by the payload codec). Backends implement `put`,
+    `put_batch` and `query_range`; the daily summary and report
+    fingerprint are optional shortcuts that return None when the backend
+    cannot provide them cheaply, in which case callers compute them from
+    the incidents.
+    """
+
+    name = ""
+
+    def put(self, item: Dict[str, Any]) -> None:
+        """Store one item; raises on failure."""
+        raise NotImplementedError
+
+    def put_batch(self, items: List[Dict[str, Any]]) -> Dict[IncidentKey, Dict[str, Any]]:
+        """
+        Store several items. Returns a per-item outcome keyed by (pk, sk):
+        {"status": "SUCCESS"} or {"status": "FAILED", "error": ...}.
+        """
+        raise NotImplementedError
+
+    def query_range(
+        self, start: str, end: str, event_types: Optional[List[str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield incidents with `start` <= created_at < `end` (ISO strings or
+        dates), ordered by created_at, optionally only of `event_types`.
+        """
+        raise NotImplementedError
+
+    def incidents_for_date(self, date_str: str) -> Iterator[Dict[str, Any]]:
+        """The incidents of one UTC day, ordered by created_at."""
+        return self.query_range(*day_range(date_str))
+
+    def daily_summary(self, date_str: str) -> Optional[Dict[str, Any]]:
+        """The day's summary (`summarize_incidents` shape), or None."""
+        return None
+
+    def fingerprint(
+        self, date_str: str, summary: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, str]]:
+        """Change detector for the day's report (see `report_fingerprint`), or None."""
+        return None
+
+    def repair_daily_summary(
+        self,
+        date_str: str,
+        stored: Dict[str, Any],
+        actual: Dict[str, Any],
+        first_sk: str,
+    ) -> None:
+        """
+        Correct the day's `stored` summary, which a full pass over its
+        incidents (the first with sk `first_sk`) found to be `actual`.
+        Nothing to do for stores that do not keep one.
+        """
+
+
+def build_incident_item(
+    event_type: str,
+    instance_id: str,
+    remediation: Dict[str, Any],
+    raw_event: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Build the incident item (pk/sk layout) without writing it. The raw
+    event is stored through the payload codec; read it back with
+    `payload_codec.decode_raw_event(item)`.
+    """
+    now = datetime.datetime.utcnow().isoformat() + "Z"
+    incident_id = str(uuid.uuid4())
+    pk = "INCIDENT#" + str(event_type)
+    sk = now + "#" + incident_id
+
+    item = {
+        "pk": pk,
+        "sk": sk,
+        "event_type": event_type,
+        "instance_id": instance_id,
+        "remediation_type": remediation.get("remediation_type"),
+        "action": remediation.get("action"),
+        "message": remediation.get("message"),
+        "created_at": now,
+    }
+    item.update(encode_raw_event(raw_event, pk, sk))
+    return item
+
+
+def put_incident(
+    event_type: str,
+    instance_id: str,
+    remediation: Dict[str, Any],
+    raw_event: Dict[str, Any],
+) -> Dict[str, Any]:
+    item = build_incident_item(event_type, instance_id, remediation, raw_event)
+    get_incident_store().put(item)
+    return item
+
+
+class IncidentBatchWriter:
+    """
+    Buffer incident items and persist them with `IncidentStore.put_batch`
+    (BatchWriteItem on DynamoDB, one transaction on SQLite).
+
+    Items are flushed once the buffer holds `max_items` items or the
+    oldest buffered item is older than `max_delay_seconds` (checked on
+    `add`), and whenever `flush()` is called or the writer is used as a
+    context manager and exits. Per-item outcomes are collected in
+    `outcomes`, keyed by (pk, sk). Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        store: Optional[IncidentStore] = None,
+        max_items: int = BATCH_WRITE_LIMIT,
+        max_delay_seconds: Optional[float] = None,
+    ):
+        self.store = store if store is not None else get_incident_store()
+        self.max_items = max(1, max_items)
+        self.max_delay_seconds = (
+            INCIDENT_BATCH_MAX_DELAY_SECONDS
+            if max_delay_seconds is None
+            else max_delay_seconds
+        )
+
+        self.outcomes: Dict[IncidentKey, Dict[str, Any]] = {}
+        self._buffer: List[Dict[str, Any]] = []
+        self._oldest: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "IncidentBatchWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.flush()
+
+    def add(self, item: Dict[str, Any]) -> None:
+        """Buffer one item, flushing if a size or age threshold is reached."""
+        with self._lock:
+            self._buffer.append(item)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            due = len(self._buffer) >= self.max_items or (
+                time.monotonic() - self._oldest >= self.max_delay_seconds
+            )
+            pending = self._take() if due else []
+        if pending:
+            self._write(pending)
+
+    def flush(self) -> Dict[IncidentKey, Dict[str, Any]]:
+        """Write everything still buffered and return all outcomes so far."""
+        with self._lock:
+            pending = self._take()
+        if pending:
+            self._write(pending)
+        return self.outcomes
+
+    def _take(self) -> List[Dict[str, Any]]:
+        pending, self._buffer, self._oldest = self._buffer, [], None
+        return pending
+
+    def _write(self, items: List[Dict[str, Any]]) -> None:
+        try:
+            outcomes = self.store.put_batch(items)
+        except Exception as e:
+            outcomes = {incident_key(i): {"status": "FAILED", "error": str(e)} for i in items}
+        with self._lock:
+            self.outcomes.update(outcomes)
+
+
+_store: Optional[IncidentStore] = None
+_store_lock = threading.Lock()
+
+
+def create_incident_store(backend: str, path: Optional[str] = None) -> IncidentStore:
+    """A new store for `backend` ("dynamodb" or "sqlite" at `path`)."""
+    if backend == "dynamodb":
+        from .dynamodb_client import DynamoDBIncidentStore
+
+        return DynamoDBIncidentStore()
+    if backend == "sqlite":
+        from .sqlite_store import SQLiteIncidentStore
+
+        return SQLiteIncidentStore(path or INCIDENT_STORE_PATH)
+    raise ValueError(
+        f"Unsupported incident store backend: {backend} "
+        f"(expected one of {', '.join(INCIDENT_STORE_BACKENDS)})"
+    )
+
+
+def get_incident_store() -> IncidentStore:
+    """The configured store (INCIDENT_STORE_BACKEND), reused across warm invocations."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_incident_store(INCIDENT_STORE_BACKEND)
+    return _store
+
+
+def set_incident_store(store: Optional[IncidentStore]) -> None:
+    """Replace the configured store (local runs, benchmarks); None resets it."""
+    global _store
+    with _store_lock:
+        _store = store
+
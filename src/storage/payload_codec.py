@@ -0,0 +1,189 @@
+import gzip
+import json
+import base64
+import zlib
+from typing import Any, Dict, Optional
+
+from ..utils.aws_clients import get_s3_client
+from ..utils.config import (
+    RAW_EVENT_BUCKET_NAME,
+    RAW_EVENT_COMPRESSION_LEVEL,
+    RAW_EVENT_OFFLOAD_BYTES,
+    RAW_EVENT_PREFIX,
+    RAW_EVENT_STORAGE,
+)
+from ..utils.logging_utils import get_logger, log_json
+
+logger = get_logger(__name__)
+
+# Incident attributes written by the codec. Items written before it keep the
+# original nested map under "raw_event" and are still decoded.
+RAW_EVENT_ATTR = "raw_event"
+BLOB_ATTR = "raw_event_blob"
+ENCODING_ATTR = "raw_event_encoding"
+REF_ATTR = "raw_event_ref"
+
+ENCODING_JSON = "json"
+ENCODING_ZLIB = "zlib-d1"
+ENCODING_S3 = "s3"
+
+# Preset dictionary for raw zlib streams. Alarm events are a few hundred
+# bytes, too short for zlib to find much repetition in on its own, so they
+# are compressed against the keys and values every alarm event shares.
+# Existing items depend on these exact bytes: never edit it, add a new
+# encoding ("zlib-d2") with a new dictionary instead.
+_ZDICT = json.dumps(
+    [
+        {
+            "detail-type": "EC2 Instance State-change Notification",
+            "source": "aws.ec2",
+            "detail": {"instance-id": "i-", "state": "stopped"},
+        },
+        {
+            "version": "0",
+            "id": "",
+            "detail-type": "CloudWatch Alarm State Change",
+            "source": "aws.cloudwatch",
+            "account": "",
+            "time": "",
+            "region": "",
+            "resources": ["arn:aws:cloudwatch:"],
+            "alarmName": "",
+            "metric": {"dimensions": [{"name": "InstanceId", "value": "i-"}]},
+            "detail": {
+                "alarmName": "",
+                "state": {
+                    "value": "ALARM",
+                    "reason": "Threshold Crossed: 1 datapoint",
+                    "timestamp": "",
+                },
+                "previousState": {"value": "OK", "reason": "", "timestamp": ""},
+                "configuration": {
+                    "metrics": [
+                        {
+                            "id": "",
+                            "metricStat": {
+                                "metric": {
+                                    "namespace": "AWS/EC2",
+                                    "metricName": "StatusCheckFailed CPUUtilization",
+                                    "dimensions": {"InstanceId": "i-"},
+                                },
+                                "period": 300,
+                                "stat": "Average Minimum",
+                            },
+                            "returnData": True,
+                        }
+                    ]
+                },
+            },
+        },
+    ],
+    separators=(",", ":"),
+).encode("utf-8")
+
+
+def _compress(data: bytes) -> bytes:
+    compressor = zlib.compressobj(
+        RAW_EVENT_COMPRESSION_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=_ZDICT
+    )
+    return compressor.compress(data) + compressor.flush()
+
+
+def _decompress(data: bytes) -> bytes:
+    decompressor = zlib.decompressobj(-zlib.MAX_WBITS, zdict=_ZDICT)
+    return decompressor.decompress(data) + decompressor.flush()
+
+
+def _offload(data: bytes, pk: str, sk: str) -> Optional[str]:
+    """Upload the payload gzip-encoded to S3; return its s3:// URI or None."""
+    if not RAW_EVENT_BUCKET_NAME:
+        return None
+    key = f"{RAW_EVENT_PREFIX}{pk}/{sk}.json.gz"
+    try:
+        get_s3_client().put_object(
+            Bucket=RAW_EVENT_BUCKET_NAME,
+            Key=key,
+            Body=gzip.compress(data),
+            ContentType="application/json",
+            ContentEncoding="gzip",
+        )
+    except Exception as e:
+        log_json(
+            logger,
+            "warning",
+            "Failed to offload raw event to S3; storing it inline",
+            {"bucket": RAW_EVENT_BUCKET_NAME, "key": key, "error": str(e)},
+        )
+        return None
+    return f"s3://{RAW_EVENT_BUCKET_NAME}/{key}"
+
+
+def encode_raw_event(raw_event: Any, pk: str, sk: str) -> Dict[str, Any]:
+    """
+    Return the incident attributes that store `raw_event`.
+
+    With RAW_EVENT_STORAGE=map the event is kept as a nested map, as
+    before. Otherwise it becomes compact JSON in a binary attribute,
+    deflated against a preset dictionary when that is smaller. Payloads
+    still above RAW_EVENT_OFFLOAD_BYTES are moved to S3 and only a pointer
+    is stored.
+    """
+    if RAW_EVENT_STORAGE == "map":
+        return {RAW_EVENT_ATTR: raw_event}
+
+    data = json.dumps(
+        raw_event, separators=(",", ":"), ensure_ascii=False, default=str
+    ).encode("utf-8")
+    compressed = _compress(data)
+    if len(compressed) < len(data):
+        blob, encoding = compressed, ENCODING_ZLIB
+    else:
+        blob, encoding = data, ENCODING_JSON
+
+    if len(blob) > RAW_EVENT_OFFLOAD_BYTES:
+        uri = _offload(data, pk, sk)
+        if uri is not None:
+            return {ENCODING_ATTR: ENCODING_S3, REF_ATTR: uri}
+
+    return {ENCODING_ATTR: encoding, BLOB_ATTR: blob}
+
+
+def _fetch(uri: str) -> bytes:
+    bucket, _, key = uri[len("s3://") :].partition("/")
+    body = get_s3_client().get_object(Bucket=bucket, Key=key)["Body"].read()
+    # botocore does not undo Content-Encoding, so the body is still gzipped.
+    return gzip.decompress(body) if body[:2] == b"\x1f\x8b" else body
+
+
+def decode_raw_event(item: Dict[str, Any]) -> Any:
+    """
+    Return the raw event stored on an incident item, decoding (or fetching
+    from S3) only now. Returns None when the item carries no raw event.
+    A string blob is read as base64, as binary attributes appear in JSON
+    exports of the table ({"B": ...} in DynamoDB JSON).
+    """
+    encoding = item.get(ENCODING_ATTR)
+    if encoding is None:
+        return item.get(RAW_EVENT_ATTR)
+
+    if encoding == ENCODING_S3:
+        return json.loads(_fetch(item[REF_ATTR]))
+
+    blob = item[BLOB_ATTR]
+    if isinstance(blob, dict) and "B" in blob:
+        blob = blob["B"]
+    if isinstance(blob, str):
+        data = base64.b64decode(blob, validate=True)
+    else:
+        # The boto3 resource layer wraps binary attributes in `Binary`.
+        data = bytes(getattr(blob, "value", blob))
+    if encoding == ENCODING_ZLIB:
+        data = _decompress(data)
+    elif encoding != ENCODING_JSON:
+        raise ValueError(f"Unknown raw event encoding: {encoding}")
+    return json.loads(data)
+
+
+def without_payload(item: Dict[str, Any]) -> Dict[str, Any]:
+    """The item minus its (possibly binary) raw event, for logging."""
+    return {k: v for k, v in item.items() if k not in (RAW_EVENT_ATTR, BLOB_ATTR)}
@@ -0,0 +1,229 @@
+import json
+import sqlite3
+import collections
+import threading
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..utils.logging_utils import get_logger, log_json
+from .incident_store import IncidentKey, IncidentStore, day_range, incident_key
+from .payload_codec import BLOB_ATTR, ENCODING_ATTR, REF_ATTR
+
+logger = get_logger(__name__)
+
+# Incident attributes stored as columns, in table order. Anything else on
+# an item (e.g. a legacy nested `raw_event` map) goes to `attributes` as
+# JSON.
+COLUMNS = (
+    "pk",
+    "sk",
+    "created_at",
+    "event_type",
+    "instance_id",
+    "remediation_type",
+    "action",
+    "message",
+    ENCODING_ATTR,
+    BLOB_ATTR,
+    REF_ATTR,
+)
+ATTRIBUTES_COLUMN = "attributes"
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS incidents (
+    pk TEXT NOT NULL,
+    sk TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    event_type TEXT,
+    instance_id TEXT,
+    remediation_type TEXT,
+    action TEXT,
+    message TEXT,
+    {ENCODING_ATTR} TEXT,
+    {BLOB_ATTR} BLOB,
+    {REF_ATTR} TEXT,
+    {ATTRIBUTES_COLUMN} TEXT,
+    PRIMARY KEY (pk, sk)
+);
+CREATE INDEX IF NOT EXISTS incidents_created_at ON incidents (created_at);
+CREATE INDEX IF NOT EXISTS incidents_instance_id ON incidents (instance_id, created_at);
+CREATE INDEX IF NOT EXISTS incidents_event_type ON incidents (event_type, created_at);
+"""
+
+_INSERT = (
+    f"INSERT OR REPLACE INTO incidents ({', '.join(COLUMNS)}, {ATTRIBUTES_COLUMN}) "
+    f"VALUES ({', '.join('?' * (len(COLUMNS) + 1))})"
+)
+_SELECT = f"SELECT {', '.join(COLUMNS)}, {ATTRIBUTES_COLUMN} FROM incidents"
+
+# Same heuristic as daily_aggregates.is_failed, in SQL.
+_FAILED_SQL = "instr(upper(coalesce(action, '') || coalesce(message, '')), 'FAILED') > 0"
+
+
+def _to_row(item: Dict[str, Any]) -> Tuple[Any, ...]:
+    values = [item.get(column) for column in COLUMNS]
+    values[2] = values[2] or ""
+    blob = values[9]
+    if blob is not None:
+        # The boto3 resource layer wraps binary attributes in `Binary`.
+        values[9] = bytes(getattr(blob, "value", blob))
+    rest = {k: v for k, v in item.items() if k not in COLUMNS}
+    values.append(json.dumps(rest, separators=(",", ":"), default=str) if rest else None)
+    return tuple(values)
+
+
+def _to_item(row: Tuple[Any, ...]) -> Dict[str, Any]:
+    item = {column: value for column, value in zip(COLUMNS, row) if value is not None}
+    if row[-1] is not None:
+        item.update(json.loads(row[-1]))
+    return item
+
+
+class SQLiteIncidentStore(IncidentStore):
+    """
+    Incidents in a local SQLite database, for running the pipeline and
+    the report without AWS.
+
+    The database is in WAL mode, so report reads run alongside writes,
+    and indexed on created_at (day ranges), (instance_id, created_at) and
+    (event_type, created_at). Each thread gets its own connection. The
+    daily summary and report fingerprint are computed with aggregate
+    queries over the created_at index instead of reading the incidents.
+    Items come back without attributes that were stored as None.
+
+    `path` may be ":memory:" for a private in-memory database shared by
+    the store's threads.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._uri = path == ":memory:"
+        if self._uri:
+            self.path = f"file:incidents-{uuid.uuid4().hex}?mode=memory&cache=shared"
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        # Created eagerly: sets up the schema, and keeps an in-memory
+        # database alive for as long as the store.
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path, uri=self._uri, timeout=30, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Durable at checkpoints; a crash can lose the last commits, not corrupt.
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self) -> None:
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def put(self, item: Dict[str, Any]) -> None:
+        conn = self._connection()
+        with conn:
+            conn.execute(_INSERT, _to_row(item))
+
+    def put_batch(self, items: List[Dict[str, Any]]) -> Dict[IncidentKey, Dict[str, Any]]:
+        """All items in one transaction: they are stored or fail together."""
+        conn = self._connection()
+        try:
+            with conn:
+                conn.executemany(_INSERT, map(_to_row, items))
+            outcome: Dict[str, Any] = {"status": "SUCCESS"}
+        except sqlite3.Error as e:
+            outcome = {"status": "FAILED", "error": str(e)}
+            log_json(
+                logger,
+                "error",
+                "Failed to persist incidents to SQLite",
+                {"path": self.path, "failed": len(items), "error": str(e)},
+            )
+        return {incident_key(item): outcome for item in items}
+
+    def _where(
+        self, start: str, end: str, event_types: Optional[List[str]] = None
+    ) -> Tuple[str, List[Any]]:
+        clause = " WHERE created_at >= ? AND created_at < ?"
+        params: List[Any] = [start, end]
+        if event_types is not None:
+            clause += f" AND event_type IN ({', '.join('?' * len(event_types))})"
+            params.extend(event_types)
+        return clause, params
+
+    def query_range(
+        self, start: str, end: str, event_types: Optional[List[str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        clause, params = self._where(start, end, event_types)
+        cursor = self._connection().execute(_SELECT + clause + " ORDER BY created_at", params)
+        try:
+            while True:
+                rows = cursor.fetchmany(1000)
+                if not rows:
+                    return
+                for row in rows:
+                    yield _to_item(row)
+        finally:
+            cursor.close()
+
+    def daily_summary(self, date_str: str) -> Optional[Dict[str, Any]]:
+        clause, params = self._where(*day_range(date_str))
+        conn = self._connection()
+        groups = conn.execute(
+            "SELECT coalesce(event_type, 'UNKNOWN'), coalesce(remediation_type, 'UNKNOWN'), "
+            f"count(*), sum({_FAILED_SQL}) FROM incidents{clause} GROUP BY 1, 2",
+            params,
+        ).fetchall()
+        (unique_instances,) = conn.execute(
+            f"SELECT count(DISTINCT instance_id) FROM incidents{clause} AND instance_id != ''",
+            params,
+        ).fetchone()
+
+        by_event_type: collections.Counter = collections.Counter()
+        by_remediation_type: collections.Counter = collections.Counter()
+        total = failed = 0
+        for event_type, remediation_type, count, failures in groups:
+            by_event_type[event_type] += count
+            by_remediation_type[remediation_type] += count
+            total += count
+            failed += failures or 0
+        return {
+            "total": total,
+            "failed": failed,
+            "success": total - failed,
+            "unique_instances": unique_instances,
+            "by_event_type": by_event_type,
+            "by_remediation_type": by_remediation_type,
+        }
+
+    def fingerprint(
+        self, date_str: str, summary: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, str]]:
+        from ..reporting.daily_report import REPORT_FORMAT_VERSION
+
+        clause, params = self._where(*day_range(date_str))
+        conn = self._connection()
+        latest = conn.execute(
+            f"SELECT sk FROM incidents{clause} ORDER BY created_at DESC, sk DESC LIMIT 1",
+            params,
+        ).fetchone()
+        if summary is not None:
+            count = summary["total"]
+        else:
+            (count,) = conn.execute(f"SELECT count(*) FROM incidents{clause}", params).fetchone()
+        return {
+            "incident-count": str(count),
+            "max-sk": latest[0] if latest else "-",
+            "format-version": REPORT_FORMAT_VERSION,
+        }
@@ -1,28 +1,159 @@
 import os
-from typing import Any
-from boto3.session import Session
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+from .config import (
+    AWS_CONNECT_TIMEOUT,
+    AWS_DEFAULT_MAX_ATTEMPTS,
+    AWS_MAX_ATTEMPTS,
+    AWS_MAX_POOL_CONNECTIONS,
+    AWS_READ_TIMEOUT,
+    AWS_RETRY_MODE,
+    CIRCUIT_BREAKER_ENABLED,
+)
+from .metrics import instrument_client
+from .resilience import protect_client
 
 DEFAULT_REGION = "ap-southeast-2"
 AWS_REGION = os.getenv("AWS_REGION", DEFAULT_REGION)
 AWS_PROFILE = os.getenv("AWS_PROFILE", None)
 
-if AWS_PROFILE:
-    session = Session(profile_name=AWS_PROFILE, region_name=AWS_REGION)
-else:
-    session = Session(region_name=AWS_REGION)
+if TYPE_CHECKING:
+    from boto3.session import Session
+    from botocore.config import Config
+
+# boto3/botocore are imported, and the session, clients and resources are
+# created, on first use and memoized at module level, so importing this
+# module stays cheap and the pool survives across warm invocations.
+# Creating them is not thread-safe, hence the lock; using a client is.
+_lock = threading.Lock()
+_session: Optional["Session"] = None
+_client_configs: Dict[str, "Config"] = {}
+_clients: Dict[Tuple[str, str], Any] = {}
+_resources: Dict[Tuple[str, str], Any] = {}
+_tables: Dict[Tuple[str, str], Any] = {}
+
+
+def get_client_config(service: str = "") -> "Config":
+    """
+    botocore Config for `service`'s clients: enough pooled connections for
+    the batch / query worker threads, TCP keep-alive so warm containers
+    reuse sockets, timeouts well below the Lambda timeout, and adaptive
+    retries with the service's attempt budget (AWS_MAX_ATTEMPTS).
+    """
+    config = _client_configs.get(service)
+    if config is None:
+        from botocore.config import Config
+
+        config = Config(
+            max_pool_connections=AWS_MAX_POOL_CONNECTIONS,
+            tcp_keepalive=True,
+            connect_timeout=AWS_CONNECT_TIMEOUT,
+            read_timeout=AWS_READ_TIMEOUT,
+            retries={
+                "mode": AWS_RETRY_MODE,
+                "total_max_attempts": AWS_MAX_ATTEMPTS.get(service, AWS_DEFAULT_MAX_ATTEMPTS),
+            },
+        )
+        config = _client_configs.setdefault(service, config)
+    return config
+
+
+def _wrap_client(client: Any) -> Any:
+    """Time the client's calls and, if enabled, guard them with a circuit breaker."""
+    instrument_client(client)
+    if CIRCUIT_BREAKER_ENABLED:
+        protect_client(client)
+    return client
+
+
+def _get_session_locked() -> "Session":
+    global _session
+    if _session is None:
+        from boto3.session import Session
+
+        if AWS_PROFILE:
+            _session = Session(profile_name=AWS_PROFILE, region_name=AWS_REGION)
+        else:
+            _session = Session(region_name=AWS_REGION)
+    return _session
+
+
+def get_session() -> "Session":
+    with _lock:
+        return _get_session_locked()
+
+
+def get_client(service: str, region: Optional[str] = None) -> Any:
+    """Return the pooled low-level client for (service, region)."""
+    key = (service, region or AWS_REGION)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _wrap_client(
+                _get_session_locked().client(
+                    service, region_name=key[1], config=get_client_config(service)
+                )
+            )
+            _clients[key] = client
+    return client
+
+
+def get_resource(service: str, region: Optional[str] = None) -> Any:
+    """Return the pooled boto3 service resource for (service, region)."""
+    key = (service, region or AWS_REGION)
+    resource = _resources.get(key)
+    if resource is not None:
+        return resource
+
+    with _lock:
+        resource = _resources.get(key)
+        if resource is None:
+            resource = _get_session_locked().resource(
+                service, region_name=key[1], config=get_client_config(service)
+            )
+            _wrap_client(resource.meta.client)
+            _resources[key] = resource
+    return resource
+
+
+def get_dynamodb_table(table_name: str, region: Optional[str] = None) -> Any:
+    """Return a pooled DynamoDB Table resource."""
+    key = (table_name, region or AWS_REGION)
+    table = _tables.get(key)
+    if table is None:
+        table = get_resource("dynamodb", region).Table(table_name)
+        with _lock:
+            table = _tables.setdefault(key, table)
+    return table
+
+
+def reset_pools() -> None:
+    """Drop the cached session, clients and resources (tests / benchmarks)."""
+    global _session
+    with _lock:
+        _session = None
+        _client_configs.clear()
+        _clients.clear()
+        _resources.clear()
+        _tables.clear()
 
 
 def get_ec2_client() -> Any:
-    return session.client("ec2")
+    return get_client("ec2")
 
 
 def get_dynamodb_client() -> Any:
-    return session.client("dynamodb")
+    return get_client("dynamodb")
 
 
 def get_ses_client() -> Any:
-    return session.client("ses")
+    return get_client("ses")
 
 
 def get_s3_client() -> Any:
-    return session.client("s3")
+    return get_client("s3")
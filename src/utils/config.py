@@ -3,10 +3,208 @@ import os
 # DynamoDB Table
 INCIDENT_TABLE_NAME = os.getenv("INCIDENT_TABLE_NAME", "incident_events")
 
+# Where incidents are written and read back for reports: "dynamodb" (the
+# table above) or "sqlite" (a local database file at INCIDENT_STORE_PATH,
+# for running the pipeline and report benchmarks without AWS).
+INCIDENT_STORE_BACKEND = os.getenv("INCIDENT_STORE_BACKEND", "dynamodb").lower()
+INCIDENT_STORE_PATH = os.getenv("INCIDENT_STORE_PATH", "incidents.db")
+
+# botocore connection settings shared by every pooled client
+AWS_MAX_POOL_CONNECTIONS = int(os.getenv("AWS_MAX_POOL_CONNECTIONS", "50"))
+AWS_CONNECT_TIMEOUT = float(os.getenv("AWS_CONNECT_TIMEOUT", "2"))
+AWS_READ_TIMEOUT = float(os.getenv("AWS_READ_TIMEOUT", "10"))
+
+# Retries of every AWS call: botocore's "adaptive" mode (jittered
+# exponential backoff, plus a client-side rate limiter that slows down once
+# the service throttles) with a per-service budget of total attempts, so a
+# dead dependency costs seconds rather than the Lambda timeout. SES gets
+# one retry: a timed-out send may have gone out. AWS_MAX_ATTEMPTS overrides
+# it per service ("ses=1,dynamodb=8").
+AWS_RETRY_MODE = os.getenv("AWS_RETRY_MODE", "adaptive").lower()
+AWS_MAX_ATTEMPTS = {
+    "dynamodb": 5,
+    "ec2": 4,
+    "s3": 4,
+    "ses": 2,
+    **{
+        k.strip(): int(v)
+        for k, _, v in (
+            pair.partition("=") for pair in os.getenv("AWS_MAX_ATTEMPTS", "").split(",")
+        )
+        if k.strip() and v.strip()
+    },
+}
+AWS_DEFAULT_MAX_ATTEMPTS = int(os.getenv("AWS_DEFAULT_MAX_ATTEMPTS", "3"))
+
+# Circuit breaker per (service, region): after CIRCUIT_BREAKER_FAILURES
+# consecutive calls fail as throttled or transient (retries included),
+# calls fail fast with CircuitOpenError for CIRCUIT_BREAKER_RESET_SECONDS,
+# then a single trial call decides whether to close it.
+CIRCUIT_BREAKER_ENABLED = os.getenv("CIRCUIT_BREAKER_ENABLED", "true").lower() == "true"
+CIRCUIT_BREAKER_FAILURES = int(os.getenv("CIRCUIT_BREAKER_FAILURES", "5"))
+CIRCUIT_BREAKER_RESET_SECONDS = float(os.getenv("CIRCUIT_BREAKER_RESET_SECONDS", "30"))
+
+# Worker threads used to process SQS/SNS record batches concurrently
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "8"))
+# Worker threads remediating the instances of one multi-instance alarm
+REMEDIATION_MAX_WORKERS = int(os.getenv("REMEDIATION_MAX_WORKERS", "8"))
+
+# Buffered incident writes (BatchWriteItem)
+INCIDENT_BATCH_MAX_DELAY_SECONDS = float(
+    os.getenv("INCIDENT_BATCH_MAX_DELAY_SECONDS", "1.0")
+)
+INCIDENT_BATCH_MAX_RETRIES = int(os.getenv("INCIDENT_BATCH_MAX_RETRIES", "5"))
+
+# Remediation safety switch: only DryRun EC2 actions unless explicitly "false"
+DRY_RUN_ONLY = os.getenv("DRY_RUN_ONLY", "true").lower() == "true"
+
+# Coalescing of EC2 remediation calls during batch invocations
+EC2_BATCH_WINDOW_SECONDS = float(os.getenv("EC2_BATCH_WINDOW_SECONDS", "0.05"))
+EC2_BATCH_MAX_INSTANCES = int(os.getenv("EC2_BATCH_MAX_INSTANCES", "50"))
+
+# Remediation rate limits (remediation/rate_limit). By default each warm
+# container only limits itself. Set RATE_LIMIT_TABLE_NAME (preferably a
+# table of its own, with DynamoDB TTL on `expires_at`) to share the counters
+# (pk = "RATELIMIT#...") across containers; that costs a GetItem/UpdateItem
+# per remediation and per EC2 token lease.
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_TABLE_NAME = os.getenv("RATE_LIMIT_TABLE_NAME", "")
+RATE_LIMIT_CACHE_SIZE = int(os.getenv("RATE_LIMIT_CACHE_SIZE", "10000"))
+# Per instance: at most INSTANCE_ACTION_LIMIT real actions of one kind
+# (reboot, start) in any INSTANCE_ACTION_WINDOW_SECONDS; further ones are
+# recorded as SUPPRESSED. DryRun-only actions are not counted. 0 disables it.
+INSTANCE_ACTION_LIMIT = int(os.getenv("INSTANCE_ACTION_LIMIT", "3"))
+INSTANCE_ACTION_WINDOW_SECONDS = int(os.getenv("INSTANCE_ACTION_WINDOW_SECONDS", "3600"))
+# Token bucket on EC2 API calls (DryRun included) per account and region:
+# EC2_API_RATE_PER_SECOND on average, bursts up to EC2_API_BURST. Containers
+# lease EC2_API_TOKEN_LEASE tokens per counter update; a call waits up to
+# EC2_API_MAX_WAIT_SECONDS for a token, then fails so the event is retried.
+# AWS_ACCOUNT_ID names the account in the bucket key. A rate of 0 disables it.
+EC2_API_RATE_PER_SECOND = float(os.getenv("EC2_API_RATE_PER_SECOND", "5"))
+EC2_API_BURST = int(os.getenv("EC2_API_BURST", "50"))
+EC2_API_TOKEN_LEASE = int(os.getenv("EC2_API_TOKEN_LEASE", "5"))
+EC2_API_MAX_WAIT_SECONDS = float(os.getenv("EC2_API_MAX_WAIT_SECONDS", "2"))
+AWS_ACCOUNT_ID = os.getenv("AWS_ACCOUNT_ID", "")
+
+# Cached EC2 DryRun permission probes (warm container). Scope is "region"
+# (one probe per action and region) or "instance" (one per instance).
+# Only real actions (DRY_RUN_ONLY=false) skip a cached probe.
+PERMISSION_CACHE_TTL_SECONDS = float(os.getenv("PERMISSION_CACHE_TTL_SECONDS", "900"))
+PERMISSION_CACHE_SCOPE = os.getenv("PERMISSION_CACHE_SCOPE", "region").lower()
+
+# De-duplication of repeated alarm deliveries. By default each warm
+# container only de-duplicates what it has completed itself. Set
+# IDEMPOTENCY_TABLE_NAME (preferably a table of its own, with DynamoDB TTL on
+# `expires_at`) to claim every event there (pk = "IDEMPOTENCY#<key>"): two
+# PutItems per event, plus a GetItem/DeleteItem on duplicates and failures.
+IDEMPOTENCY_ENABLED = os.getenv("IDEMPOTENCY_ENABLED", "true").lower() == "true"
+IDEMPOTENCY_TABLE_NAME = os.getenv("IDEMPOTENCY_TABLE_NAME", "")
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_LEASE_SECONDS = int(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "900"))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "1024"))
+
+# Per-day summary item maintained at write time (pk = "SUMMARY#<date>" in
+# the incident table), read by the daily report instead of recomputing the
+# summary. Off by default: it adds an UpdateItem and a conditional PutItem
+# per incident write, and a GetItem per report.
+DAILY_AGGREGATES_ENABLED = os.getenv("DAILY_AGGREGATES_ENABLED", "false").lower() == "true"
+# Warm-container memory of (date, instance) markers already written.
+DAILY_AGGREGATE_SEEN_CACHE_SIZE = int(os.getenv("DAILY_AGGREGATE_SEEN_CACHE_SIZE", "10000"))
+
+# Partitions (pk = "INCIDENT#<event_type>") the daily report queries directly,
+# besides the event types of the router's rules. Comma-separated.
+INCIDENT_EVENT_TYPES = [
+    t.strip()
+    for t in os.getenv(
+        "INCIDENT_EVENT_TYPES",
+        "EC2_HIGH_CPU,EC2_STATUS_CHECK_FAILED,EC2_UNEXPECTED_STOP,UNKNOWN",
+    ).split(",")
+    if t.strip()
+]
+
+# Daily report query fan-out
+REPORT_QUERY_WORKERS = int(os.getenv("REPORT_QUERY_WORKERS", "4"))
+# When true (default), a filtered scan also picks up incidents stored under
+# any other partition and logs a warning naming them. The scan reads the
+# whole table; set false once every event type is queried directly.
+REPORT_SCAN_UNKNOWN_PARTITIONS = (
+    os.getenv("REPORT_SCAN_UNKNOWN_PARTITIONS", "true").lower() == "true"
+)
+
+# Read strategy for the daily report: "query" (per-partition key conditions)
+# or "scan" (segmented full-table scan, for tables predating the pk/sk layout).
+REPORT_READ_MODE = os.getenv("REPORT_READ_MODE", "query").lower()
+
+# Parallel (segmented) scan tuning
+SCAN_TOTAL_SEGMENTS = int(os.getenv("SCAN_TOTAL_SEGMENTS", "4"))
+SCAN_MAX_IN_FLIGHT_PAGES = int(os.getenv("SCAN_MAX_IN_FLIGHT_PAGES", "8"))
+
 # S3 bucket
 REPORT_BUCKET_NAME = os.getenv("REPORT_BUCKET_NAME", "")
 REPORT_PREFIX = os.getenv("REPORT_PREFIX", "daily-reports/")
 
+# How incidents store raw_event: "compressed" (binary attribute, offloaded
+# to S3 above RAW_EVENT_OFFLOAD_BYTES) or "map" (nested map, legacy).
+# Raw events carry account and instance details, so they are only offloaded
+# to a dedicated private bucket, never the (publicly read) report bucket;
+# with RAW_EVENT_BUCKET_NAME empty, large payloads stay inline.
+RAW_EVENT_STORAGE = os.getenv("RAW_EVENT_STORAGE", "compressed").lower()
+RAW_EVENT_COMPRESSION_LEVEL = int(os.getenv("RAW_EVENT_COMPRESSION_LEVEL", "9"))
+RAW_EVENT_OFFLOAD_BYTES = int(os.getenv("RAW_EVENT_OFFLOAD_BYTES", "16384"))
+RAW_EVENT_BUCKET_NAME = os.getenv("RAW_EVENT_BUCKET_NAME", "")
+RAW_EVENT_PREFIX = os.getenv("RAW_EVENT_PREFIX", "raw-events/")
+
+# Streaming report upload (S3 multipart) and the copy kept for the email body
+REPORT_UPLOAD_PART_SIZE = int(os.getenv("REPORT_UPLOAD_PART_SIZE", str(8 * 1024 * 1024)))
+REPORT_UPLOAD_MAX_IN_FLIGHT = int(os.getenv("REPORT_UPLOAD_MAX_IN_FLIGHT", "2"))
+REPORT_EMAIL_MAX_BYTES = int(os.getenv("REPORT_EMAIL_MAX_BYTES", str(2 * 1024 * 1024)))
+
+# Report objects are stored gzip-encoded (Content-Encoding: gzip), which
+# browsers and CloudFront decode transparently.
+REPORT_GZIP_ENABLED = os.getenv("REPORT_GZIP_ENABLED", "true").lower() == "true"
+REPORT_GZIP_LEVEL = int(os.getenv("REPORT_GZIP_LEVEL", "6"))
+
+# Delivery targets of the daily report, finished concurrently once the
+# report is rendered. Comma-separated names from reporting.sinks.SINKS.
+REPORT_SINKS = [
+    s.strip() for s in os.getenv("REPORT_SINKS", "s3,json,email").split(",") if s.strip()
+]
+
+# Rolling index of published days (REPORT_PREFIX + "manifest.json") kept by
+# the "json" sink for the dashboard.
+REPORT_MANIFEST_MAX_DAYS = int(os.getenv("REPORT_MANIFEST_MAX_DAYS", "400"))
+REPORT_MANIFEST_RETRIES = int(os.getenv("REPORT_MANIFEST_RETRIES", "5"))
+
+# Date-range report backfill (no email; reports only go to S3)
+BACKFILL_MAX_WORKERS = int(os.getenv("BACKFILL_MAX_WORKERS", "8"))
+BACKFILL_MAX_DAYS = int(os.getenv("BACKFILL_MAX_DAYS", "366"))
+BACKFILL_SINKS = [
+    s.strip() for s in os.getenv("BACKFILL_SINKS", "s3,json").split(",") if s.strip()
+]
+
+# Structured logging (utils/logging_utils)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info").lower()
+# Each field of a log record's `extra` is capped at this many bytes of JSON;
+# 0 disables the cap.
+LOG_MAX_FIELD_BYTES = int(os.getenv("LOG_MAX_FIELD_BYTES", "4096"))
+# "auto" (orjson when installed), "orjson" or "json".
+LOG_JSON_ENCODER = os.getenv("LOG_JSON_ENCODER", "auto").lower()
+# Fraction of events whose info/debug logs are written, by default and per
+# event type ("EC2_HIGH_CPU=0.1,EC2_UNEXPECTED_STOP=0.5").
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+LOG_SAMPLE_RATES = {
+    k.strip(): float(v)
+    for k, _, v in (
+        pair.partition("=") for pair in os.getenv("LOG_SAMPLE_RATES", "").split(",")
+    )
+    if k.strip() and v.strip()
+}
+
+# Per-step and per-AWS-call timings (utils/metrics), written to the logs in
+# CloudWatch Embedded Metric Format so they become metrics without API calls.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_NAMESPACE = os.getenv("METRICS_NAMESPACE", "CloudIncidentAutoRemediation")
+
 # SES
 SES_SENDER = os.getenv("SES_SENDER", "")
 SES_RECIPIENT = os.getenv("SES_RECIPIENT", "")
@@ -28,5 +226,11 @@ def validate_basic_config() -> None:
         missing.append("SES_RECIPIENT")
 
     if missing:
+        from .logging_utils import get_logger, log_json
 
-        print(f"[config] Missing important environment variables: {', '.join(missing)}")
+        log_json(
+            get_logger(__name__),
+            "warning",
+            "Missing important environment variables",
+            {"missing": missing},
+        )
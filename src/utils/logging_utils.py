@@ -1,6 +1,28 @@
+import contextlib
+import contextvars
+import decimal
+import functools
+import hashlib
 import logging
 import json
-from typing import Any, Dict, Optional
+import random
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from .config import (
+    LOG_JSON_ENCODER,
+    LOG_LEVEL,
+    LOG_MAX_FIELD_BYTES,
+    LOG_SAMPLE_RATE,
+    LOG_SAMPLE_RATES,
+)
+
+_LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "critical": logging.CRITICAL,
+}
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -19,11 +41,130 @@ def get_logger(name: str) -> logging.Logger:
         )
         handler.setFormatter(formatter)
         logger.addHandler(handler)
-        logger.setLevel(logging.INFO)
+        logger.setLevel(_LEVELS.get(LOG_LEVEL, logging.INFO))
+        # The handler above writes the record; don't pass it on to a parent
+        # package's logger (e.g. src.remediation) to be written again.
+        logger.propagate = False
 
     return logger
 
 
+def _default(value: Any) -> Any:
+    if isinstance(value, decimal.Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (bytes, bytearray)):
+        return f"<{len(value)} bytes>"
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return str(value)
+
+
+# One encoder instance: json.dumps with options builds a new one per call.
+_json_dumps = json.JSONEncoder(ensure_ascii=False, default=_default).encode
+
+
+def _load_encoder() -> Callable[[Any], str]:
+    if LOG_JSON_ENCODER == "json":
+        return _json_dumps
+    try:
+        import orjson
+    except ImportError:
+        if LOG_JSON_ENCODER == "orjson":
+            raise
+        return _json_dumps
+
+    options = orjson.OPT_NON_STR_KEYS
+
+    def _orjson_dumps(value: Any) -> str:
+        try:
+            return orjson.dumps(value, default=_default, option=options).decode("utf-8")
+        except TypeError:
+            # e.g. integers beyond 64 bits; the stdlib encoder copes.
+            return _json_dumps(value)
+
+    return _orjson_dumps
+
+
+# orjson when installed (LOG_JSON_ENCODER=auto), else the stdlib encoder.
+dumps = _load_encoder()
+
+
+@functools.lru_cache(maxsize=1024)
+def _key(name: Any) -> str:
+    return dumps(str(name))
+
+
+def _field(value: Any) -> str:
+    """JSON for one `extra` field, capped at LOG_MAX_FIELD_BYTES."""
+    text = dumps(value)
+    if LOG_MAX_FIELD_BYTES <= 0 or len(text) <= LOG_MAX_FIELD_BYTES:
+        return text
+    if isinstance(value, str):
+        keep = max(0, LOG_MAX_FIELD_BYTES - 64)
+        return dumps(f"{value[:keep]}...(truncated, {len(value)} chars)")
+    # Oversized structures (raw events, large results) become a digest, so
+    # identical payloads can still be correlated across log lines.
+    return dumps(
+        {
+            "truncated": True,
+            "bytes": len(text),
+            "sha256": hashlib.sha256(text.encode("utf-8")).hexdigest()[:16],
+            "preview": text[:256],
+        }
+    )
+
+
+class _JsonMessage:
+    """
+    Log message rendered to JSON only when a handler formats it, and at
+    most once however many handlers there are.
+    """
+
+    __slots__ = ("message", "extra", "_text")
+
+    def __init__(self, message: str, extra: Optional[Dict[str, Any]]):
+        self.message = message
+        self.extra = extra
+        self._text: Optional[str] = None
+
+    def __str__(self) -> str:
+        if self._text is None:
+            parts = ['{"message": ', dumps(self.message)]
+            if self.extra:
+                fields = ", ".join(
+                    f"{_key(k)}: {_field(v)}" for k, v in self.extra.items()
+                )
+                parts.append(f', "extra": {{{fields}}}')
+            parts.append("}")
+            self._text = "".join(parts)
+        return self._text
+
+
+# Whether info/debug records of the current event are kept (see log_sampling).
+_keep_info: "contextvars.ContextVar[bool]" = contextvars.ContextVar("keep_info", default=True)
+
+
+def sample_rate(key: Optional[str]) -> float:
+    return LOG_SAMPLE_RATES.get(key, LOG_SAMPLE_RATE) if key is not None else LOG_SAMPLE_RATE
+
+
+@contextlib.contextmanager
+def log_sampling(key: Optional[str]) -> Iterator[bool]:
+    """
+    Sample the info/debug logs written inside the block, as a whole: one
+    draw against the rate for `key` (an event type; LOG_SAMPLE_RATES, else
+    LOG_SAMPLE_RATE) keeps or drops all of them, so kept events have
+    complete traces. Warnings and errors are always written.
+    """
+    rate = sample_rate(key)
+    keep = rate >= 1.0 or random.random() < rate
+    token = _keep_info.set(keep)
+    try:
+        yield keep
+    finally:
+        _keep_info.reset(token)
+
+
 def log_json(
     logger: logging.Logger,
     level: str,
@@ -35,21 +176,17 @@ def log_json(
 
     This helps keep Lambda logs consistent and easy to query
     using CloudWatch Logs Insights.
+
+    Nothing is serialized unless the record is emitted: disabled levels
+    and info/debug records sampled out by `log_sampling` cost one check.
+    Each `extra` field is capped at LOG_MAX_FIELD_BYTES (long strings are
+    truncated, large structures replaced by a digest). `extra` is
+    serialized when the handler formats the record, so don't mutate it
+    afterwards if records may be queued.
     """
-    payload: Dict[str, Any] = {"message": message}
-    if extra:
-        payload["extra"] = extra
-
-    text = json.dumps(payload, ensure_ascii=False)
-
-    level = level.lower()
-    if level == "debug":
-        logger.debug(text)
-    elif level == "warning":
-        logger.warning(text)
-    elif level == "error":
-        logger.error(text)
-    elif level == "critical":
-        logger.critical(text)
-    else:
-        logger.info(text)
+    levelno = _LEVELS.get(level.lower(), logging.INFO)
+    if levelno < logging.WARNING and not _keep_info.get():
+        return
+    if not logger.isEnabledFor(levelno):
+        return
+    logger.log(levelno, _JsonMessage(message, extra))
@@ -0,0 +1,270 @@
+import contextlib
+import contextvars
+import json
+import logging
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+from .config import METRICS_ENABLED, METRICS_NAMESPACE
+
+# CloudWatch EMF accepts at most 100 values per metric in one record.
+MAX_VALUES_PER_METRIC = 100
+
+Emitter = Callable[[str], None]
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def _stdout_emitter() -> Emitter:
+    # EMF records must be bare JSON log lines, without the "[INFO] name -"
+    # prefix our other loggers add.
+    logger = logging.getLogger("emf")
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger.info
+
+
+_emitter: Optional[Emitter] = None
+
+
+def set_emitter(emitter: Optional[Emitter]) -> None:
+    """
+    Send EMF lines to `emitter` instead of stdout (None restores stdout),
+    e.g. `set_emitter(lines.append)` to assert on them offline.
+    """
+    global _emitter
+    _emitter = emitter
+
+
+def _emit(line: str) -> None:
+    global _emitter
+    if _emitter is None:
+        _emitter = _stdout_emitter()
+    _emitter(line)
+
+
+class MetricsContext:
+    """
+    Metrics of one unit of work (an event, an invocation), written as a
+    single CloudWatch Embedded Metric Format record when flushed.
+
+    `span` times a block in milliseconds and `count` adds to a counter;
+    repeated samples of a metric are kept as a list of values. The
+    dimensions are the same for every metric of the record. Safe to use
+    from several threads.
+    """
+
+    def __init__(
+        self,
+        namespace: Optional[str] = None,
+        emitter: Optional[Emitter] = None,
+        **dimensions: str,
+    ):
+        self.namespace = namespace or METRICS_NAMESPACE
+        self.emitter = emitter
+        self.dimensions: Dict[str, str] = {k: str(v) for k, v in dimensions.items()}
+        self.properties: Dict[str, Any] = {}
+        self._metrics: Dict[str, Dict[str, Any]] = {}
+        self._counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def set_dimensions(self, **dimensions: Any) -> None:
+        with self._lock:
+            self.dimensions.update((k, str(v)) for k, v in dimensions.items())
+
+    def set_property(self, name: str, value: Any) -> None:
+        with self._lock:
+            self.properties[name] = value
+
+    def put_metric(self, name: str, value: float, unit: str = "None") -> None:
+        with self._lock:
+            metric = self._metrics.setdefault(name, {"unit": unit, "values": []})
+            metric["values"].append(value)
+            full = len(metric["values"]) >= MAX_VALUES_PER_METRIC
+        if full:
+            self.flush()
+
+    def count(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    @contextlib.contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.put_metric(name, round((time.perf_counter() - started) * 1000, 3), "Milliseconds")
+
+    def to_emf(self) -> Optional[Dict[str, Any]]:
+        """The EMF record for everything recorded so far (None if empty)."""
+        with self._lock:
+            return self._record_locked()
+
+    def _record_locked(self) -> Optional[Dict[str, Any]]:
+        if not self._metrics and not self._counters:
+            return None
+        definitions: List[Dict[str, str]] = []
+        record: Dict[str, Any] = {}
+        for name, metric in self._metrics.items():
+            definitions.append({"Name": name, "Unit": metric["unit"]})
+            values = metric["values"]
+            record[name] = values[0] if len(values) == 1 else list(values)
+        for name, value in self._counters.items():
+            definitions.append({"Name": name, "Unit": "Count"})
+            record[name] = value
+        record.update(self.properties)
+        record.update(self.dimensions)
+        record["_aws"] = {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [
+                {
+                    "Namespace": self.namespace,
+                    "Dimensions": [list(self.dimensions)],
+                    "Metrics": definitions,
+                }
+            ],
+        }
+        return record
+
+    def flush(self) -> None:
+        """Emit the recorded metrics as one EMF line and start over."""
+        with self._lock:
+            record = self._record_locked()
+            self._metrics = {}
+            self._counters = {}
+        if record is not None:
+            line = json.dumps(record, separators=(",", ":"), default=str)
+            (self.emitter or _emit)(line)
+
+
+class _NullMetrics(MetricsContext):
+    """Stand-in outside any scope (or with METRICS_ENABLED=false)."""
+
+    def put_metric(self, name: str, value: float, unit: str = "None") -> None:
+        pass
+
+    def count(self, name: str, value: float = 1) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+
+_null = _NullMetrics()
+_current: "contextvars.ContextVar[MetricsContext]" = contextvars.ContextVar(
+    "metrics", default=_null
+)
+
+
+def current_metrics() -> MetricsContext:
+    """The innermost `metrics_scope` of this context (a no-op outside one)."""
+    return _current.get()
+
+
+@contextlib.contextmanager
+def metrics_scope(
+    namespace: Optional[str] = None, emitter: Optional[Emitter] = None, **dimensions: Any
+) -> Iterator[MetricsContext]:
+    """
+    Collect the metrics recorded inside the block (by this context's
+    `span`/`count` calls and its AWS calls) and emit them as one EMF line
+    at the end. A block that raises also counts "Errors".
+
+    Worker threads start with an empty context: submit their tasks through
+    `bind_scope` to record into the caller's scope.
+    """
+    if not METRICS_ENABLED:
+        yield _null
+        return
+    metrics = MetricsContext(namespace, emitter, **dimensions)
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    except BaseException:
+        metrics.count("Errors")
+        raise
+    finally:
+        _current.reset(token)
+        metrics.flush()
+
+
+def bind_scope(fn: F) -> F:
+    """
+    `fn`, run in (a copy of) the caller's context wherever it is called,
+    e.g. `pool.submit(bind_scope(task))`, so metrics recorded by a worker
+    thread land in the caller's scope.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args: Any, **kwargs: Any) -> Any:
+        # A context can only be entered by one thread at a time.
+        return context.copy().run(fn, *args, **kwargs)
+
+    return run  # type: ignore[return-value]
+
+
+def span(name: str) -> "contextlib.AbstractContextManager[None]":
+    """Time a block into the current scope, in milliseconds."""
+    return current_metrics().span(name)
+
+
+def count(name: str, value: float = 1) -> None:
+    current_metrics().count(name, value)
+
+
+def _operation_name(model: Any) -> str:
+    service = model.service_model.service_id.replace(" ", "")
+    return f"{service}.{model.name}"
+
+
+def _before_call(model: Any, context: Dict[str, Any], **_: Any) -> None:
+    metrics = current_metrics()
+    if metrics is not _null:
+        context["metrics"] = (metrics, _operation_name(model), time.perf_counter())
+
+
+def _failed(http_response: Any, parsed: Any) -> bool:
+    if http_response is None:  # no response at all (after-call-error)
+        return True
+    if getattr(http_response, "status_code", 200) < 400:
+        return False
+    # A successful EC2 DryRun probe answers with a DryRunOperation error.
+    code = (parsed or {}).get("Error", {}).get("Code")
+    return code != "DryRunOperation"
+
+
+def _after_call(
+    context: Dict[str, Any],
+    http_response: Any = None,
+    parsed: Any = None,
+    **_: Any,
+) -> None:
+    # after-call-error carries neither `model` nor a response.
+    started = context.pop("metrics", None)
+    if started is None:
+        return
+    metrics, name, start = started
+    metrics.put_metric(name, round((time.perf_counter() - start) * 1000, 3), "Milliseconds")
+    if _failed(http_response, parsed):
+        metrics.count(name + ".Errors")
+
+
+def instrument_client(client: Any) -> Any:
+    """
+    Time every API call of a botocore client into the calling context's
+    metrics scope ("<Service>.<Operation>" in milliseconds, retries
+    included; "<Service>.<Operation>.Errors" counts failed calls).
+    """
+    events = client.meta.events
+    # First, so the clock starts even when another handler (e.g. a Stubber)
+    # answers the call.
+    events.register_first("before-call.*.*", _before_call, unique_id="metrics-before-call")
+    events.register("after-call", _after_call, unique_id="metrics-after-call")
+    events.register("after-call-error", _after_call, unique_id="metrics-after-call-error")
+    return client
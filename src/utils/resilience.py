@@ -0,0 +1,283 @@
+import time
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from .config import CIRCUIT_BREAKER_FAILURES, CIRCUIT_BREAKER_RESET_SECONDS
+from .logging_utils import get_logger, log_json
+from .metrics import _operation_name, count
+
+logger = get_logger(__name__)
+
+# Classes of AWS errors, by what the caller should do about them.
+THROTTLED = "throttled"  # slow down and retry later
+TRANSIENT = "transient"  # server or network trouble; retry later
+UNAVAILABLE = "unavailable"  # circuit open: not attempted
+CONFLICT = "conflict"  # a condition or state check failed; retrying will not help
+NOT_FOUND = "not_found"
+DENIED = "denied"  # credentials or IAM permissions
+DRY_RUN = "dry_run"  # an EC2 DryRun that would have succeeded
+INVALID = "invalid"  # anything else the service rejected
+UNKNOWN = "unknown"  # not an AWS error
+
+# Classes that say the dependency is not serving requests; these count
+# towards opening its circuit.
+DEPENDENCY_FAILURES = (THROTTLED, TRANSIENT)
+
+_CODES = {
+    THROTTLED: (
+        "Throttling",
+        "ThrottlingException",
+        "ThrottledException",
+        "RequestThrottled",
+        "RequestThrottledException",
+        "RequestLimitExceeded",
+        "TooManyRequestsException",
+        "ProvisionedThroughputExceededException",
+        "BandwidthLimitExceeded",
+        "LimitExceededException",
+        "SlowDown",
+        "EC2ThrottledException",
+        "TransactionInProgressException",
+    ),
+    TRANSIENT: (
+        "RequestTimeout",
+        "RequestTimeoutException",
+        "PriorRequestNotComplete",
+        "InternalError",
+        "InternalFailure",
+        "InternalServerError",
+        "ServiceUnavailable",
+        "ServiceUnavailableException",
+        "Unavailable",
+    ),
+    CONFLICT: (
+        "ConditionalCheckFailedException",
+        "TransactionConflictException",
+        "PreconditionFailed",
+        "ConditionalRequestConflict",
+        "IncorrectInstanceState",
+        "IncorrectState",
+    ),
+    NOT_FOUND: (
+        "404",
+        "NotFound",
+        "NoSuchKey",
+        "NoSuchUpload",
+        "ResourceNotFoundException",
+        "InvalidInstanceID.NotFound",
+    ),
+    DENIED: (
+        "AccessDenied",
+        "AccessDeniedException",
+        "UnauthorizedOperation",
+        "UnrecognizedClientException",
+        "InvalidClientTokenId",
+        "ExpiredToken",
+        "ExpiredTokenException",
+        "SignatureDoesNotMatch",
+    ),
+    DRY_RUN: ("DryRunOperation",),
+}
+_CLASS_BY_CODE = {code: cls for cls, codes in _CODES.items() for code in codes}
+
+
+class CircuitOpenError(Exception):
+    """A call was not attempted because its dependency's circuit is open."""
+
+
+def error_code(error: BaseException) -> str:
+    """The AWS error code of a ClientError ("" for anything else)."""
+    response = getattr(error, "response", None)
+    if not isinstance(response, dict):
+        return ""
+    return response.get("Error", {}).get("Code") or ""
+
+
+def classify_code(code: str, status: Optional[int] = None) -> str:
+    """Class of an AWS error code, falling back to the HTTP status."""
+    cls = _CLASS_BY_CODE.get(code)
+    if cls is not None:
+        return cls
+    if status == 429:
+        return THROTTLED
+    if status is not None and status >= 500:
+        return TRANSIENT
+    if status == 403:
+        return DENIED
+    if status == 404:
+        return NOT_FOUND
+    return INVALID
+
+
+def classify_error(error: BaseException) -> str:
+    """
+    Class of an exception raised by a boto3 call (THROTTLED, TRANSIENT,
+    CONFLICT, ...), from its error code, HTTP status or exception type.
+    """
+    if isinstance(error, CircuitOpenError):
+        return UNAVAILABLE
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        status = response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+        return classify_code(error_code(error), status)
+
+    from botocore.exceptions import ConnectionError, HTTPClientError
+
+    if isinstance(error, (ConnectionError, HTTPClientError)):
+        return TRANSIENT
+    return UNKNOWN
+
+
+class CircuitBreaker:
+    """
+    Fail fast on a dependency that is down.
+
+    Closed, calls go through. After `failure_threshold` consecutive calls
+    fail with a dependency failure (throttled or transient once botocore's
+    retries are spent) the circuit opens: calls raise CircuitOpenError
+    without being attempted. After `reset_seconds` one trial call is let
+    through (half open); its success closes the circuit, its failure
+    opens it for another `reset_seconds`. Other errors (conditions,
+    validation, permissions) show the dependency answering and count as
+    successes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: Optional[int] = None,
+        reset_seconds: Optional[float] = None,
+    ):
+        self.name = name
+        self.failure_threshold = (
+            CIRCUIT_BREAKER_FAILURES if failure_threshold is None else failure_threshold
+        )
+        self.reset_seconds = (
+            CIRCUIT_BREAKER_RESET_SECONDS if reset_seconds is None else reset_seconds
+        )
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        """True if a call may go ahead (taking the trial slot when half open)."""
+        if self.failure_threshold <= 0:
+            return True
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.reset_seconds:
+                return False
+            # One trial per reset period; if it never reports back another
+            # is let through after the next period.
+            self._opened_at = now
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            was_open = self._opened_at is not None
+            self.failures = 0
+            self._opened_at = None
+        if was_open:
+            log_json(logger, "info", "Circuit closed", {"dependency": self.name})
+
+    def record_failure(self, error: str = "") -> None:
+        with self._lock:
+            self.failures += 1
+            if self.failure_threshold <= 0 or self.failures < self.failure_threshold:
+                return
+            opening = self._opened_at is None
+            self._opened_at = time.monotonic()
+        if opening:
+            log_json(
+                logger,
+                "error",
+                "Circuit opened; failing fast",
+                {
+                    "dependency": self.name,
+                    "failures": self.failures,
+                    "reset_seconds": self.reset_seconds,
+                    "error": error,
+                },
+            )
+
+    def reset(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+
+
+# Module-level so breaker state survives across warm invocations.
+_breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(service: str, region: str) -> CircuitBreaker:
+    """The breaker of (service, region), shared by all its clients."""
+    key = (service, region)
+    breaker = _breakers.get(key)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(key, CircuitBreaker(f"{service}/{region}"))
+    return breaker
+
+
+def reset_breakers() -> None:
+    """Close every circuit (tests / benchmarks)."""
+    with _breakers_lock:
+        _breakers.clear()
+
+
+def _before_call(model: Any, context: Dict[str, Any], **_: Any) -> None:
+    breaker = get_breaker(model.service_model.service_name, context.get("client_region") or "")
+    if not breaker.allow():
+        name = _operation_name(model)
+        count(name + ".CircuitOpen")
+        raise CircuitOpenError(f"{name} not attempted: circuit for {breaker.name} is open")
+    # after-call-error carries no `model`; the context reaches both.
+    context["circuit"] = breaker
+
+
+def _after_call(
+    context: Dict[str, Any], http_response: Any = None, parsed: Any = None, **_: Any
+) -> None:
+    breaker = context.pop("circuit", None)
+    if breaker is None:
+        return
+    status = getattr(http_response, "status_code", 200)
+    code = (parsed or {}).get("Error", {}).get("Code") or ""
+    if status >= 300 and classify_code(code, status) in DEPENDENCY_FAILURES:
+        breaker.record_failure(code or str(status))
+    else:
+        breaker.record_success()
+
+
+def _after_call_error(
+    context: Dict[str, Any], exception: Optional[BaseException] = None, **_: Any
+) -> None:
+    breaker = context.pop("circuit", None)
+    if breaker is not None and classify_error(exception) in DEPENDENCY_FAILURES:
+        breaker.record_failure(str(exception))
+
+
+def protect_client(client: Any) -> Any:
+    """
+    Put a botocore client behind its (service, region) circuit breaker:
+    calls are refused with CircuitOpenError while the circuit is open,
+    and every call's final outcome (after botocore's retries) is recorded.
+    """
+    events = client.meta.events
+    events.register("before-call.*.*", _before_call, unique_id="circuit-before-call")
+    events.register("after-call", _after_call, unique_id="circuit-after-call")
+    events.register("after-call-error", _after_call_error, unique_id="circuit-after-call-error")
+    return client
@@ -0,0 +1,24 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+# Configuration is read at import time; everything below runs against fakes.
+os.environ.setdefault("AWS_REGION", "ap-southeast-2")
+os.environ.setdefault("LOG_LEVEL", "warning")
+os.environ.setdefault("REPORT_BUCKET_NAME", "test-reports")
+os.environ.setdefault("SES_SENDER", "reports@example.com")
+os.environ.setdefault("SES_RECIPIENT", "ops@example.com")
+
+from benchmarks.fakes import installed  # noqa: E402
+
+
+@pytest.fixture
+def aws():
+    """The Lambdas' AWS clients and incident store served by in-memory fakes."""
+    with installed() as fakes:
+        yield fakes
@@ -0,0 +1,71 @@
+import datetime
+import gzip
+import json
+
+import pytest
+
+from src import daily_report_lambda
+from src.storage import dynamodb_client
+from src.storage.dynamodb_client import DynamoDBIncidentStore
+from src.storage.incident_store import build_incident_item
+
+
+@pytest.fixture
+def store(aws, monkeypatch):
+    monkeypatch.setattr(dynamodb_client, "DAILY_AGGREGATES_ENABLED", True)
+    return DynamoDBIncidentStore(aws.table)
+
+
+def _incident(instance_id="i-1", action="REBOOT"):
+    return build_incident_item(
+        "EC2_STATUS_CHECK_FAILED",
+        instance_id,
+        {"type": "EC2_REBOOT", "action": action, "message": ""},
+        {"id": instance_id},
+    )
+
+
+def _today():
+    return datetime.datetime.utcnow().strftime("%Y-%m-%d")
+
+
+def _report_json(aws, date_str):
+    obj = aws.s3.get_object(Bucket="test-reports", Key=f"daily-reports/{date_str}.json")
+    body = obj["Body"].read()
+    if obj.get("ContentEncoding") == "gzip":
+        body = gzip.decompress(body)
+    return json.loads(body)
+
+
+def test_aggregate_covering_the_day_is_used(store):
+    store.put(_incident("i-1"))
+    store.put(_incident("i-2", action="FAILED"))
+    summary = store.daily_summary(_today())
+    assert (summary["total"], summary["failed"], summary["unique_instances"]) == (2, 1, 2)
+
+
+def test_aggregate_started_mid_day_is_not_used(aws, store):
+    # Stored before aggregation was deployed: not in the counters.
+    aws.table.put_item(Item=_incident("i-1"))
+    store.put(_incident("i-2"))
+    assert store.daily_summary(_today()) is None
+    assert daily_report_lambda.daily_report_summary(_today())["total"] == 2
+
+
+def test_lost_aggregate_update_is_reconciled_by_the_report(aws, store):
+    store.put(_incident("i-1"))
+    store.put(_incident("i-2"))
+    # An incident whose aggregate UpdateItem was lost.
+    aws.table.put_item(Item=_incident("i-3"))
+    assert store.daily_summary(_today())["total"] == 2
+
+    result = daily_report_lambda.publish_report(_today())
+    assert result["status"] == "PUBLISHED"
+    document = _report_json(aws, _today())
+    assert document["summary"]["total"] == 3
+    assert len(document["incidents"]) == 3
+    assert aws.ses.requests["SendEmail"] == 1
+
+    repaired = store.daily_summary(_today())
+    assert (repaired["total"], repaired["unique_instances"]) == (3, 3)
+    assert daily_report_lambda.publish_report(_today())["status"] == "UNCHANGED"
@@ -0,0 +1,107 @@
+import datetime
+
+import pytest
+
+from scripts.simulate_event import alarm_event
+from src import daily_report_lambda, event_router, lambda_handler
+from src.reporting import daily_report, s3_multipart
+from src.storage.incident_store import build_incident_item
+
+
+@pytest.fixture
+def today(aws):
+    date_str = datetime.datetime.utcnow().strftime("%Y-%m-%d")
+    lambda_handler.lambda_handler(alarm_event("status_check", "i-1", None, "evt-1"), None)
+    return date_str
+
+
+def _fail_email(monkeypatch, aws):
+    def send_email(**_):
+        raise RuntimeError("SES is down")
+
+    monkeypatch.setattr(aws.ses, "send_email", send_email)
+
+
+def test_unchanged_report_is_not_published_again(aws, today):
+    first = daily_report_lambda.publish_report(today)
+    assert first["status"] == "PUBLISHED"
+    second = daily_report_lambda.publish_report(today)
+    assert second["status"] == "UNCHANGED"
+    assert aws.ses.requests["SendEmail"] == 1
+
+
+def test_failed_sink_is_retried_on_the_next_run(aws, today, monkeypatch):
+    _fail_email(monkeypatch, aws)
+    first = daily_report_lambda.publish_report(today)
+    assert first["status"] == "FAILED"
+    assert first["s3_result"]["status"] == "SUCCESS"
+
+    monkeypatch.undo()
+    retry = daily_report_lambda.publish_report(today)
+    assert retry["status"] == "PUBLISHED"
+    assert retry["email_result"]["status"] != "UNCHANGED"
+    assert aws.ses.requests["SendEmail"] == 1
+
+    assert daily_report_lambda.publish_report(today)["status"] == "UNCHANGED"
+
+
+def test_report_is_rendered_again_when_incidents_change(aws, today):
+    daily_report_lambda.publish_report(today)
+    lambda_handler.lambda_handler(alarm_event("high_cpu", "i-2", None, "evt-2"), None)
+    assert daily_report_lambda.publish_report(today)["status"] == "PUBLISHED"
+    assert aws.ses.requests["SendEmail"] == 2
+
+
+def test_unchanged_multipart_report_is_not_uploaded_again(aws, today, monkeypatch):
+    monkeypatch.setattr(s3_multipart, "MIN_PART_SIZE", 64)
+    monkeypatch.setattr(s3_multipart, "REPORT_UPLOAD_PART_SIZE", 64)
+    # Without a fingerprint (as in scan mode) only the ETag check is left.
+    monkeypatch.setattr(daily_report_lambda, "daily_report_fingerprint", lambda *_: None)
+    sinks = ["s3", "email"]
+    assert daily_report_lambda.publish_report(today, sinks)["status"] == "PUBLISHED"
+    assert aws.s3.requests["CompleteMultipartUpload"] == 1
+    assert aws.s3.requests["CopyObject"] == 1  # the stamp gives the report a new ETag
+
+    again = daily_report_lambda.publish_report(today, sinks)
+    assert again["status"] == "UNCHANGED"
+    assert aws.s3.requests["CompleteMultipartUpload"] == 1
+    assert aws.s3.requests["CopyObject"] == 1
+    assert aws.ses.requests["SendEmail"] == 1
+
+
+def test_repeated_sink_names_are_delivered_once(aws, today):
+    result = daily_report_lambda.publish_report(today, sinks=["s3", "email", "s3", "json"])
+    assert result["status"] == "PUBLISHED"
+    assert {k for k in result if k.endswith("_result")} == {"s3_result", "email_result", "json_result"}
+    assert result["json_result"]["key"].endswith(".json")
+    assert aws.ses.requests["SendEmail"] == 1
+
+
+def _spot_incident(instance_id):
+    return build_incident_item(
+        "EC2_SPOT_INTERRUPTION",
+        instance_id,
+        {"type": "NONE", "action": "NONE", "message": ""},
+        {"id": instance_id},
+    )
+
+
+def test_incident_in_an_unlisted_partition_is_reported(aws, today):
+    aws.table.put_item(Item=_spot_incident("i-spot"))
+
+    report = daily_report.build_daily_report(today)
+    assert "i-spot" in report
+    assert "- Total incidents: 2" in report
+    assert daily_report_lambda.daily_report_fingerprint(today)["incident-count"] == "2"
+
+
+def test_registered_rule_types_are_queried_directly(aws, today, monkeypatch):
+    monkeypatch.setattr(
+        event_router, "_classifier", event_router.EventClassifier(event_router.DEFAULT_RULES)
+    )
+    event_router.register_rule(event_router.Rule("EC2_SPOT_INTERRUPTION", alarm_name="spot"))
+    aws.table.put_item(Item=_spot_incident("i-spot"))
+
+    assert "EC2_SPOT_INTERRUPTION" in daily_report.known_event_types()
+    incidents = daily_report.get_incidents_for_date(aws.table, today, scan_unknown=False)
+    assert {i["instance_id"] for i in incidents} == {"i-1", "i-spot"}
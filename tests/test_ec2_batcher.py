@@ -0,0 +1,97 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+from src.remediation import ec2_batcher
+from src.remediation.permission_cache import permission_cache, resource_scope
+from src.utils import aws_clients
+from src.utils.metrics import bind_scope
+
+
+def test_concurrent_handlers_keep_their_own_batcher():
+    opened, other_done = threading.Event(), threading.Event()
+    seen = {}
+
+    def handler_a():
+        with ec2_batcher.batching() as batcher:
+            opened.set()
+            other_done.wait(5)
+            seen["a"] = ec2_batcher._active_batcher.get() is batcher
+
+    def handler_b():
+        opened.wait(5)
+        seen["b_outside"] = ec2_batcher._active_batcher.get()
+        with ec2_batcher.batching() as batcher:
+            seen["b"] = ec2_batcher._active_batcher.get() is batcher
+        other_done.set()
+
+    threads = [threading.Thread(target=handler_a), threading.Thread(target=handler_b)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    assert seen == {"a": True, "b_outside": None, "b": True}
+    assert ec2_batcher._active_batcher.get() is None
+
+
+def test_worker_threads_inherit_the_batcher():
+    with ec2_batcher.batching() as batcher, ThreadPoolExecutor(2) as pool:
+        active = list(pool.map(bind_scope(lambda _: ec2_batcher._active_batcher.get()), range(4)))
+    assert active == [batcher] * 4
+
+
+def test_batched_actions_share_one_call(aws):
+    with ec2_batcher.batching(window_seconds=0.05), ThreadPoolExecutor(4) as pool:
+        run = bind_scope(lambda i: ec2_batcher.execute_ec2_action("reboot", i, dry_run_only=True))
+        results = list(pool.map(run, ["i-1", "i-2", "i-3"]))
+    assert [r["status"] for r in results] == ["DRY_RUN_OK"] * 3
+    assert aws.ec2.requests["RebootInstances"] == 1
+
+
+def _dry_run_flags(aws, monkeypatch):
+    """The DryRun flag of every RebootInstances call, in order."""
+    flags = []
+    reboot = aws.ec2.reboot_instances
+
+    def record(InstanceIds, DryRun=False, **kwargs):
+        flags.append(DryRun)
+        return reboot(InstanceIds=InstanceIds, DryRun=DryRun, **kwargs)
+
+    monkeypatch.setattr(aws.ec2, "reboot_instances", record)
+    return flags
+
+
+def test_cached_probe_skips_the_dry_run_of_a_later_action(aws, monkeypatch):
+    flags = _dry_run_flags(aws, monkeypatch)
+    for _ in range(2):
+        assert ec2_batcher.run_ec2_action("reboot", ["i-1"])["i-1"]["status"] == "SUCCESS"
+    assert flags == [True, False, False]
+
+
+def test_dry_run_only_actions_always_probe(aws, monkeypatch):
+    flags = _dry_run_flags(aws, monkeypatch)
+    ec2_batcher.run_ec2_action("reboot", ["i-1"])
+    for _ in range(2):
+        result = ec2_batcher.run_ec2_action("reboot", ["i-1"], dry_run_only=True)
+        assert result["i-1"]["status"] == "DRY_RUN_OK"
+    assert flags == [True, False, True, True]
+
+
+def test_unauthorized_operation_drops_the_cached_probe(aws, monkeypatch):
+    flags = _dry_run_flags(aws, monkeypatch)
+    ec2_batcher.run_ec2_action("reboot", ["i-1"])
+    assert permission_cache.is_allowed("reboot", aws_clients.AWS_REGION, resource_scope("i-1"))
+
+    with monkeypatch.context() as revoked:
+        def denied(operation, *_):
+            raise ClientError({"Error": {"Code": "UnauthorizedOperation"}}, operation)
+
+        revoked.setattr(aws.ec2, "_call", denied)
+        result = ec2_batcher.run_ec2_action("reboot", ["i-1"])
+    assert result["i-1"]["error_code"] == "UnauthorizedOperation"
+    assert not permission_cache.is_allowed("reboot", aws_clients.AWS_REGION, resource_scope("i-1"))
+
+    flags.clear()
+    ec2_batcher.run_ec2_action("reboot", ["i-1"])
+    assert flags == [True, False]
@@ -0,0 +1,57 @@
+import pytest
+
+from scripts.simulate_event import alarm_event, state_change_event
+from src.event_router import extract_instance_ids, identify_event_type
+
+
+def test_stopped_instance_is_an_unexpected_stop():
+    assert identify_event_type(state_change_event("i-1", "stopped")) == "EC2_UNEXPECTED_STOP"
+
+
+@pytest.mark.parametrize(
+    "state", ["pending", "running", "stopping", "shutting-down", "terminated"]
+)
+def test_other_instance_states_are_not_classified(state):
+    assert identify_event_type(state_change_event("i-1", state)) == "UNKNOWN"
+
+
+@pytest.mark.parametrize(
+    "kind, event_type",
+    [
+        ("status_check", "EC2_STATUS_CHECK_FAILED"),
+        ("high_cpu", "EC2_HIGH_CPU"),
+    ],
+)
+def test_alarm_events_are_classified_by_metric(kind, event_type):
+    assert identify_event_type(alarm_event(kind, "i-1", None, "evt-1")) == event_type
+
+
+def test_instance_ids_come_from_state_change_events():
+    assert extract_instance_ids(state_change_event("i-1", "stopped")) == ["i-1"]
+
+
+def test_status_check_cpu_alarm_is_a_status_check():
+    event = alarm_event("high_cpu", "i-1", None, "evt-1")
+    event["detail"]["alarmName"] = "StatusCheckCPU-i-1"
+    del event["detail"]["configuration"]
+    assert identify_event_type(event) == "EC2_STATUS_CHECK_FAILED"
+
+
+@pytest.mark.parametrize(
+    "malformed", [[None], ["bogus", {"metricStat": None}], [{"metricStat": {"metric": "x"}}]]
+)
+def test_malformed_metrics_entries_are_skipped(malformed):
+    event = alarm_event("status_check", "i-1", None, "evt-1")
+    metrics = event["detail"]["configuration"]["metrics"]
+    event["detail"]["configuration"]["metrics"] = malformed + metrics
+    assert identify_event_type(event) == "EC2_STATUS_CHECK_FAILED"
+    assert extract_instance_ids(event) == ["i-1"]
+
+
+@pytest.mark.parametrize(
+    "detail", [None, "bogus", {"configuration": "bogus"}, {"configuration": {"metrics": "x"}}]
+)
+def test_malformed_detail_is_unknown(detail):
+    event = {"source": "aws.cloudwatch", "detail": detail}
+    assert identify_event_type(event) == "UNKNOWN"
+    assert extract_instance_ids(event) == []
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from scripts.simulate_event import alarm_event, wrap
+from src import lambda_handler
+from src.storage import idempotency
+from src.storage.idempotency import (
+    STATUS_COMPLETED,
+    STATUS_IN_PROGRESS,
+    IdempotencyStore,
+    idempotency_store,
+)
+
+
+@pytest.fixture
+def shared(aws, monkeypatch):
+    """The handler's idempotency records kept in the fake table."""
+    monkeypatch.setattr(idempotency_store, "_table", aws.table)
+    return aws
+
+
+def _incidents(aws):
+    return [item for item in aws.table.scan()["Items"] if item["pk"].startswith("INCIDENT#")]
+
+
+def _other_container():
+    """Forget what this container has cached, as a cold container would."""
+    with idempotency_store._lock:
+        idempotency_store._cache.clear()
+
+
+def test_redelivered_event_is_answered_from_the_store(shared):
+    event = alarm_event("status_check", "i-1", None, "evt-1")
+    first = json.loads(lambda_handler.lambda_handler(event, None)["body"])
+
+    _other_container()
+    again = json.loads(lambda_handler.lambda_handler(event, None)["body"])
+    assert again == dict(first, duplicate=True)
+    assert len(_incidents(shared)) == 1
+
+    payload = wrap([event], "sqs")[0]
+    _other_container()
+    assert lambda_handler.lambda_handler(payload, None) == {"batchItemFailures": []}
+    assert len(_incidents(shared)) == 1
+
+
+def test_failed_event_releases_its_key(shared, monkeypatch):
+    event = alarm_event("status_check", "i-1", None, "evt-1")
+    with monkeypatch.context() as broken:
+        def fail(event_type, context):
+            raise RuntimeError("remediation crashed")
+
+        broken.setattr(lambda_handler, "run_remediation", fail)
+        with pytest.raises(RuntimeError):
+            lambda_handler.lambda_handler(event, None)
+        payload = wrap([event], "sqs")[0]
+        assert len(lambda_handler.lambda_handler(payload, None)["batchItemFailures"]) == 1
+
+    assert not [i for i in shared.table.scan()["Items"] if i["pk"].startswith("IDEMPOTENCY#")]
+    body = json.loads(lambda_handler.lambda_handler(event, None)["body"])
+    assert "duplicate" not in body
+    assert len(_incidents(shared)) == 1
+
+
+def test_event_in_progress_elsewhere_is_not_processed_twice(shared):
+    event = alarm_event("status_check", "i-1", None, "evt-1")
+    key = idempotency.idempotency_key(event, "i-1")
+    # Another container has claimed the event and is still working on it.
+    assert IdempotencyStore(table=shared.table).begin(key) is None
+
+    body = json.loads(lambda_handler.lambda_handler(event, None)["body"])
+    assert body == {"duplicate": True, "status": STATUS_IN_PROGRESS}
+    # A queued copy goes back to the queue to find the result later.
+    payload = wrap([event], "sqs")[0]
+    assert len(lambda_handler.lambda_handler(payload, None)["batchItemFailures"]) == 1
+    assert _incidents(shared) == []
+
+
+def test_expired_lease_and_ttl_make_the_key_claimable_again(aws, monkeypatch):
+    now = [1_000_000]
+    monkeypatch.setattr(idempotency.time, "time", lambda: now[0])
+    first = IdempotencyStore(table=aws.table, ttl_seconds=100, lease_seconds=10, cache_size=0)
+    second = IdempotencyStore(table=aws.table, ttl_seconds=100, lease_seconds=10, cache_size=0)
+
+    assert first.begin("k") is None
+    assert second.begin("k")["status"] == STATUS_IN_PROGRESS
+    now[0] += 11  # the first claimant crashed; its lease ran out
+    assert second.begin("k") is None
+
+    second.complete("k", {"ok": True})
+    assert first.begin("k") == {"status": STATUS_COMPLETED, "result": {"ok": True}}
+    now[0] += 101  # the completed record outlived its TTL
+    assert first.begin("k") is None
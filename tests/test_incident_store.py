@@ -0,0 +1,115 @@
+import collections
+
+import pytest
+
+from src.storage import dynamodb_client
+from src.storage.dynamodb_client import DynamoDBIncidentStore
+from src.storage.incident_store import IncidentBatchWriter, build_incident_item, incident_key
+
+
+def _incidents(count):
+    return [
+        build_incident_item(
+            "EC2_STATUS_CHECK_FAILED",
+            f"i-{n}",
+            {"type": "EC2_REBOOT", "action": "WOULD_REBOOT", "message": ""},
+            {"id": n},
+        )
+        for n in range(count)
+    ]
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Backoff delays slept by the store, without sleeping."""
+    delays = []
+    monkeypatch.setattr(dynamodb_client.time, "sleep", delays.append)
+    return delays
+
+
+def _stored(aws):
+    return {(i["pk"], i["sk"]) for i in aws.table.scan()["Items"]}
+
+
+def test_batches_are_written_in_chunks_of_25(aws):
+    items = _incidents(60)
+    outcomes = DynamoDBIncidentStore(aws.table).put_batch(items)
+
+    # The fake rejects BatchWriteItem requests of more than 25 items.
+    assert aws.table.requests["BatchWriteItem"] == 3
+    assert {k: o["status"] for k, o in outcomes.items()} == {
+        incident_key(i): "SUCCESS" for i in items
+    }
+    assert _stored(aws) == {incident_key(i) for i in items}
+
+
+def test_unprocessed_items_are_retried_with_backoff(aws, sleeps):
+    attempts = collections.Counter()
+
+    def throttled_twice(item):
+        attempts[item["instance_id"]] += 1
+        return attempts[item["instance_id"]] <= 2
+
+    aws.table.unprocessed = throttled_twice
+    items = _incidents(3)
+    store = DynamoDBIncidentStore(aws.table, max_retries=5, base_backoff_seconds=0.1)
+    outcomes = store.put_batch(items)
+
+    assert all(o["status"] == "SUCCESS" for o in outcomes.values())
+    assert _stored(aws) == {incident_key(i) for i in items}
+    assert aws.table.requests["BatchWriteItem"] == 3
+    # Full jitter on an exponential backoff: 0-0.1s, then 0-0.2s.
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 0.1 and 0 <= sleeps[1] <= 0.2
+
+
+def test_items_still_unprocessed_after_retries_are_reported_failed(aws, sleeps):
+    aws.table.unprocessed = lambda item: item["instance_id"] == "i-1"
+    items = _incidents(3)
+    outcomes = DynamoDBIncidentStore(aws.table, max_retries=2).put_batch(items)
+
+    assert aws.table.requests["BatchWriteItem"] == 3
+    assert len(sleeps) == 2
+    statuses = {item["instance_id"]: outcomes[incident_key(item)] for item in items}
+    assert statuses["i-1"] == {"status": "FAILED", "error": "Unprocessed after retries"}
+    assert statuses["i-0"] == statuses["i-2"] == {"status": "SUCCESS"}
+    assert _stored(aws) == {incident_key(items[0]), incident_key(items[2])}
+
+
+def test_batch_writer_flushes_when_full_and_on_exit(aws):
+    items = _incidents(7)
+    store = DynamoDBIncidentStore(aws.table)
+    with IncidentBatchWriter(store, max_items=3, max_delay_seconds=60) as writer:
+        for item in items:
+            writer.add(item)
+        assert aws.table.requests["BatchWriteItem"] == 2
+        assert len(writer.outcomes) == 6
+
+    assert aws.table.requests["BatchWriteItem"] == 3
+    assert {k for k, o in writer.outcomes.items() if o["status"] == "SUCCESS"} == {
+        incident_key(i) for i in items
+    }
+
+
+def test_batch_writer_records_a_failed_write_per_item(aws, monkeypatch):
+    def down(**_):
+        raise RuntimeError("DynamoDB is down")
+
+    monkeypatch.setattr(aws.table, "batch_write_item", down)
+    items = _incidents(2)
+    with IncidentBatchWriter(DynamoDBIncidentStore(aws.table, max_retries=0)) as writer:
+        for item in items:
+            writer.add(item)
+
+    assert writer.outcomes == {
+        incident_key(i): {"status": "FAILED", "error": "DynamoDB is down"} for i in items
+    }
+
+
+def test_put_incident_is_still_importable_from_dynamodb_client(aws):
+    from src.storage.dynamodb_client import put_incident
+
+    item = put_incident(
+        "EC2_HIGH_CPU", "i-1", {"remediation_type": "EC2_HIGH_CPU", "action": "NONE"}, {"id": 1}
+    )
+    assert _stored(aws) == {incident_key(item)}
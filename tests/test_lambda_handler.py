@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from scripts.simulate_event import alarm_event, wrap
+from src import lambda_handler
+from src.storage import incident_store
+from src.storage.dynamodb_client import DynamoDBIncidentStore
+from src.storage.idempotency import idempotency_store
+
+
+def _multi_instance_event(event_id, *instance_ids):
+    event = alarm_event("status_check", instance_ids[0], None, event_id)
+    event["resources"] += [
+        f"arn:aws:ec2:ap-southeast-2:123456789012:instance/{i}" for i in instance_ids[1:]
+    ]
+    return event
+
+
+def _incidents(aws):
+    return sorted(
+        item["instance_id"]
+        for item in aws.table.scan()["Items"]
+        if item["pk"].startswith("INCIDENT#")
+    )
+
+
+@pytest.fixture(params=["container", "table"])
+def flaky_store(request, aws, monkeypatch):
+    """
+    Incidents of i-2 come back unprocessed from BatchWriteItem until the
+    test clears `aws.table.unprocessed`. Returns the instances remediated.
+    """
+    if request.param == "table":
+        monkeypatch.setattr(idempotency_store, "_table", aws.table)
+    incident_store.set_incident_store(
+        DynamoDBIncidentStore(aws.table, max_retries=1, base_backoff_seconds=0)
+    )
+    aws.table.unprocessed = lambda item: item.get("instance_id") == "i-2"
+
+    remediated = []
+    run_remediation = lambda_handler.run_remediation
+
+    def record(event_type, context):
+        remediated.append(context["instance_id"])
+        return run_remediation(event_type, context)
+
+    monkeypatch.setattr(lambda_handler, "run_remediation", record)
+    return remediated
+
+
+def test_partly_stored_event_is_retried_for_the_rest_only(aws, flaky_store):
+    event = _multi_instance_event("evt-1", "i-1", "i-2")
+    with pytest.raises(lambda_handler.IncidentsNotStored) as failure:
+        lambda_handler.lambda_handler(event, None)
+    assert list(failure.value.stored) == ["i-1"]
+    assert sorted(flaky_store) == ["i-1", "i-2"]
+    assert _incidents(aws) == ["i-1"]
+
+    aws.table.unprocessed = None
+    body = json.loads(lambda_handler.lambda_handler(event, None)["body"])
+    assert body["instance_ids"] == ["i-1", "i-2"]
+    assert [r["action"] for r in body["remediations"]] == ["WOULD_REBOOT", "WOULD_REBOOT"]
+    assert sorted(flaky_store) == ["i-1", "i-2", "i-2"]
+    assert _incidents(aws) == ["i-1", "i-2"]
+
+    duplicate = json.loads(lambda_handler.lambda_handler(event, None)["body"])
+    assert duplicate == dict(body, duplicate=True)
+    assert _incidents(aws) == ["i-1", "i-2"]
+
+
+def test_partly_stored_batch_record_is_retried_for_the_rest_only(aws, flaky_store):
+    payload = wrap([_multi_instance_event("evt-1", "i-1", "i-2")], "sqs")[0]
+    assert len(lambda_handler.lambda_handler(payload, None)["batchItemFailures"]) == 1
+    assert _incidents(aws) == ["i-1"]
+
+    aws.table.unprocessed = None
+    assert lambda_handler.lambda_handler(payload, None) == {"batchItemFailures": []}
+    assert sorted(flaky_store) == ["i-1", "i-2", "i-2"]
+    assert _incidents(aws) == ["i-1", "i-2"]
+
+
+def test_event_with_nothing_stored_is_retried_in_full(aws, flaky_store):
+    aws.table.unprocessed = lambda item: True
+    event = _multi_instance_event("evt-1", "i-1", "i-2")
+    with pytest.raises(lambda_handler.IncidentsNotStored):
+        lambda_handler.lambda_handler(event, None)
+
+    aws.table.unprocessed = None
+    lambda_handler.lambda_handler(event, None)
+    assert sorted(flaky_store) == ["i-1", "i-1", "i-2", "i-2"]
+    assert _incidents(aws) == ["i-1", "i-2"]
@@ -0,0 +1,44 @@
+import json
+
+import pytest
+from botocore.exceptions import ParamValidationError
+
+from src.reporting import manifest
+
+
+@pytest.fixture
+def old_sdk(aws, monkeypatch):
+    """An S3 client whose SDK predates PutObject's IfMatch / IfNoneMatch."""
+    put_object = aws.s3.put_object
+
+    def put_without_conditions(**args):
+        unknown = {"IfMatch", "IfNoneMatch"} & set(args)
+        if unknown:
+            raise ParamValidationError(report=f"Unknown parameter in input: {unknown.pop()}")
+        return put_object(**args)
+
+    monkeypatch.setattr(aws.s3, "put_object", put_without_conditions)
+    monkeypatch.setattr(manifest, "_conditional_writes", True)
+    return aws
+
+
+def _dates(aws):
+    body = aws.s3.get_object(Bucket="b", Key="manifest.json")["Body"].read()
+    return [e["date"] for e in json.loads(body)["dates"]]
+
+
+def _entry(date):
+    return {"date": date, "key": f"daily-reports/{date}.json", "total": 1}
+
+
+def test_manifest_updates_are_conditional(aws):
+    assert manifest.update_manifest("b", "manifest.json", [_entry("2025-01-01")])["status"] == "SUCCESS"
+    assert manifest.update_manifest("b", "manifest.json", [_entry("2025-01-02")])["status"] == "SUCCESS"
+    assert _dates(aws) == ["2025-01-02", "2025-01-01"]
+
+
+def test_manifest_falls_back_to_plain_puts_on_an_old_sdk(old_sdk):
+    for date in ("2025-01-01", "2025-01-02"):
+        assert manifest.update_manifest("b", "manifest.json", [_entry(date)])["status"] == "SUCCESS"
+    assert _dates(old_sdk) == ["2025-01-02", "2025-01-01"]
+    assert manifest._conditional_writes is False
@@ -0,0 +1,135 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+
+from scripts.simulate_event import alarm_event, wrap
+from src import lambda_handler
+from src.utils import metrics
+
+
+@pytest.fixture
+def emf():
+    """EMF records emitted during the test, parsed."""
+    lines = []
+    metrics.set_emitter(lines.append)
+    try:
+        yield lines
+    finally:
+        metrics.set_emitter(None)
+
+
+def _records(lines):
+    return [json.loads(line) for line in lines]
+
+
+def _definition(record):
+    (definition,) = record["_aws"]["CloudWatchMetrics"]
+    return definition
+
+
+def _units(record):
+    return {m["Name"]: m["Unit"] for m in _definition(record)["Metrics"]}
+
+
+@pytest.fixture
+def ec2():
+    client = boto3.client(
+        "ec2",
+        region_name="ap-southeast-2",
+        aws_access_key_id="test",
+        aws_secret_access_key="test",
+    )
+    metrics.instrument_client(client)
+    with Stubber(client) as stubber:
+        yield client, stubber
+
+
+def test_scope_emits_one_record_with_its_dimensions(emf):
+    with metrics.metrics_scope(Handler="Batch") as scope:
+        with metrics.span("Work"):
+            pass
+        metrics.count("Records", 2)
+        metrics.count("Records")
+        scope.set_dimensions(Handler="Event")
+
+    (record,) = _records(emf)
+    definition = _definition(record)
+    assert definition["Namespace"] == "CloudIncidentAutoRemediation"
+    assert definition["Dimensions"] == [["Handler"]]
+    assert record["Handler"] == "Event"
+    assert _units(record) == {"Work": "Milliseconds", "Records": "Count"}
+    assert record["Work"] >= 0
+    assert record["Records"] == 3
+
+
+def test_scope_that_raises_counts_errors(emf):
+    with pytest.raises(ValueError):
+        with metrics.metrics_scope(Handler="Event"):
+            raise ValueError("boom")
+
+    (record,) = _records(emf)
+    assert record["Errors"] == 1
+    assert _units(record) == {"Errors": "Count"}
+
+
+def test_instrumented_client_times_calls_and_counts_errors(emf, ec2):
+    client, stubber = ec2
+    stubber.add_response("describe_instances", {"Reservations": []})
+    stubber.add_client_error("reboot_instances", "UnauthorizedOperation", http_status_code=403)
+    stubber.add_client_error("reboot_instances", "DryRunOperation", http_status_code=412)
+
+    with metrics.metrics_scope(Handler="Event"):
+        client.describe_instances()
+        for _ in range(2):
+            with pytest.raises(client.exceptions.ClientError):
+                client.reboot_instances(InstanceIds=["i-1"], DryRun=True)
+
+    (record,) = _records(emf)
+    assert _units(record) == {
+        "EC2.DescribeInstances": "Milliseconds",
+        "EC2.RebootInstances": "Milliseconds",
+        "EC2.RebootInstances.Errors": "Count",
+    }
+    assert isinstance(record["EC2.DescribeInstances"], float)
+    assert len(record["EC2.RebootInstances"]) == 2
+    # The successful DryRun probe is not an error.
+    assert record["EC2.RebootInstances.Errors"] == 1
+
+
+def test_calls_from_bound_workers_land_in_the_callers_scope(emf, ec2):
+    client, stubber = ec2
+    for _ in range(3):
+        stubber.add_response("describe_instances", {"Reservations": []})
+
+    with metrics.metrics_scope(Handler="Batch"):
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            list(pool.map(metrics.bind_scope(lambda _: client.describe_instances()), range(3)))
+    # Outside any scope nothing is recorded.
+    stubber.add_response("describe_instances", {"Reservations": []})
+    client.describe_instances()
+
+    (record,) = _records(emf)
+    assert record["Handler"] == "Batch"
+    assert len(record["EC2.DescribeInstances"]) == 3
+
+
+def test_batch_invocation_emits_event_and_invocation_records(aws, emf):
+    events = [alarm_event("status_check", f"i-{n}", None, f"evt-{n}") for n in range(2)]
+    lambda_handler.lambda_handler(wrap(events, "sqs")[0], None)
+
+    *per_event, invocation = _records(emf)
+    assert len(per_event) == 2
+    for record in per_event:
+        assert _definition(record)["Dimensions"] == [["EventType", "RemediationAction"]]
+        assert (record["EventType"], record["RemediationAction"]) == (
+            "EC2_STATUS_CHECK_FAILED",
+            "WOULD_REBOOT",
+        )
+        assert {"Remediate", "StoreIncident"} <= set(_units(record))
+        assert record["Incidents"] == 1
+    assert _definition(invocation)["Dimensions"] == [["Handler"]]
+    assert invocation["Handler"] == "Batch"
+    assert (invocation["Records"], invocation["FailedRecords"]) == (2, 0)
@@ -0,0 +1,107 @@
+import base64
+import gzip
+import json
+import os
+
+import pytest
+
+from scripts.simulate_event import alarm_event
+from src.storage import payload_codec
+from src.storage.payload_codec import (
+    BLOB_ATTR,
+    ENCODING_ATTR,
+    ENCODING_JSON,
+    ENCODING_S3,
+    ENCODING_ZLIB,
+    RAW_EVENT_ATTR,
+    REF_ATTR,
+    decode_raw_event,
+    encode_raw_event,
+)
+
+PK, SK = "INCIDENT#EC2_HIGH_CPU", "2025-11-30T10:00:00Z#abc"
+
+
+@pytest.fixture
+def raw_bucket(monkeypatch):
+    monkeypatch.setattr(payload_codec, "RAW_EVENT_BUCKET_NAME", "raw-events-private")
+    return "raw-events-private"
+
+
+def _large_event():
+    # Random bytes do not compress, so the blob stays over the threshold.
+    return dict(alarm_event("high_cpu", "i-1", None, "evt-1"), blob=os.urandom(20000).hex())
+
+
+def test_alarm_event_is_stored_compressed_inline():
+    event = alarm_event("high_cpu", "i-1", None, "evt-1")
+    attrs = encode_raw_event(event, PK, SK)
+
+    assert attrs[ENCODING_ATTR] == ENCODING_ZLIB
+    assert len(attrs[BLOB_ATTR]) < len(json.dumps(event, separators=(",", ":"))) / 2
+    assert decode_raw_event(attrs) == event
+
+
+def test_payload_that_does_not_shrink_is_stored_as_json():
+    attrs = encode_raw_event({}, PK, SK)
+    assert attrs == {ENCODING_ATTR: ENCODING_JSON, BLOB_ATTR: b"{}"}
+    assert decode_raw_event(attrs) == {}
+
+
+def test_large_payload_is_offloaded_to_the_raw_event_bucket(aws, raw_bucket):
+    event = _large_event()
+    attrs = encode_raw_event(event, PK, SK)
+
+    key = f"raw-events/{PK}/{SK}.json.gz"
+    assert attrs == {ENCODING_ATTR: ENCODING_S3, REF_ATTR: f"s3://{raw_bucket}/{key}"}
+    stored = aws.s3.get_object(Bucket=raw_bucket, Key=key)
+    assert stored["ContentEncoding"] == "gzip"
+    assert json.loads(gzip.decompress(stored["Body"].read())) == event
+    assert decode_raw_event(attrs) == event
+
+
+def test_payload_under_the_threshold_is_not_offloaded(aws, raw_bucket):
+    attrs = encode_raw_event(alarm_event("high_cpu", "i-1", None, "evt-1"), PK, SK)
+    assert attrs[ENCODING_ATTR] == ENCODING_ZLIB
+    assert aws.s3.requests.get("PutObject", 0) == 0
+
+
+def test_large_payload_stays_inline_without_a_raw_event_bucket(aws):
+    assert payload_codec.RAW_EVENT_BUCKET_NAME == ""
+    event = _large_event()
+    attrs = encode_raw_event(event, PK, SK)
+
+    assert attrs[ENCODING_ATTR] in (ENCODING_ZLIB, ENCODING_JSON)
+    assert len(attrs[BLOB_ATTR]) > payload_codec.RAW_EVENT_OFFLOAD_BYTES
+    assert aws.s3.requests.get("PutObject", 0) == 0
+    assert decode_raw_event(attrs) == event
+
+
+def test_failed_offload_falls_back_to_inline(aws, raw_bucket, monkeypatch):
+    def put_object(**_):
+        raise RuntimeError("S3 is down")
+
+    monkeypatch.setattr(aws.s3, "put_object", put_object)
+    event = _large_event()
+    attrs = encode_raw_event(event, PK, SK)
+    assert BLOB_ATTR in attrs
+    assert decode_raw_event(attrs) == event
+
+
+def test_legacy_and_exported_items_are_decoded(monkeypatch):
+    event = alarm_event("status_check", "i-1", None, "evt-1")
+    assert decode_raw_event({RAW_EVENT_ATTR: event}) == event
+    assert decode_raw_event({"pk": PK}) is None
+
+    monkeypatch.setattr(payload_codec, "RAW_EVENT_STORAGE", "map")
+    assert encode_raw_event(event, PK, SK) == {RAW_EVENT_ATTR: event}
+
+    monkeypatch.undo()
+    attrs = encode_raw_event(event, PK, SK)
+    exported = dict(attrs, **{BLOB_ATTR: {"B": base64.b64encode(attrs[BLOB_ATTR]).decode()}})
+    assert decode_raw_event(exported) == event
+
+
+def test_unknown_encoding_is_rejected():
+    with pytest.raises(ValueError):
+        decode_raw_event({ENCODING_ATTR: "zlib-d9", BLOB_ATTR: b""})
@@ -0,0 +1,75 @@
+import pytest
+
+from scripts.simulate_event import alarm_event, wrap
+from src import lambda_handler
+from src.remediation import ec2_batcher, ec2_status_check
+from src.remediation.rate_limit import (
+    InstanceActionLimiter,
+    RateLimitExceeded,
+    ec2_api_bucket,
+    instance_limiter,
+)
+from src.utils.resilience import CircuitOpenError
+
+
+def _throttle(monkeypatch, error):
+    def acquire(region, account=None):
+        raise error
+
+    monkeypatch.setattr(ec2_api_bucket, "acquire", acquire)
+
+
+def test_limit_suppresses_after_limit_reached(aws):
+    limiter = InstanceActionLimiter(limit=3, window_seconds=3600, table=aws.table)
+    now = 3600 * 100 + 10
+    allowed = [limiter.acquire("reboot", "i-1", now)["allowed"] for _ in range(5)]
+    assert allowed == [True, True, True, False, False]
+    # Another container sees the same count.
+    other = InstanceActionLimiter(limit=3, window_seconds=3600, table=aws.table)
+    assert not other.acquire("reboot", "i-1", now)["allowed"]
+
+
+def test_refund_gives_the_slot_back(aws):
+    limiter = InstanceActionLimiter(limit=1, window_seconds=3600, table=aws.table)
+    decision = limiter.acquire("reboot", "i-1", 3600 * 100)
+    limiter.refund("reboot", "i-1", decision)
+    assert limiter.acquire("reboot", "i-1", 3600 * 100)["allowed"]
+
+
+@pytest.mark.parametrize("error", [RateLimitExceeded("throttled"), CircuitOpenError("open")])
+def test_throttled_attempts_do_not_use_up_the_instance_limit(aws, monkeypatch, error):
+    _throttle(monkeypatch, error)
+    for _ in range(instance_limiter.limit + 2):
+        with pytest.raises(type(error)):
+            ec2_batcher.execute_ec2_action("reboot", "i-1")
+
+    monkeypatch.undo()
+    result = ec2_batcher.execute_ec2_action("reboot", "i-1")
+    assert result["status"] == "SUCCESS"
+
+
+def test_throttled_retry_of_a_queued_event_still_reboots(aws, monkeypatch):
+    payload = wrap([alarm_event("status_check", "i-1", None, "evt-1")], "sqs")[0]
+
+    monkeypatch.setattr(ec2_status_check, "DRY_RUN_ONLY", False)
+    with monkeypatch.context() as throttled:
+        _throttle(throttled, RateLimitExceeded("throttled"))
+        for _ in range(instance_limiter.limit + 2):
+            failures = lambda_handler.lambda_handler(payload, None)["batchItemFailures"]
+            assert len(failures) == 1
+
+    assert lambda_handler.lambda_handler(payload, None) == {"batchItemFailures": []}
+    assert [i["action"] for i in _incidents(aws)] == ["REBOOT"]
+    assert _incidents(aws)[0]["instance_id"] == "i-1"
+
+
+def test_dry_run_alarms_are_never_suppressed(aws):
+    for n in range(instance_limiter.limit + 3):
+        lambda_handler.lambda_handler(alarm_event("status_check", "i-1", None, f"evt-{n}"), None)
+
+    assert {i["action"] for i in _incidents(aws)} == {"WOULD_REBOOT"}
+    assert len(_incidents(aws)) == instance_limiter.limit + 3
+
+
+def _incidents(aws):
+    return [item for item in aws.table.scan()["Items"] if item["pk"].startswith("INCIDENT#")]
@@ -0,0 +1,148 @@
+import boto3
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+from botocore.stub import Stubber
+
+from scripts.simulate_event import alarm_event, wrap
+from src import lambda_handler
+from src.remediation import ec2_status_check
+from src.remediation.rate_limit import instance_limiter
+from src.utils import aws_clients, resilience
+from src.utils.resilience import CircuitBreaker, CircuitOpenError, classify_error
+
+REGION = "ap-southeast-2"
+
+
+@pytest.fixture(autouse=True)
+def closed_circuits():
+    resilience.reset_breakers()
+    yield
+    resilience.reset_breakers()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def ec2():
+    """A real EC2 client behind its circuit breaker, answered by a Stubber."""
+    client = boto3.client(
+        "ec2", region_name=REGION, aws_access_key_id="test", aws_secret_access_key="test"
+    )
+    resilience.protect_client(client)
+    with Stubber(client) as stubber:
+        yield client, stubber
+
+
+def _error(code, status=400):
+    return ClientError(
+        {"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": status}}, "Op"
+    )
+
+
+@pytest.mark.parametrize(
+    "error, cls",
+    [
+        (_error("Throttling"), resilience.THROTTLED),
+        (_error("SomethingNew", 503), resilience.TRANSIENT),
+        (_error("SomethingNew", 429), resilience.THROTTLED),
+        (_error("ConditionalCheckFailedException"), resilience.CONFLICT),
+        (_error("UnauthorizedOperation", 403), resilience.DENIED),
+        (_error("DryRunOperation", 412), resilience.DRY_RUN),
+        (EndpointConnectionError(endpoint_url="https://ec2"), resilience.TRANSIENT),
+        (CircuitOpenError("open"), resilience.UNAVAILABLE),
+        (ValueError("bug"), resilience.UNKNOWN),
+    ],
+)
+def test_classify_error(error, cls):
+    assert classify_error(error) == cls
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("ec2/test", failure_threshold=3, reset_seconds=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()  # not consecutive
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_half_open_breaker_lets_one_probe_through(clock):
+    breaker = CircuitBreaker("ec2/test", failure_threshold=1, reset_seconds=30)
+    breaker.record_failure()
+    clock[0] += 30
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial call
+
+    breaker.record_failure()  # the trial failed: open for another period
+    clock[0] += 29
+    assert not breaker.allow()
+    clock[0] += 1
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()
+
+
+def test_client_calls_fail_fast_once_the_circuit_opens(ec2):
+    client, stubber = ec2
+    threshold = resilience.get_breaker("ec2", REGION).failure_threshold
+    for _ in range(threshold):
+        stubber.add_client_error("describe_instances", "Unavailable", http_status_code=503)
+        with pytest.raises(ClientError):
+            client.describe_instances()
+
+    # Stubber checks calls against its queue before the breaker sees them,
+    # so queue the answer the refused call would have got.
+    stubber.add_response("describe_instances", {"Reservations": []})
+    with pytest.raises(CircuitOpenError):
+        client.describe_instances()
+
+    resilience.get_breaker("ec2", REGION).reset()
+    assert client.describe_instances()["Reservations"] == []  # still queued: never sent
+    stubber.assert_no_pending_responses()
+
+
+def test_dry_run_and_other_answers_do_not_count_as_failures(ec2):
+    client, stubber = ec2
+    breaker = resilience.get_breaker("ec2", REGION)
+    for _ in range(breaker.failure_threshold - 1):
+        breaker.record_failure()
+    for code, status in [("DryRunOperation", 412), ("UnauthorizedOperation", 403)]:
+        stubber.add_client_error("reboot_instances", code, http_status_code=status)
+        with pytest.raises(ClientError):
+            client.reboot_instances(InstanceIds=["i-1"], DryRun=True)
+        assert breaker.state == "closed"
+    assert breaker.failures == 0
+
+
+def test_open_circuit_fails_the_record_and_refunds_the_slot(aws, ec2, monkeypatch):
+    client, stubber = ec2
+    monkeypatch.setitem(aws_clients._clients, ("ec2", aws_clients.AWS_REGION), client)
+    monkeypatch.setattr(ec2_status_check, "DRY_RUN_ONLY", False)
+    breaker = resilience.get_breaker("ec2", REGION)
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+    payload = wrap([alarm_event("status_check", "i-1", None, "evt-1")], "sqs")[0]
+    # Refused calls leave the queued DryRun answer in place (see above).
+    stubber.add_client_error("reboot_instances", "DryRunOperation", http_status_code=412)
+    for _ in range(instance_limiter.limit + 2):
+        assert len(lambda_handler.lambda_handler(payload, None)["batchItemFailures"]) == 1
+
+    breaker.reset()
+    stubber.add_response("reboot_instances", {})
+    assert lambda_handler.lambda_handler(payload, None) == {"batchItemFailures": []}
+    incidents = [i for i in aws.table.scan()["Items"] if i["pk"].startswith("INCIDENT#")]
+    assert [i["action"] for i in incidents] == ["REBOOT"]
+    stubber.assert_no_pending_responses()
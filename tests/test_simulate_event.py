@@ -0,0 +1,54 @@
+import base64
+import json
+
+from scripts.simulate_event import alarm_event, load_recorded_events
+from src.storage.incident_store import build_incident_item
+from src.storage.payload_codec import BLOB_ATTR, ENCODING_ATTR, ENCODING_S3, REF_ATTR
+
+
+def _item(event_id):
+    return build_incident_item(
+        "EC2_STATUS_CHECK_FAILED",
+        "i-1",
+        {"type": "EC2_REBOOT", "action": "REBOOT", "message": ""},
+        alarm_event("status_check", "i-1", None, event_id),
+    )
+
+
+def _export(item):
+    """The item as `json.dumps` of a table export writes it: binary as base64."""
+    return {
+        k: base64.b64encode(bytes(v)).decode() if isinstance(v, (bytes, bytearray)) else v
+        for k, v in item.items()
+    }
+
+
+def test_replay_decodes_compressed_raw_events(aws, tmp_path):
+    compressed = _item("evt-1")
+    assert BLOB_ATTR in compressed
+    dynamodb_json = {
+        k: {"B": v} if k == BLOB_ATTR else {"S": v} for k, v in _export(_item("evt-2")).items()
+    }
+    legacy = dict(_item("evt-3"), raw_event=alarm_event("high_cpu", "i-2", None, "evt-3"))
+    for attr in (ENCODING_ATTR, BLOB_ATTR):
+        legacy.pop(attr)
+    offloaded = {"pk": "INCIDENT#X", "sk": "s", ENCODING_ATTR: ENCODING_S3, REF_ATTR: "s3://raw/gone.json.gz"}
+    path = tmp_path / "incidents.json"
+    path.write_text(json.dumps([_export(compressed), dynamodb_json, legacy, offloaded]))
+
+    events = [event for _, event in load_recorded_events([str(path)])]
+    assert [e["id"] for e in events] == ["evt-1", "evt-2", "evt-3"]
+    assert events[0]["detail-type"] == "CloudWatch Alarm State Change"
+    assert "raw_event_blob" not in events[0]
+
+
+def test_replay_reads_events_from_handler_logs(tmp_path):
+    event = alarm_event("status_check", "i-1", None, "evt-1")
+    log = {"message": "Incoming CloudWatch/SNS event", "extra": {"step": 1, "event": event}}
+    other = {"message": "Incident stored", "extra": {"saved_item": {ENCODING_ATTR: "zlib-d1"}}}
+    path = tmp_path / "handler.log"
+    path.write_text(
+        f"2025-01-01T00:00:00 [INFO] src.lambda_handler - {json.dumps(log)}\n"
+        f"2025-01-01T00:00:01 [INFO] src.lambda_handler - {json.dumps(other)}\n"
+    )
+    assert [e for _, e in load_recorded_events([str(path)])] == [event]
@@ -0,0 +1,70 @@
+import json
+import os
+import subprocess
+import sys
+
+from conftest import ROOT_DIR
+
+# Runs in a fresh interpreter: the backend is chosen by configuration
+# read at import time. Only EC2 (the remediation itself) is faked; any
+# other AWS call is recorded and fails.
+SCRIPT = """
+import datetime, json
+import botocore.client
+
+calls = []
+def refuse(self, operation, params):
+    calls.append(self.meta.service_model.service_name + "." + operation)
+    raise AssertionError("AWS called offline: " + calls[-1])
+botocore.client.BaseClient._make_api_call = refuse
+
+from benchmarks.fakes import FakeEC2Client
+from scripts.simulate_event import alarm_event
+from src import lambda_handler
+from src.reporting.daily_report import build_daily_report, daily_report_fingerprint
+from src.utils import aws_clients
+
+aws_clients._clients[("ec2", aws_clients.AWS_REGION)] = FakeEC2Client()
+event = alarm_event("status_check", "i-1", None, "evt-1")
+responses = [lambda_handler.lambda_handler(event, None) for _ in range(2)]
+today = datetime.datetime.utcnow().strftime("%Y-%m-%d")
+print(json.dumps({
+    "responses": [json.loads(r["body"]) for r in responses],
+    "report": build_daily_report(today),
+    "fingerprint": daily_report_fingerprint(today),
+    "calls": calls,
+}))
+"""
+
+
+def test_handler_and_report_run_offline_on_sqlite(tmp_path):
+    env = {
+        k: v for k, v in os.environ.items() if not k.startswith("AWS_") or k == "AWS_REGION"
+    }
+    env.update(
+        INCIDENT_STORE_BACKEND="sqlite",
+        INCIDENT_STORE_PATH=str(tmp_path / "incidents.db"),
+        AWS_EC2_METADATA_DISABLED="true",
+        AWS_SHARED_CREDENTIALS_FILE=str(tmp_path / "none"),
+        AWS_CONFIG_FILE=str(tmp_path / "none"),
+        # Every raw event would be offloaded if a bucket were configured.
+        RAW_EVENT_OFFLOAD_BYTES="1",
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", SCRIPT],
+        cwd=ROOT_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert out.returncode == 0, out.stderr
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+
+    assert result["calls"] == []
+    first, second = result["responses"]
+    assert first["remediation"]["action"] == "WOULD_REBOOT"
+    # The redelivery is answered from the in-process idempotency cache.
+    assert second == dict(first, duplicate=True)
+    assert "- Total incidents: 1" in result["report"]
+    assert result["fingerprint"]["incident-count"] == "1"